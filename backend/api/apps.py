@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Registers the Team change receivers that refresh leader lookups,
+        # the Publication upload receiver that queues PDF extraction and
+        # the catalog receivers that republish snapshots / feeds and drop
+        # the bootstrap cache.
+        from . import bootstrap, feeds, publication_text, snapshots, team_leader_utils  # noqa: F401
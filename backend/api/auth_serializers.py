@@ -5,9 +5,10 @@ import logging
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.db import transaction
-from .models import Member, Team, UserProfile, InternalWhitelistEntry, TeamLeaderWhitelist
+from .models import Member, Team, UserProfile, InternalWhitelistEntry, TeamLeaderWhitelist, normalize_email
 from .member_catalog import get_career_pair, resolve_role_pair
 from .security import reject_suspicious_text
+from .team_leader_utils import find_env_leader_team
 
 security_log = logging.getLogger('security')
 
@@ -28,8 +29,8 @@ class RegisterSerializer(serializers.Serializer):
     image = serializers.ImageField(required=False, allow_null=True)
 
     def validate_email(self, value):
-        email = value.lower()
-        if Member.objects.filter(email=email).exists() or User.objects.filter(username=email).exists():
+        email = normalize_email(value)
+        if UserProfile.email_in_use(email):
             raise serializers.ValidationError("A user with this email already exists.")
         return email
 
@@ -105,14 +106,7 @@ class RegisterSerializer(serializers.Serializer):
 
     def _find_env_leader_team(self, email):
         """Return the Team object if email is in the .env leader whitelist, else None."""
-        import os
-        email = email.strip().lower()
-        for team in Team.objects.all():
-            key = 'TEAM_LEADERS_' + team.name_en.upper().replace(' ', '_').replace('-', '_')
-            env_emails = [e.strip().lower() for e in os.getenv(key, '').split(',') if e.strip()]
-            if email in env_emails:
-                return team
-        return None
+        return find_env_leader_team(email)
 
     @transaction.atomic
     def create(self, validated_data):
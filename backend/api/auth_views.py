@@ -13,9 +13,8 @@ from django.utils.encoding import force_bytes, force_str
 from django.core.mail import send_mail
 from django.conf import settings
 from django.core.cache import cache
-from django.db.models import Q
 
-from .models import Member, UserProfile, TeamLeaderRequest, Team
+from .models import Member, UserProfile, TeamLeaderRequest, Team, normalize_email
 from .security_logging import get_client_ip, log_team_leader_event
 from .auth_serializers import (
     RegisterSerializer,
@@ -124,13 +123,21 @@ def _attempt_key(email, ip):
 
 
 def _find_auth_user(identifier):
-    normalized = (identifier or '').strip().lower()
+    normalized = normalize_email(identifier)
     if not normalized:
         return None
 
-    return User.objects.filter(
-        Q(username__iexact=normalized) | Q(email__iexact=normalized)
-    ).first()
+    profile = UserProfile.objects.select_related('user').filter(normalized_email=normalized).first()
+    if profile is not None:
+        return profile.user
+
+    # Accounts without a claimed login email: a superuser named "admin", or a
+    # user whose profile email was changed or lost a collision. Both lookups
+    # are served by the UPPER() indexes on auth_user (migration 0027).
+    return (
+        User.objects.filter(username__iexact=normalized).first()
+        or User.objects.filter(email__iexact=normalized).first()
+    )
 
 
 def _is_login_locked(email, ip):
@@ -167,7 +174,7 @@ def register_view(request):
         serializer = RegisterSerializer(data=request.data)
         if not serializer.is_valid():
             log_team_leader_event('registration_failed', email, 'N/A', client_ip,
-                                  f'Validation errors: {serializer.errors}')
+                                  {'validation_errors': serializer.errors})
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         result = serializer.save()
@@ -177,7 +184,7 @@ def register_view(request):
 
         team_label = member.team.name_en if member and member.team_id else 'N/A'
         log_team_leader_event('registration_success', email, team_label, client_ip,
-                              f'Internal: {profile.is_internal}, Role: {profile.internal_role}')
+                              {'internal': profile.is_internal, 'role': profile.internal_role})
 
         refresh = RefreshToken.for_user(user)
         refresh['is_internal'] = bool(profile.is_internal)
@@ -204,7 +211,7 @@ def register_view(request):
 
     except Exception as e:
         log_team_leader_event('error', email, 'N/A', client_ip,
-                              f'Registration error: {str(e)}')
+                              {'registration_error': str(e)})
         return Response({'error': 'Registration failed'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -436,7 +443,7 @@ def check_email_view(request):
     whitelist_role = get_email_whitelist_role(email)
 
     is_whitelisted = whitelist_role is not None
-    is_taken = Member.objects.filter(email=email).exists() or User.objects.filter(username=email).exists()
+    is_taken = UserProfile.email_in_use(email)
 
     return Response({
         'email': email,
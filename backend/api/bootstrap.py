@@ -0,0 +1,78 @@
+"""
+Aggregated landing-page payload: teams with their active members plus the
+latest publications, built from a fixed number of queries (teams, members,
+social links, publications) regardless of catalog size.
+
+Payloads are cached per (language, limit) for BOOTSTRAP_CACHE_SECONDS and
+dropped in this process whenever a Team, Member, Publication or social link
+changes.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Member, Publication, RedSocial, Team
+from .renderers import FastJSONRenderer
+
+BOOTSTRAP_VERSION_KEY = 'bootstrap:version'
+DEFAULT_PUBLICATION_LIMIT = 6
+MAX_PUBLICATION_LIMIT = 50
+
+
+def build_bootstrap_payload(language='en', publication_limit=DEFAULT_PUBLICATION_LIMIT):
+    active_members = (
+        Member.objects.filter(user__isnull=False, is_active=True)
+        .prefetch_related('social_links')
+        .order_by('id')
+    )
+    teams = Team.objects.order_by('id').prefetch_related(Prefetch('members', queryset=active_members))
+    publications = (
+        Publication.objects.select_related('team', 'author')
+        .defer('search_vector')
+        .order_by('-publication_date', 'id')[:publication_limit]
+    )
+
+    return {
+        'language': language,
+        'teams': [
+            {**team.to_dict(), 'members': [member.to_dict(language) for member in team.members.all()]}
+            for team in teams
+        ],
+        'publications': [publication.to_dict(language) for publication in publications],
+    }
+
+
+def _cache_version():
+    return cache.get_or_set(BOOTSTRAP_VERSION_KEY, time.time_ns, timeout=None)
+
+
+def get_bootstrap_document(language='en', publication_limit=DEFAULT_PUBLICATION_LIMIT):
+    """Return (rendered JSON bytes, etag) for the payload, using the cache when possible."""
+    key = f'bootstrap:{_cache_version()}:{language}:{publication_limit}'
+    document = cache.get(key)
+    if document is None:
+        body = FastJSONRenderer().render(build_bootstrap_payload(language, publication_limit))
+        document = (body, '"%s"' % hashlib.sha1(body).hexdigest())
+        cache.set(key, document, timeout=int(getattr(settings, 'BOOTSTRAP_CACHE_SECONDS', 60)))
+    return document
+
+
+def invalidate_bootstrap_cache():
+    cache.set(BOOTSTRAP_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+@receiver(post_save, sender=Publication)
+@receiver(post_delete, sender=Publication)
+@receiver(post_save, sender=RedSocial)
+@receiver(post_delete, sender=RedSocial)
+def _invalidate_on_catalog_change(sender, **kwargs):
+    invalidate_bootstrap_cache()
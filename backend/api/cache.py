@@ -0,0 +1,18 @@
+from django.core.cache.backends.locmem import LocMemCache
+
+from .instrumentation import record_cache_lookup
+
+_MISSING = object()
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache that reports hits and misses to the current request's metrics."""
+
+    def get(self, key, default=None, version=None):
+        # get_many() and get_or_set() go through get() as well.
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            record_cache_lookup(0, 1)
+            return default
+        record_cache_lookup(1)
+        return value
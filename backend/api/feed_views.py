@@ -0,0 +1,54 @@
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from .feeds import (
+    FEED_LANGUAGES,
+    cached_document,
+    document_name,
+    fingerprint_token,
+    publication_fingerprint,
+    read_document,
+)
+
+FEED_CACHE_CONTROL = 'public, max-age=300'
+
+
+def _serve_document(request, kind, content_type, language=None):
+    count, latest = publication_fingerprint()
+    token = fingerprint_token(count, latest)
+    etag = quote_etag(f'{kind}-{language or "all"}-{token}')
+    last_modified = int(latest.timestamp()) if latest else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        try:
+            content = read_document(document_name(kind, token, language))
+        except (FileNotFoundError, OSError):
+            # Not published yet: serve it from the cache (rendered once per
+            # change) and leave storage to refresh_feeds, so a burst of misses
+            # does not race to write it.
+            token, content = cached_document(kind, token, language)
+            etag = quote_etag(f'{kind}-{language or "all"}-{token}')
+        response = HttpResponse(content, content_type=content_type)
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = FEED_CACHE_CONTROL
+    return response
+
+
+@require_safe
+def sitemap_view(request):
+    """GET /sitemap.xml - Static pages plus every publication, with lastmod."""
+    return _serve_document(request, 'sitemap', 'application/xml; charset=utf-8')
+
+
+@require_safe
+def publication_feed_view(request, language):
+    """GET /api/feeds/publications.<en|es>.atom - Most recently updated publications."""
+    if language not in FEED_LANGUAGES:
+        raise Http404('Unknown feed language.')
+    return _serve_document(request, 'feed', 'application/atom+xml; charset=utf-8', language)
@@ -0,0 +1,263 @@
+"""
+Incrementally maintained sitemap.xml and bilingual Atom feeds for publications.
+
+refresh_feeds() keeps a state file in storage with one pre-rendered fragment
+per publication. Each run only re-renders publications whose updated_at moved
+past the stored watermark (and drops deleted ones), then reassembles
+the documents from the cached fragments. Documents are stored under a name
+derived from the publications fingerprint (row count + latest updated_at),
+which is also what the views use as ETag, so conditional GETs are answered
+from a single aggregate query.
+
+Documents are published by `manage.py refresh_feeds` or, with
+FEEDS_REFRESH_ON_CHANGE, on a worker thread after publication changes are
+committed. The views never write storage: a request for a document that has
+not been published yet is rendered in memory with render_feeds() and the
+result is kept in the cache under its fingerprinted name (cached_document),
+so only the first request after a change pays for the render.
+"""
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.dateparse import parse_datetime
+
+from .models import Publication
+from .storage import write_storage_file
+
+logger = logging.getLogger(__name__)
+
+FEEDS_PREFIX = 'feeds'
+STATE_NAME = f'{FEEDS_PREFIX}/state.json'
+FEED_LANGUAGES = ('en', 'es')
+FEED_ENTRY_LIMIT = 50
+FEED_TITLES = {'en': 'Candelaria publications', 'es': 'Publicaciones de Candelaria'}
+SITEMAP_STATIC_PATHS = ('/', '/vehicle', '/team', '/publications', '/about', '/support')
+
+
+def publication_fingerprint():
+    """Return (count, latest updated_at) of publications in one aggregate query."""
+    result = Publication.objects.aggregate(count=Count('id'), latest=Max('updated_at'))
+    return result['count'], result['latest']
+
+
+def fingerprint_token(count, latest):
+    return f'{count}-{int(latest.timestamp() * 1000000) if latest else 0}'
+
+
+def document_name(kind, token, language=None):
+    if kind == 'sitemap':
+        return f'{FEEDS_PREFIX}/sitemap.{token}.xml'
+    return f'{FEEDS_PREFIX}/publications.{language}.{token}.atom'
+
+
+def _site_url():
+    return getattr(settings, 'FRONTEND_URL', 'http://localhost:5173').rstrip('/')
+
+
+def _render_entry(publication, base_url):
+    link = f'{base_url}/publications/{publication.slug}'
+    updated = publication.updated_at.isoformat()
+    entry = {
+        'updated': updated,
+        'sitemap': f'<url><loc>{escape(link)}</loc><lastmod>{updated}</lastmod></url>',
+    }
+    for language in FEED_LANGUAGES:
+        data = publication.to_dict(language)
+        author = f'<author><name>{escape(data["author_name"])}</name></author>' if data['author_name'] else ''
+        entry[language] = (
+            f'<entry><title>{escape(data["name"])}</title>'
+            f'<link rel="alternate" href={quoteattr(link)}/>'
+            f'<id>{escape(link)}#{language}</id>'
+            f'<published>{data["created_at"]}</published>'
+            f'<updated>{updated}</updated>'
+            f'{author}'
+            f'<summary>{escape(data["abstract"])}</summary></entry>'
+        )
+    return entry
+
+
+def _render_sitemap(entries, base_url):
+    urls = [f'<url><loc>{escape(base_url + path)}</loc></url>' for path in SITEMAP_STATIC_PATHS]
+    urls.extend(entry['sitemap'] for _, entry in sorted(entries.items(), key=lambda item: int(item[0])))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        + '\n'.join(urls)
+        + '\n</urlset>\n'
+    ).encode('utf-8')
+
+
+def _render_feed(entries, base_url, language, latest):
+    recent = sorted(entries.values(), key=lambda entry: entry['updated'], reverse=True)[:FEED_ENTRY_LIMIT]
+    updated = latest.isoformat() if latest else ''
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        f'<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="{language}">\n'
+        f'<title>{escape(FEED_TITLES[language])}</title>\n'
+        f'<link rel="alternate" href={quoteattr(base_url + "/publications")}/>\n'
+        f'<id>{escape(base_url)}/publications#{language}</id>\n'
+        f'<updated>{updated}</updated>\n'
+        + '\n'.join(entry[language] for entry in recent)
+        + '\n</feed>\n'
+    ).encode('utf-8')
+
+
+def _read_state(storage):
+    try:
+        with storage.open(STATE_NAME, 'rb') as handle:
+            return json.loads(handle.read().decode('utf-8'))
+    except (FileNotFoundError, OSError, ValueError):
+        return None
+
+
+def read_document(name, storage=None):
+    storage = storage or default_storage
+    with storage.open(name, 'rb') as handle:
+        return handle.read()
+
+
+def render_feeds(storage=None, full=False):
+    """
+    Render the sitemap and feeds from the stored state plus changed
+    publications, without writing anything.
+
+    Returns:
+        dict: {'token': str, 'latest': datetime or None, 'rendered': int,
+               'documents': {name: bytes}, 'state': dict,
+               'previous_token': str or None}
+    """
+    storage = storage or default_storage
+    base_url = _site_url()
+    count, latest = publication_fingerprint()
+    token = fingerprint_token(count, latest)
+
+    state = None if full else _read_state(storage)
+    if state and state.get('base_url') != base_url:
+        state = None
+    entries = state['entries'] if state else {}
+    watermark = parse_datetime(state['watermark']) if state and state.get('watermark') else None
+
+    changed = Publication.objects.select_related('team', 'author').defer('search_vector')
+    if watermark is not None:
+        changed = changed.filter(updated_at__gt=watermark)
+    rendered = 0
+    for publication in changed:
+        entries[str(publication.pk)] = _render_entry(publication, base_url)
+        rendered += 1
+
+    if len(entries) != count:
+        live_ids = {str(pk) for pk in Publication.objects.values_list('id', flat=True)}
+        entries = {pk: entry for pk, entry in entries.items() if pk in live_ids}
+
+    documents = {document_name('sitemap', token): _render_sitemap(entries, base_url)}
+    for language in FEED_LANGUAGES:
+        documents[document_name('feed', token, language)] = _render_feed(entries, base_url, language, latest)
+
+    return {
+        'token': token,
+        'latest': latest,
+        'rendered': rendered,
+        'documents': documents,
+        'state': {
+            'token': token,
+            'base_url': base_url,
+            'watermark': latest.isoformat() if latest else None,
+            'entries': entries,
+        },
+        'previous_token': state.get('token') if state else None,
+    }
+
+
+def refresh_feeds(storage=None, full=False):
+    """
+    Bring the stored sitemap and feeds up to date with the publications table.
+
+    Returns:
+        dict: {'token': str, 'latest': datetime or None, 'rendered': int,
+               'documents': {name: bytes}}
+    """
+    storage = storage or default_storage
+    result = render_feeds(storage, full=full)
+    token = result['token']
+
+    for name, content in result['documents'].items():
+        write_storage_file(storage, name, content, overwrite=True)
+    write_storage_file(storage, STATE_NAME, json.dumps(result['state']).encode('utf-8'), overwrite=True)
+
+    previous_token = result['previous_token']
+    if previous_token and previous_token != token:
+        stale = [document_name('sitemap', previous_token)]
+        stale.extend(document_name('feed', previous_token, language) for language in FEED_LANGUAGES)
+        for name in stale:
+            storage.delete(name)
+
+    return {key: result[key] for key in ('token', 'latest', 'rendered', 'documents')}
+
+
+def _cache_key(name):
+    return f'feeds:{name}'
+
+
+def cached_document(kind, token, language=None):
+    """
+    Return (token, content) for a document that is not in storage, from the
+    cache or rendered with render_feeds(). Every rendered document is cached
+    under its fingerprinted name, so a later change simply misses.
+    """
+    content = cache.get(_cache_key(document_name(kind, token, language)))
+    if content is not None:
+        return token, content
+
+    result = render_feeds()
+    cache.set_many(
+        {_cache_key(name): content for name, content in result['documents'].items()},
+        timeout=int(getattr(settings, 'FEEDS_CACHE_SECONDS', 3600)),
+    )
+    token = result['token']
+    return token, result['documents'][document_name(kind, token, language)]
+
+
+_refresh_executor = None
+_refresh_lock = threading.Lock()
+_refresh_pending = False
+
+
+def _refresh_in_background():
+    global _refresh_pending
+    with _refresh_lock:
+        _refresh_pending = False
+    try:
+        refresh_feeds()
+    except Exception:
+        logger.exception('feed refresh failed')
+    finally:
+        connection.close()
+
+
+def schedule_refresh():
+    """Refresh on a single worker thread; bursts of changes collapse into one run."""
+    global _refresh_executor, _refresh_pending
+    with _refresh_lock:
+        if _refresh_pending:
+            return
+        _refresh_pending = True
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='feed-refresh')
+    _refresh_executor.submit(_refresh_in_background)
+
+
+@receiver(post_save, sender=Publication)
+@receiver(post_delete, sender=Publication)
+def _refresh_on_publication_change(sender, raw=False, **kwargs):
+    if not raw and getattr(settings, 'FEEDS_REFRESH_ON_CHANGE', False):
+        transaction.on_commit(schedule_refresh)
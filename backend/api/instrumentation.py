@@ -0,0 +1,96 @@
+"""
+Per-request SQL, cache, storage and latency counters.
+
+RequestMetricsMiddleware opens a RequestMetrics for each request, keeps it in
+a context variable and routes the request's database queries through it. The
+instrumented cache backend (api.cache) and SupabaseStorage report into the
+current RequestMetrics; outside a request the record_* helpers do nothing.
+Storage calls are also timed into the process-wide registry in api.metrics.
+"""
+import time
+from contextvars import ContextVar
+
+from .metrics import observe_storage_call
+
+_current = ContextVar('api_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Counters for one request; also usable as a connection.execute_wrapper."""
+
+    __slots__ = (
+        'started', 'queries', 'db_seconds', 'cache_hits', 'cache_misses',
+        'storage_calls', 'storage_errors', 'storage_seconds',
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.storage_calls = 0
+        self.storage_errors = 0
+        self.storage_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - started
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self, total_seconds):
+        return {
+            'duration_ms': round(total_seconds * 1000, 2),
+            'queries': self.queries,
+            'db_ms': round(self.db_seconds * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'storage_calls': self.storage_calls,
+            'storage_errors': self.storage_errors,
+            'storage_ms': round(self.storage_seconds * 1000, 2),
+        }
+
+    def server_timing(self, total_seconds):
+        """Render the counters as a Server-Timing header value."""
+        return ', '.join((
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"',
+            f'cache;desc="hits={self.cache_hits} misses={self.cache_misses}"',
+            f'storage;dur={self.storage_seconds * 1000:.1f};desc="{self.storage_calls} calls"',
+            f'app;dur={total_seconds * 1000:.1f}',
+        ))
+
+
+def activate(metrics):
+    """Make metrics current for this context; returns a token for deactivate()."""
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def current_metrics():
+    return _current.get()
+
+
+def record_cache_lookup(hits, misses=0):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+def record_storage_call(seconds, failed=False, method='GET'):
+    observe_storage_call(method, seconds, failed)
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.storage_calls += 1
+        metrics.storage_seconds += seconds
+        if failed:
+            metrics.storage_errors += 1
@@ -0,0 +1,100 @@
+import time
+from datetime import date, timedelta
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Member, Publication, RedSocial, Team
+from api.renderers import FastJSONParser, FastJSONRenderer, orjson
+
+
+def sample_payloads(rows):
+    """Build member and publication list payloads from in-memory instances (no queries)."""
+    now = timezone.now()
+    teams = [Team(id=index, name_en=f'Team {index}', name_es=f'Equipo {index}') for index in range(1, 8)]
+
+    members = []
+    for index in range(1, rows + 1):
+        member = Member(
+            id=index,
+            name=f'Member Number {index}',
+            career_en='Mechanical Engineering',
+            career_es='Ingeniería Mecánica',
+            role_en='Member',
+            role_es='Miembro',
+            image=f'members/member-{index}.jpg',
+            team=teams[index % len(teams)],
+            created_at=now - timedelta(days=index),
+        )
+        member._prefetched_objects_cache = {
+            'social_links': [
+                RedSocial(id=index * 10 + offset, platform=platform, url=f'https://{platform}.com/member{index}', member=member)
+                for offset, platform in enumerate(('github', 'linkedin'))
+            ]
+        }
+        members.append(member)
+
+    publications = [
+        Publication(
+            id=index,
+            slug=f'publication-{index}',
+            name_en=f'Publication {index}: solar vehicle aerodynamics',
+            name_es=f'Publicación {index}: aerodinámica del vehículo solar',
+            abstract_en='We report wind tunnel measurements and drag coefficients. ' * 6,
+            abstract_es='Reportamos mediciones en túnel de viento y coeficientes de arrastre. ' * 6,
+            publication_date=date.today() - timedelta(days=index),
+            file=f'publications/files/publication-{index}.pdf',
+            author=members[index % len(members)],
+            team=teams[index % len(teams)],
+            created_at=now - timedelta(days=index),
+            updated_at=now - timedelta(hours=index),
+        )
+        for index in range(1, rows + 1)
+    ]
+
+    return {
+        'members': [member.to_dict('es') for member in members],
+        'publications': [publication.to_dict('es') for publication in publications],
+    }
+
+
+def _time(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = func()
+    return (time.perf_counter() - started) * 1000 / iterations, result
+
+
+class Command(BaseCommand):
+    help = 'Compare encode/decode time and size of the stock and orjson DRF JSON renderers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Members and publications per payload.')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed runs per measurement.')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['iterations'] < 1:
+            raise CommandError('--rows and --iterations must be positive.')
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; FastJSONRenderer falls back to the stock encoder.'))
+
+        payloads = sample_payloads(options['rows'])
+        iterations = options['iterations']
+        pairs = (('stock', JSONRenderer(), JSONParser()), ('fast', FastJSONRenderer(), FastJSONParser()))
+
+        self.stdout.write(f"{'payload':<14}{'renderer':<10}{'encode ms':>11}{'decode ms':>11}{'bytes':>11}")
+        for name, payload in payloads.items():
+            baseline = None
+            for label, renderer, parser in pairs:
+                encode_ms, body = _time(lambda: renderer.render(payload), iterations)
+                decode_ms, _ = _time(lambda: parser.parse(BytesIO(body), parser_context={}), iterations)
+                self.stdout.write(f'{name:<14}{label:<10}{encode_ms:>11.2f}{decode_ms:>11.2f}{len(body):>11}')
+                if baseline is None:
+                    baseline = body
+                elif body != baseline:
+                    self.stdout.write(self.style.WARNING(f'{name}: fast output differs from stock output.'))
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete.'))
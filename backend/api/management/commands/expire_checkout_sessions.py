@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import PaymentCheckoutSession
+
+
+class Command(BaseCommand):
+    help = 'Cancel created/pending checkout sessions whose expires_at has passed, in bounded batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Maximum rows updated per statement.')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches (default: until none remain).')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches to limit load.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        expired = 0
+        batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            updated = PaymentCheckoutSession.expire_stale(batch_size=batch_size)
+            batches += 1
+            expired += updated
+            if updated < batch_size:
+                break
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} checkout sessions in {batches} batch(es).'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import PublicationText
+from api.publication_text import extract_pending_texts, queue_missing_texts
+
+
+class Command(BaseCommand):
+    help = 'Extract text from queued publication PDFs and add it to the search index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Maximum PDFs extracted in this run.')
+        parser.add_argument('--backfill', action='store_true', help='Queue publications that have a file but no extracted text yet.')
+        parser.add_argument('--retry-failed', action='store_true', help='Re-queue extractions that previously failed.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        if options['backfill']:
+            queued = queue_missing_texts()
+            self.stdout.write(f'Queued {queued} publication(s) for extraction.')
+        if options['retry_failed']:
+            retried = PublicationText.objects.filter(status=PublicationText.STATUS_FAILED).update(
+                status=PublicationText.STATUS_PENDING, error='',
+            )
+            self.stdout.write(f'Re-queued {retried} failed extraction(s).')
+
+        result = extract_pending_texts(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f"Publication text extraction complete. Processed: {result['processed']}, failed: {result['failed']}."
+        ))
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.email_whitelist import SECTION_MEMBERS, VALID_SECTIONS
+from api.whitelist_import import (
+    OUTCOME_DUPLICATE,
+    OUTCOME_FORBIDDEN,
+    OUTCOME_INVALID,
+    WhitelistImportError,
+    import_whitelist_rows,
+    parse_whitelist_rows,
+)
+
+
+class Command(BaseCommand):
+    help = 'Bulk-add emails to the internal whitelist from a CSV (email[,role]) or JSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON file to import.')
+        parser.add_argument('--role', default=SECTION_MEMBERS, choices=sorted(VALID_SECTIONS), help='Section for rows without a role.')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and report without writing.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        try:
+            content = path.read_bytes()
+        except OSError as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+
+        file_format = path.suffix.lstrip('.').lower()
+        try:
+            rows = parse_whitelist_rows(content, file_format if file_format in ('csv', 'json') else None)
+        except WhitelistImportError as exc:
+            raise CommandError(str(exc))
+
+        result = import_whitelist_rows(
+            rows,
+            default_section=options['role'],
+            dry_run=options['dry_run'],
+            source=f'command:{path.name}',
+        )
+
+        for row in result['rows']:
+            if row['status'] in (OUTCOME_INVALID, OUTCOME_FORBIDDEN, OUTCOME_DUPLICATE):
+                self.stdout.write(self.style.WARNING(f"row {row['row']}: {row['email'] or '-'} {row['status']} ({row['error']})"))
+
+        summary = result['summary']
+        prefix = 'Dry run: ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{summary['total']} row(s): {summary['created']} created, {summary['updated']} updated, "
+            f"{summary['unchanged']} unchanged, {summary['duplicate']} duplicate, {summary['invalid']} invalid."
+        ))
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.webhook_processing import drain_webhook_events
+
+
+class Command(BaseCommand):
+    help = 'Apply payment webhook events that were acknowledged but not yet processed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Events claimed per batch (default: PAYMENT_WEBHOOK_BATCH_SIZE).')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new events instead of exiting once the queue is empty.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep between polls when --loop is set.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or int(getattr(settings, 'PAYMENT_WEBHOOK_BATCH_SIZE', 100))
+        processed = 0
+        failed = 0
+        parked = 0
+
+        while True:
+            result = drain_webhook_events(batch_size=batch_size)
+            processed += result['processed']
+            failed += result['failed']
+            parked += result['parked']
+
+            if result['claimed']:
+                self.stdout.write(
+                    f"[batch] claimed: {result['claimed']}, processed: {result['processed']}, "
+                    f"failed: {result['failed']}, parked: {result['parked']}"
+                )
+
+            # Stop (or wait) once no due events remain or only failing ones were claimed.
+            if result['claimed'] < batch_size or not result['processed']:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Webhook drain complete. Processed: {processed}, failed: {failed}, parked: {parked}.'))
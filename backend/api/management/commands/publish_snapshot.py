@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.snapshots import publish_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Publish content-hashed JSON snapshots of teams, members and publications plus a manifest to storage.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rewrite the manifest even if no snapshot changed.')
+
+    def handle(self, *args, **options):
+        result = publish_snapshot(force=options['force'])
+
+        for name in result['written']:
+            self.stdout.write(f'[written] {name}')
+        version = result['manifest']['version']
+        if result['changed']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Published snapshot {version}: {len(result['written'])} new file(s), {len(result['reused'])} reused."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Snapshot {version} is already current.'))
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.payment_reconciliation import ProviderExport, reconcile_checkout_sessions, reconcile_payments
+
+
+class Command(BaseCommand):
+    help = 'Reconcile open checkout sessions and pending payments against a provider export (CSV or JSONL).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('export_file', help='Provider export file (.csv with header row, or .jsonl).')
+        parser.add_argument('--provider', type=str, help='Only reconcile checkout sessions for this provider.')
+        parser.add_argument(
+            '--target',
+            choices=['all', 'sessions', 'payments'],
+            default='all',
+            help='Which tables to reconcile.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows fetched and written per batch.')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing.')
+
+    def handle(self, *args, **options):
+        export_path = Path(options['export_file'])
+        if not export_path.is_file():
+            raise CommandError(f'Export file not found: {export_path}')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+
+        export = ProviderExport.from_file(export_path)
+        self.stdout.write(f'Loaded {export.rows} export rows ({export.skipped} without a usable status).')
+
+        verbosity = options['verbosity']
+
+        def report_chunk(label, stats):
+            if verbosity > 1:
+                self.stdout.write(
+                    f'[{label}] scanned: {stats.scanned}, updated: {stats.updated}, '
+                    f'{stats.rows_per_second:.0f} rows/s'
+                )
+
+        results = {}
+        if options['target'] in ('all', 'sessions'):
+            results['sessions'] = reconcile_checkout_sessions(
+                export,
+                provider=options['provider'],
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'],
+                on_chunk=report_chunk,
+            )
+        if options['target'] in ('all', 'payments'):
+            results['payments'] = reconcile_payments(
+                export,
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'],
+                on_chunk=report_chunk,
+            )
+
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        for label, stats in results.items():
+            summary = stats.as_dict()
+            self.stdout.write(self.style.SUCCESS(
+                f"{prefix}{label}: scanned {summary['scanned']}, matched {summary['matched']}, "
+                f"updated {summary['updated']}, rejected {summary['rejected']}, "
+                f"skipped {summary['skipped']} (changed concurrently) "
+                f"in {summary['elapsed_seconds']}s ({summary['rows_per_second']} rows/s)."
+            ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.feeds import refresh_feeds
+
+
+class Command(BaseCommand):
+    help = 'Regenerate sitemap.xml and the publication Atom feeds in storage from changed publications.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Ignore the stored state and re-render every publication.')
+
+    def handle(self, *args, **options):
+        result = refresh_feeds(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Feeds refreshed ({result['token']}). Re-rendered publications: {result['rendered']}."
+        ))
@@ -0,0 +1,274 @@
+"""
+In-process Prometheus metrics for the API.
+
+Counters and histograms live in a module-level registry guarded by one lock
+and are rendered in the Prometheus text exposition format by /api/metrics/.
+
+With METRICS_MULTIPROC_DIR set, every process also dumps its samples to
+<dir>/<pid>.json (at most every METRICS_FLUSH_SECONDS, and on each scrape) and
+the endpoint merges all dumps, so several workers behind one scrape target
+report as one. Dumps of exited processes are kept so counters stay monotonic;
+clear the directory on deploy.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 3600.0, 21600.0)
+
+_lock = threading.Lock()
+_registry = {}
+_last_flush = 0.0
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._samples = {}
+        _registry[name] = self
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._samples[key] = self._samples.get(key, 0) + amount
+
+    @staticmethod
+    def merge(current, other):
+        return (current or 0) + other
+
+    def render(self, key, value):
+        yield self.name, key, value
+
+
+class Histogram(_Metric):
+    """Per-bucket counts (non-cumulative, last slot is +Inf), then count and sum."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            state = self._samples.get(key)
+            if state is None:
+                state = self._samples[key] = [0] * (len(self.buckets) + 1) + [0, 0.0]
+            state[bisect_left(self.buckets, value)] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    @staticmethod
+    def merge(current, other):
+        if current is None:
+            return list(other)
+        return [left + right for left, right in zip(current, other)]
+
+    def render(self, key, state):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), state):
+            cumulative += count
+            yield f'{self.name}_bucket', key + (('le', _format_bound(bound)),), cumulative
+        yield f'{self.name}_count', key, state[-2]
+        yield f'{self.name}_sum', key, state[-1]
+
+
+http_requests = Counter(
+    'api_http_requests_total', 'Requests handled, by view, method and status code.',
+    ('view', 'method', 'status'),
+)
+http_request_duration = Histogram(
+    'api_http_request_duration_seconds', 'Request latency, by view and method.',
+    ('view', 'method'),
+)
+http_throttled = Counter(
+    'api_http_throttled_total', 'Requests rejected with 429, by view.',
+    ('view',),
+)
+db_queries = Counter(
+    'api_db_queries_total', 'SQL queries executed while handling requests, by view.',
+    ('view',),
+)
+db_query_seconds = Counter(
+    'api_db_query_seconds_total', 'Time spent in SQL queries while handling requests, by view.',
+    ('view',),
+)
+storage_request_duration = Histogram(
+    'api_storage_request_duration_seconds', 'SupabaseStorage HTTP call latency, by method.',
+    ('method',),
+)
+storage_errors = Counter(
+    'api_storage_errors_total', 'SupabaseStorage HTTP calls that raised, by method.',
+    ('method',),
+)
+payment_transitions = Counter(
+    'api_payment_transitions_total', 'Checkout session status transitions.',
+    ('from_status', 'to_status'),
+)
+webhook_lag = Histogram(
+    'api_payment_webhook_lag_seconds', 'Delay between receiving and processing a payment webhook.',
+    ('provider',), buckets=LAG_BUCKETS,
+)
+log_records_dropped = Counter(
+    'api_log_records_dropped_total', 'Log records dropped because the logging queue was full.',
+    ('logger',),
+)
+
+
+def _enabled():
+    return getattr(settings, 'METRICS_ENABLED', True)
+
+
+def observe_request(view, method, status, seconds, queries=0, db_seconds=0.0):
+    if not _enabled():
+        return
+    http_requests.inc(view=view, method=method, status=status)
+    http_request_duration.observe(seconds, view=view, method=method)
+    if status == 429:
+        http_throttled.inc(view=view)
+    if queries:
+        db_queries.inc(queries, view=view)
+        db_query_seconds.inc(db_seconds, view=view)
+    maybe_flush()
+
+
+def observe_storage_call(method, seconds, failed=False):
+    if not _enabled():
+        return
+    storage_request_duration.observe(seconds, method=method)
+    if failed:
+        storage_errors.inc(method=method)
+
+
+def count_payment_transition(from_status, to_status, amount=1):
+    if _enabled() and amount:
+        payment_transitions.inc(amount, from_status=from_status, to_status=to_status)
+
+
+def observe_webhook_lag(provider, seconds):
+    if _enabled():
+        webhook_lag.observe(max(seconds, 0.0), provider=provider)
+
+
+def count_dropped_log_record(logger_name):
+    if _enabled():
+        log_records_dropped.inc(logger=logger_name)
+
+
+def snapshot():
+    """Return this process's samples as {metric name: [[label values, value], ...]}."""
+    with _lock:
+        return {
+            name: [[list(key), value if isinstance(value, (int, float)) else list(value)]
+                   for key, value in metric._samples.items()]
+            for name, metric in _registry.items()
+        }
+
+
+def _multiproc_dir():
+    return getattr(settings, 'METRICS_MULTIPROC_DIR', '') or ''
+
+
+def flush():
+    """Write this process's snapshot to METRICS_MULTIPROC_DIR (no-op when unset)."""
+    global _last_flush
+    directory = _multiproc_dir()
+    if not directory:
+        return
+    _last_flush = time.monotonic()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{os.getpid()}.json')
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as handle:
+        json.dump(snapshot(), handle)
+    os.replace(temp_path, path)
+
+
+def maybe_flush():
+    interval = float(getattr(settings, 'METRICS_FLUSH_SECONDS', 10))
+    if _multiproc_dir() and time.monotonic() - _last_flush >= interval:
+        flush()
+
+
+def collect():
+    """Merge the snapshots of every process (or just this one) into {name: {key: value}}."""
+    directory = _multiproc_dir()
+    snapshots = []
+    if directory:
+        flush()
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(directory, filename), encoding='utf-8') as handle:
+                    snapshots.append(json.load(handle))
+            except (OSError, ValueError):
+                continue
+    else:
+        snapshots.append(snapshot())
+
+    merged = {name: {} for name in _registry}
+    for data in snapshots:
+        for name, samples in data.items():
+            metric = _registry.get(name)
+            if metric is None:
+                continue
+            for key, value in samples:
+                key = tuple(key)
+                merged[name][key] = metric.merge(merged[name].get(key), value)
+    return merged
+
+
+def _format_bound(bound):
+    return bound if isinstance(bound, str) else repr(float(bound))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def render_latest():
+    """Render every metric in the Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for name, samples in collect().items():
+        metric = _registry[name]
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for key in sorted(samples):
+            labels = tuple(zip(metric.labelnames, key))
+            for sample_name, sample_labels, value in metric.render(labels, samples[key]):
+                if sample_labels:
+                    rendered = ','.join(f'{label}="{_escape(str(text))}"' for label, text in sample_labels)
+                    sample_name = f'{sample_name}{{{rendered}}}'
+                lines.append(f'{sample_name} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    """Drop all samples in this process (tests)."""
+    with _lock:
+        for metric in _registry.values():
+            metric._samples.clear()
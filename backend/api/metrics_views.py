@@ -0,0 +1,42 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .metrics import render_latest
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _is_authorized(request):
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    scheme, _, credentials = header.partition(' ')
+    expected = getattr(settings, 'METRICS_TOKEN', '')
+    # compare_digest only takes ASCII str; compare bytes so any header value is a plain mismatch.
+    if expected and scheme.lower() == 'bearer' and hmac.compare_digest(credentials.strip().encode(), expected.encode()):
+        return True
+
+    if getattr(request.user, 'is_staff', False):
+        return True
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return bool(result and result[0].is_staff)
+
+
+@require_GET
+def metrics_view(request):
+    """
+    GET /api/metrics/
+    Prometheus scrape target. Requires `Authorization: Bearer <METRICS_TOKEN>`
+    or a staff user (session or JWT).
+    """
+    if not getattr(settings, 'METRICS_ENABLED', True):
+        return JsonResponse({'error': 'Not found.'}, status=404)
+    if not _is_authorized(request):
+        return JsonResponse({'error': 'Forbidden.'}, status=403)
+    return HttpResponse(render_latest(), content_type=CONTENT_TYPE)
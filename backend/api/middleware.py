@@ -1,4 +1,124 @@
+import gzip
+import hashlib
+import logging
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
 from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+from .instrumentation import RequestMetrics, activate, deactivate
+from .metrics import observe_request
+from .profiling import RequestProfile, reserve_capture, staff_user_for_token
+from .security_logging import get_client_ip
+
+request_logger = logging.getLogger('api.requests')
+profiling_logger = logging.getLogger(__name__)
+
+
+class ProfilingMiddleware:
+    """
+    Profile a single request when it carries a staff profiling token (see
+    api.profiling). The outcome is reported in X-Profile-Status and, once
+    stored, the capture id in X-Profile-Id (not exposed to cross-origin
+    scripts; the capture itself is only readable by staff).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PROFILING_ENABLED', True)
+
+    def __call__(self, request):
+        token = request.META.get('HTTP_X_PROFILE_TOKEN') or request.GET.get('__profile')
+        if not self.enabled or not token:
+            return self.get_response(request)
+
+        user = staff_user_for_token(token)
+        event = reserve_capture(user, request.path, get_client_ip(request)) if user else None
+        if event is None:
+            response = self.get_response(request)
+            response['X-Profile-Status'] = 'rate-limited' if user else 'invalid-token'
+            return response
+
+        profile = RequestProfile()
+        with profile, connection.execute_wrapper(profile.queries):
+            response = self.get_response(request)
+
+        try:
+            profile.save(request, response, user)
+        except Exception:
+            profiling_logger.exception('profiling: could not store profile %s', profile.id)
+            event.delete()
+            response['X-Profile-Status'] = 'store-failed'
+            return response
+
+        event.details['profile_id'] = profile.id
+        event.save(update_fields=['details'])
+        response['X-Profile-Status'] = 'captured'
+        response['X-Profile-Id'] = profile.id
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, DB time, cache hits/misses, storage calls and total
+    time for each request.
+
+    The numbers go out as a Server-Timing header for staff users (or always
+    with DEBUG), and as an `api.requests` log line for a sampled fraction of
+    requests (REQUEST_METRICS_LOG_SAMPLE_RATE) plus every request slower than
+    REQUEST_METRICS_SLOW_MS. Latency, status and query counts also feed the
+    Prometheus registry in api.metrics, labelled by URL name.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'REQUEST_METRICS_ENABLED', True)
+        self.sample_rate = float(getattr(settings, 'REQUEST_METRICS_LOG_SAMPLE_RATE', 0.0))
+        self.slow_seconds = float(getattr(settings, 'REQUEST_METRICS_SLOW_MS', 1000)) / 1000
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = activate(metrics)
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            deactivate(token)
+        total = metrics.elapsed()
+
+        match = getattr(request, 'resolver_match', None)
+        observe_request(
+            match.view_name if match else 'unmatched',
+            request.method,
+            response.status_code,
+            total,
+            metrics.queries,
+            metrics.db_seconds,
+        )
+
+        user = getattr(request, 'user', None)
+        if settings.DEBUG or getattr(user, 'is_staff', False):
+            response['Server-Timing'] = metrics.server_timing(total)
+
+        if total >= self.slow_seconds or (self.sample_rate and random.random() < self.sample_rate):
+            data = {'method': request.method, 'path': request.path, 'status': response.status_code, **metrics.as_dict(total)}
+            request_logger.info(
+                ' '.join(f'{key}=%s' for key in data),
+                *data.values(),
+                extra={'request_metrics': data},
+            )
+        return response
 
 
 class ApiSecurityHeadersMiddleware:
@@ -42,3 +162,107 @@ class ApiContentTypeGuardMiddleware:
                 return JsonResponse({'error': 'Unsupported media type.'}, status=415)
 
         return self.get_response(request)
+
+
+class ApiCompressionMiddleware:
+    """
+    Compress API responses with brotli or gzip, following Accept-Encoding.
+
+    Only successful GET/HEAD responses with a compressible content type and
+    at least API_COMPRESSION_MIN_BYTES are compressed; write endpoints (which
+    may return tokens) are left alone. Compressed bodies are kept in the
+    "compression" cache keyed by encoding and ETag (or a hash of the body),
+    so an unchanged payload is compressed once rather than per request.
+    """
+
+    COMPRESSIBLE_TYPES = (
+        'application/json',
+        'application/xml',
+        'application/atom+xml',
+        'application/javascript',
+        'text/',
+    )
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'API_COMPRESSION_ENABLED', True)
+        self.min_bytes = int(getattr(settings, 'API_COMPRESSION_MIN_BYTES', 1024))
+        self.cache_max_bytes = int(getattr(settings, 'API_COMPRESSION_CACHE_MAX_BYTES', 2000000))
+        self.cache_timeout = int(getattr(settings, 'API_COMPRESSION_CACHE_TIMEOUT', 3600))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.enabled or request.method not in {'GET', 'HEAD'}:
+            return response
+        if not (request.path.startswith('/api/') or request.path == '/sitemap.xml'):
+            return response
+
+        content_type = (response.get('Content-Type') or '').lower()
+        if not content_type.startswith(self.COMPRESSIBLE_TYPES):
+            return response
+
+        # The body varies with Accept-Encoding from here on, compressed or not.
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if (
+            response.streaming
+            or response.status_code != 200
+            or response.has_header('Content-Encoding')
+            or len(response.content) < self.min_bytes
+        ):
+            return response
+
+        encoding = self.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressed = self.compressed_body(encoding, response.content, response.get('ETag'))
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # Same rule as GZipMiddleware: the bytes differ, so the validator becomes weak.
+            response['ETag'] = 'W/' + etag
+        return response
+
+    @staticmethod
+    def negotiate(accept_encoding):
+        accepted = {}
+        for part in accept_encoding.lower().split(','):
+            name, _, params = part.strip().partition(';')
+            quality = 1.0
+            if params.strip().startswith('q='):
+                try:
+                    quality = float(params.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+            if name:
+                accepted[name] = quality
+
+        if brotli is not None and accepted.get('br', 0) > 0:
+            return 'br'
+        if accepted.get('gzip', 0) > 0:
+            return 'gzip'
+        return None
+
+    def compressed_body(self, encoding, content, etag=None):
+        cacheable = len(content) <= self.cache_max_bytes
+        if cacheable:
+            version = etag.removeprefix('W/') if etag else hashlib.sha1(content).hexdigest()
+            key = f'api-compress:{encoding}:{hashlib.sha1(version.encode()).hexdigest()}'
+            cache = caches['compression']
+            compressed = cache.get(key)
+            if compressed is not None:
+                return compressed
+
+        if encoding == 'br':
+            compressed = brotli.compress(content, quality=5)
+        else:
+            compressed = gzip.compress(content, compresslevel=6, mtime=0)
+
+        if cacheable:
+            cache.set(key, compressed, timeout=self.cache_timeout)
+        return compressed
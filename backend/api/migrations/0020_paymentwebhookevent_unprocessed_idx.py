@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_drop_profiles_supabase_fkey'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymentwebhookevent',
+            index=models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['received_at', 'id'], name='pay_webhook_unprocessed_idx'),
+        ),
+    ]
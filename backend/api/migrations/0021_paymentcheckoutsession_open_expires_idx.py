@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_paymentwebhookevent_unprocessed_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymentcheckoutsession',
+            index=models.Index(condition=models.Q(('status__in', ['created', 'pending'])), fields=['expires_at'], name='pay_sess_open_expires_idx'),
+        ),
+    ]
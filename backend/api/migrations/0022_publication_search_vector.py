@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:29
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def backfill_search_vectors(apps, schema_editor):
+    Publication = apps.get_model('api', 'Publication')
+    Publication.objects.update(
+        search_vector=(
+            SearchVector('name_en', weight='A', config='english')
+            + SearchVector('name_es', weight='A', config='spanish')
+            + SearchVector('abstract_en', weight='B', config='english')
+            + SearchVector('abstract_es', weight='B', config='spanish')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_paymentcheckoutsession_open_expires_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publication',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='publication_search_gin_idx'),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_member_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicationText',
+            fields=[
+                ('publication', models.OneToOneField(db_column='publication_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='extracted_text', serialize=False, to='api.publication')),
+                ('source_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('content', models.TextField(blank=True, default='')),
+                ('page_count', models.PositiveIntegerField(default=0)),
+                ('truncated', models.BooleanField(default=False)),
+                ('error', models.CharField(blank=True, default='', max_length=255)),
+                ('extracted_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'publication_texts',
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['updated_at'], name='pub_text_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_publication_text'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['updated_at'], name='publication_updated_at_idx'),
+        ),
+    ]
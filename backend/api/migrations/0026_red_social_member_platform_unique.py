@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:54
+
+from django.db import migrations, models
+
+
+def drop_duplicate_platform_links(apps, schema_editor):
+    """Keep only the newest link per (member, platform) so the constraint can be added."""
+    RedSocial = apps.get_model('api', 'RedSocial')
+
+    seen = set()
+    duplicate_ids = []
+    for link_id, member_id, platform in RedSocial.objects.order_by('-id').values_list('id', 'member_id', 'platform'):
+        if (member_id, platform) in seen:
+            duplicate_ids.append(link_id)
+        else:
+            seen.add((member_id, platform))
+
+    if duplicate_ids:
+        RedSocial.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_publication_updated_at_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_platform_links, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='redsocial',
+            constraint=models.UniqueConstraint(fields=('member', 'platform'), name='red_social_member_platform_uniq'),
+        ),
+    ]
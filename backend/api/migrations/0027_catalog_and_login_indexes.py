@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_red_social_member_platform_unique'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(condition=models.Q(('is_active', True), ('user__isnull', False)), fields=['team', 'id'], name='member_team_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['-publication_date', 'id'], name='publication_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['team', '-publication_date', 'id'], name='publication_team_date_idx'),
+        ),
+        # _find_auth_user matches username/email with __iexact, i.e. UPPER(col::text) = UPPER(%s).
+        migrations.RunSQL(
+            sql=[
+                'CREATE INDEX IF NOT EXISTS auth_user_username_upper_idx ON auth_user (UPPER(username::text));',
+                'CREATE INDEX IF NOT EXISTS auth_user_email_upper_idx ON auth_user (UPPER(email::text));',
+            ],
+            reverse_sql=[
+                'DROP INDEX IF EXISTS auth_user_username_upper_idx;',
+                'DROP INDEX IF EXISTS auth_user_email_upper_idx;',
+            ],
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:07
+
+from django.db import migrations, models
+
+
+def backfill_normalized_email(apps, schema_editor):
+    """
+    Fill normalized_email; when several profiles share an email, the oldest
+    keeps it and the others are listed so they can be resolved by hand (they
+    still log in through the auth_user email/username fallbacks).
+    """
+    UserProfile = apps.get_model('api', 'UserProfile')
+
+    claimed = {}
+    pending = []
+    skipped = []
+    for profile in UserProfile.objects.order_by('created_at', 'id').only('id', 'email').iterator():
+        normalized = (profile.email or '').strip().lower()
+        if not normalized:
+            continue
+        if normalized in claimed:
+            skipped.append((profile.id, normalized, claimed[normalized]))
+            continue
+        claimed[normalized] = profile.id
+        profile.normalized_email = normalized
+        pending.append(profile)
+
+    UserProfile.objects.bulk_update(pending, ['normalized_email'], batch_size=1000)
+
+    if skipped:
+        print(f'\n  {len(skipped)} profile(s) share an email with an older profile; normalized_email left empty:')
+        for profile_id, email, owner_id in skipped:
+            print(f'    profile {profile_id} ({email}) - kept by profile {owner_id}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_catalog_and_login_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='normalized_email',
+            field=models.CharField(blank=True, editable=False, max_length=200, null=True),
+        ),
+        migrations.RunPython(backfill_normalized_email, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='normalized_email',
+            field=models.CharField(blank=True, editable=False, max_length=200, null=True, unique=True),
+        ),
+    ]
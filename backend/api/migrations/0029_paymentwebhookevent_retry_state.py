@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:45
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_profile_normalized_email'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='paymentwebhookevent',
+            name='pay_webhook_unprocessed_idx',
+        ),
+        migrations.AddField(
+            model_name='paymentwebhookevent',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='paymentwebhookevent',
+            name='last_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='paymentwebhookevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='paymentwebhookevent',
+            name='parked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        # Keep pending events in arrival order rather than all due at migration time.
+        migrations.RunSQL(
+            'UPDATE payment_webhook_events SET next_attempt_at = received_at WHERE processed_at IS NULL',
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='paymentwebhookevent',
+            index=models.Index(condition=models.Q(('parked_at__isnull', True), ('processed_at__isnull', True)), fields=['next_attempt_at', 'id'], name='pay_webhook_due_idx'),
+        ),
+    ]
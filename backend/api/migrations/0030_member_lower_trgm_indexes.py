@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:50
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0029_paymentwebhookevent_retry_state'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='member',
+            name='member_name_trgm_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='member',
+            name='member_career_role_trgm_idx',
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('name'), name='gin_trgm_ops'), condition=models.Q(('is_active', True)), name='member_lname_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('career_en'), name='gin_trgm_ops'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('career_es'), name='gin_trgm_ops'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('role_en'), name='gin_trgm_ops'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('role_es'), name='gin_trgm_ops'), condition=models.Q(('is_active', True)), name='member_lcareer_role_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0030_member_lower_trgm_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='publicationtext',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+    ]
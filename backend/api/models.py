@@ -1,13 +1,24 @@
-from django.db import models, transaction
+from django.db import IntegrityError, connection, models, transaction
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.template.defaultfilters import slugify
 from django.db.models import Q
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 import uuid
+from collections import Counter
+from functools import partial
 from .member_catalog import resolve_career_pair_from_text
+from .metrics import count_payment_transition
+
+
+def normalize_email(email):
+    """Canonical form of an email used for identity lookups."""
+    return (email or '').strip().lower()
 
 
 class Team(models.Model):
@@ -23,16 +34,32 @@ class Team(models.Model):
     def __str__(self):
         return self.name_en
 
-    def to_dict(self):
-        """Return team data as dictionary"""
-        team_image = self.image.url if self.image else None
-        
-        return {
-            'id': self.id,
-            'name_en': self.name_en,
-            'name_es': self.name_es,
-            'image': team_image
+    # Model columns needed for each to_dict() key (see views.project_queryset).
+    DICT_FIELD_COLUMNS = {
+        'id': ('id',),
+        'name_en': ('name_en',),
+        'name_es': ('name_es',),
+        'image': ('image',),
+    }
+
+    def to_dict(self, fields=None):
+        """Return team data as dictionary, optionally restricted to `fields`"""
+        if fields is None:
+            return {
+                'id': self.id,
+                'name_en': self.name_en,
+                'name_es': self.name_es,
+                'image': self.image.url if self.image else None,
+            }
+
+        # Sparse projections only touch the columns the requested keys need.
+        getters = {
+            'id': lambda: self.id,
+            'name_en': lambda: self.name_en,
+            'name_es': lambda: self.name_es,
+            'image': lambda: self.image.url if self.image else None,
         }
+        return {key: get() for key, get in getters.items() if key in fields}
 
 
 class Member(models.Model):
@@ -66,6 +93,25 @@ class Member(models.Model):
     class Meta:
         db_table = 'members'
         ordering = ['id']
+        indexes = [
+            # Autocomplete: `lower(col) %> term` and `lower(col) LIKE '%term%'` on active members.
+            GinIndex(
+                OpClass(Lower('name'), name='gin_trgm_ops'),
+                condition=Q(is_active=True),
+                name='member_lname_trgm_idx',
+            ),
+            GinIndex(
+                *(OpClass(Lower(field), name='gin_trgm_ops') for field in ('career_en', 'career_es', 'role_en', 'role_es')),
+                condition=Q(is_active=True),
+                name='member_lcareer_role_trgm_idx',
+            ),
+            # Team rosters: team_id filter on active, registered members, ordered by id.
+            models.Index(
+                fields=['team', 'id'],
+                condition=Q(is_active=True, user__isnull=False),
+                name='member_team_active_idx',
+            ),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=~(Q(is_team_leader=True) & Q(is_coleader=True)),
@@ -100,36 +146,81 @@ class Member(models.Model):
             self.password_hash.encode('utf-8')
         )
 
-    def to_dict(self, language='en', include_email=False):
-        """Return member data as dictionary for specified language"""
-        image_path = self.image.url if self.image else None
-        
-        career_pair = resolve_career_pair_from_text(self.career_en) or resolve_career_pair_from_text(self.career_es)
-
-        data = {
-            'id': self.id,
-            'name': self.name,
-            'career': self.career_en if language == 'en' else self.career_es,
-            'career_key': career_pair['key'] if career_pair else None,
-            'role': self.role_en if language == 'en' else self.role_es,
-            'image': image_path,
-            'team_id': self.team.id,
-            'team_name': self.team.name_en if language == 'en' else self.team.name_es,
-            'is_team_leader': self.is_team_leader,
-            'is_coleader': self.is_coleader,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'social_links': [link.to_dict() for link in self.social_links.all()]
+    # Model columns needed for each to_dict() key; '{lang}' is the requested language.
+    DICT_FIELD_COLUMNS = {
+        'id': ('id',),
+        'name': ('name',),
+        'career': ('career_{lang}',),
+        'career_key': ('career_en', 'career_es'),
+        'role': ('role_{lang}',),
+        'image': ('image',),
+        'team_id': ('team',),
+        'team_name': ('team', 'team__name_{lang}'),
+        'is_team_leader': ('is_team_leader',),
+        'is_coleader': ('is_coleader',),
+        'created_at': ('created_at',),
+        'social_links': (),
+    }
+    DICT_FIELD_PREFETCH = {'social_links': 'social_links'}
+
+    def to_dict(self, language='en', include_email=False, fields=None):
+        """Return member data as dictionary for specified language, optionally restricted to `fields`"""
+        if fields is None:
+            career_pair = resolve_career_pair_from_text(self.career_en) or resolve_career_pair_from_text(self.career_es)
+            data = {
+                'id': self.id,
+                'name': self.name,
+                'career': self.career_en if language == 'en' else self.career_es,
+                'career_key': career_pair['key'] if career_pair else None,
+                'role': self.role_en if language == 'en' else self.role_es,
+                'image': self.image.url if self.image else None,
+                'team_id': self.team_id,
+                'team_name': self.team.name_en if language == 'en' else self.team.name_es,
+                'is_team_leader': self.is_team_leader,
+                'is_coleader': self.is_coleader,
+                'created_at': self.created_at.isoformat() if self.created_at else None,
+                'social_links': [link.to_dict() for link in self.social_links.all()],
+            }
+            # Only include email and all language versions for authenticated requests
+            if include_email:
+                data['email'] = self.email
+                data['career_en'] = self.career_en
+                data['career_es'] = self.career_es
+                data['role_en'] = self.role_en
+                data['role_es'] = self.role_es
+            return data
+
+        # Sparse projections only touch the columns the requested keys need.
+        def career_key():
+            career_pair = resolve_career_pair_from_text(self.career_en) or resolve_career_pair_from_text(self.career_es)
+            return career_pair['key'] if career_pair else None
+
+        getters = {
+            'id': lambda: self.id,
+            'name': lambda: self.name,
+            'career': lambda: self.career_en if language == 'en' else self.career_es,
+            'career_key': career_key,
+            'role': lambda: self.role_en if language == 'en' else self.role_es,
+            'image': lambda: self.image.url if self.image else None,
+            'team_id': lambda: self.team_id,
+            'team_name': lambda: self.team.name_en if language == 'en' else self.team.name_es,
+            'is_team_leader': lambda: self.is_team_leader,
+            'is_coleader': lambda: self.is_coleader,
+            'created_at': lambda: self.created_at.isoformat() if self.created_at else None,
+            'social_links': lambda: [link.to_dict() for link in self.social_links.all()],
         }
-        
+
         # Only include email and all language versions for authenticated requests
         if include_email:
-            data['email'] = self.email
-            data['career_en'] = self.career_en
-            data['career_es'] = self.career_es
-            data['role_en'] = self.role_en
-            data['role_es'] = self.role_es
+            getters.update({
+                'email': lambda: self.email,
+                'career_en': lambda: self.career_en,
+                'career_es': lambda: self.career_es,
+                'role_en': lambda: self.role_en,
+                'role_es': lambda: self.role_es,
+            })
 
-        return data
+        return {key: get() for key, get in getters.items() if key in fields}
 
     @classmethod
     def create_from_whitelist_entry(cls, user, whitelist_entry):
@@ -189,6 +280,8 @@ class UserProfile(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     email = models.EmailField(max_length=200)
+    # Lowercased login identity; one unique index answers login and "is this email taken".
+    normalized_email = models.CharField(max_length=200, unique=True, null=True, blank=True, editable=False)
     name = models.CharField(max_length=200)
     is_internal = models.BooleanField(default=False)
     internal_role = models.CharField(max_length=20, choices=INTERNAL_ROLE_CHOICES, null=True, blank=True)
@@ -201,6 +294,44 @@ class UserProfile(models.Model):
     def __str__(self):
         return f'{self.email} ({"internal" if self.is_internal else "external"})'
 
+    def save(self, *args, **kwargs):
+        self.normalized_email = normalize_email(self.email) or None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'email' in update_fields:
+            update_fields = kwargs['update_fields'] = {*update_fields, 'normalized_email'}
+        if self.normalized_email is None or (update_fields is not None and 'normalized_email' not in update_fields):
+            super().save(*args, **kwargs)
+            return
+        # The unique index decides who owns the login identity, so concurrent
+        # saves cannot both claim it; the savepoint keeps the caller's
+        # transaction usable after the violation.
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError:
+            # Another account already owns this email as its login identity.
+            self.normalized_email = None
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def email_in_use(cls, email):
+        """
+        Whether a login, a member or a username already uses this email,
+        answered with one query of unique index seeks.
+        """
+        email = normalize_email(email)
+        if not email:
+            return False
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM {quote(cls._meta.db_table)} WHERE normalized_email = %s) '
+                f'OR EXISTS (SELECT 1 FROM {quote(Member._meta.db_table)} WHERE email = %s) '
+                f'OR EXISTS (SELECT 1 FROM {quote(User._meta.db_table)} WHERE username = %s)',
+                [email, email, email],
+            )
+            return cursor.fetchone()[0]
+
 
 class Subscription(models.Model):
     """Subscription plans for users."""
@@ -272,6 +403,21 @@ class Payment(models.Model):
         return f'{self.user_id}:{self.type}:{self.status}'
 
 
+PUBLICATION_SEARCH_FIELDS = ('name_en', 'name_es', 'abstract_en', 'abstract_es')
+
+
+def publication_search_vector():
+    """Weighted bilingual tsvector expression: titles rank above abstracts, abstracts above PDF text."""
+    return (
+        SearchVector('name_en', weight='A', config='english')
+        + SearchVector('name_es', weight='A', config='spanish')
+        + SearchVector('abstract_en', weight='B', config='english')
+        + SearchVector('abstract_es', weight='B', config='spanish')
+        + SearchVector('extracted_text__content', weight='C', config='english')
+        + SearchVector('extracted_text__content', weight='C', config='spanish')
+    )
+
+
 class Publication(models.Model):
     """Publication model for team publications and posts"""
     slug = models.SlugField(max_length=340, unique=True)
@@ -299,10 +445,18 @@ class Publication(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         db_table = 'publications'
         ordering = ['-publication_date', 'id']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='publication_search_gin_idx'),
+            models.Index(fields=['updated_at'], name='publication_updated_at_idx'),
+            # Match the default ordering, globally and within a team.
+            models.Index(fields=['-publication_date', 'id'], name='publication_date_id_idx'),
+            models.Index(fields=['team', '-publication_date', 'id'], name='publication_team_date_idx'),
+        ]
 
     def __str__(self):
         return self.name_en
@@ -325,26 +479,131 @@ class Publication(models.Model):
         self.full_clean()
         super().save(*args, **kwargs)
 
-    def to_dict(self, language='en'):
-        """Return publication data as dictionary for specified language"""
-        pub_image = self.image.url if self.image else None
-        pub_file = self.file.url if self.file else None
-        
-        return {
-            'id': self.id,
-            'slug': self.slug,
-            'name': self.name_en if language == 'en' else self.name_es,
-            'abstract': self.abstract_en if language == 'en' else self.abstract_es,
-            'publication_date': self.publication_date.isoformat(),
-            'file': pub_file,
-            'image': pub_image,
-            'author_id': self.author.id if self.author else None,
-            'author_name': self.author.name if self.author else None,
-            'team_id': self.team.id if self.team else None,
-            'team_name': (self.team.name_en if language == 'en' else self.team.name_es) if self.team else None,
-            'created_at': self.created_at.isoformat() if hasattr(self, 'created_at') else None,
-            'updated_at': self.updated_at.isoformat() if hasattr(self, 'updated_at') else None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) & set(PUBLICATION_SEARCH_FIELDS):
+            self.refresh_search_vector()
+
+    def refresh_search_vector(self):
+        """Recompute the stored tsvector for this publication in the database."""
+        refresh_publication_search_vectors(Publication.objects.filter(pk=self.pk))
+
+    # Model columns needed for each to_dict() key; '{lang}' is the requested language.
+    DICT_FIELD_COLUMNS = {
+        'id': ('id',),
+        'slug': ('slug',),
+        'name': ('name_{lang}',),
+        'abstract': ('abstract_{lang}',),
+        'publication_date': ('publication_date',),
+        'file': ('file',),
+        'image': ('image',),
+        'author_id': ('author',),
+        'author_name': ('author', 'author__name'),
+        'team_id': ('team',),
+        'team_name': ('team', 'team__name_{lang}'),
+        'created_at': ('created_at',),
+        'updated_at': ('updated_at',),
+    }
+
+    def to_dict(self, language='en', fields=None):
+        """Return publication data as dictionary for specified language, optionally restricted to `fields`"""
+        if fields is None:
+            return {
+                'id': self.id,
+                'slug': self.slug,
+                'name': self.name_en if language == 'en' else self.name_es,
+                'abstract': self.abstract_en if language == 'en' else self.abstract_es,
+                'publication_date': self.publication_date.isoformat(),
+                'file': self.file.url if self.file else None,
+                'image': self.image.url if self.image else None,
+                'author_id': self.author_id,
+                'author_name': self.author.name if self.author else None,
+                'team_id': self.team_id,
+                'team_name': (self.team.name_en if language == 'en' else self.team.name_es) if self.team else None,
+                'created_at': self.created_at.isoformat() if self.created_at else None,
+                'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            }
+
+        # Sparse projections only touch the columns the requested keys need.
+        getters = {
+            'id': lambda: self.id,
+            'slug': lambda: self.slug,
+            'name': lambda: self.name_en if language == 'en' else self.name_es,
+            'abstract': lambda: self.abstract_en if language == 'en' else self.abstract_es,
+            'publication_date': lambda: self.publication_date.isoformat(),
+            'file': lambda: self.file.url if self.file else None,
+            'image': lambda: self.image.url if self.image else None,
+            'author_id': lambda: self.author_id,
+            'author_name': lambda: self.author.name if self.author else None,
+            'team_id': lambda: self.team_id,
+            'team_name': lambda: (self.team.name_en if language == 'en' else self.team.name_es) if self.team else None,
+            'created_at': lambda: self.created_at.isoformat() if self.created_at else None,
+            'updated_at': lambda: self.updated_at.isoformat() if self.updated_at else None,
         }
+        return {key: get() for key, get in getters.items() if key in fields}
+
+
+def refresh_publication_search_vectors(queryset):
+    """Recompute search_vector for every publication in queryset.
+
+    UPDATE cannot join publication_texts directly, so the vector is computed
+    in a correlated subquery.
+    """
+    vectors = (
+        Publication.objects.filter(pk=models.OuterRef('pk'))
+        .annotate(vector=publication_search_vector())
+        .values('vector')[:1]
+    )
+    return queryset.update(search_vector=models.Subquery(vectors))
+
+
+class PublicationTextManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().defer('content')
+
+
+class PublicationText(models.Model):
+    """Text extracted from a publication PDF, kept out of the publications table."""
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    publication = models.OneToOneField(
+        Publication,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='extracted_text',
+        db_column='publication_id',
+    )
+    source_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    content = models.TextField(blank=True, default='')
+    page_count = models.PositiveIntegerField(default=0)
+    truncated = models.BooleanField(default=False)
+    error = models.CharField(max_length=255, blank=True, default='')
+    extracted_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PublicationTextManager()
+
+    class Meta:
+        db_table = 'publication_texts'
+        indexes = [
+            models.Index(
+                fields=['updated_at'],
+                name='pub_text_pending_idx',
+                condition=Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.source_name} ({self.status})'
 
 
 class TeamLeaderWhitelist(models.Model):
@@ -406,11 +665,8 @@ class TeamLeaderRequest(models.Model):
     
     def is_email_whitelisted(self):
         """Check if email is in environment variable whitelist"""
-        import os
-        team_name = self.requested_team.name_en.upper().replace(' ', '_').replace('-', '_')
-        team_env_var = f"TEAM_LEADERS_{team_name}"
-        whitelisted_emails = os.getenv(team_env_var, '').split(',')
-        return self.email.lower().strip() in [email.lower().strip() for email in whitelisted_emails if email.strip()]
+        from .team_leader_utils import is_env_leader_for_team
+        return is_env_leader_for_team(self.email, self.requested_team)
     
     def verify_whitelist(self):
         """Verify email against secure whitelist and auto-assign if whitelisted."""
@@ -467,9 +723,11 @@ class TeamLeaderRequest(models.Model):
     def log_security_event(self, message):
         """Log security-related events"""
         import logging
-        from django.utils import timezone
         security_logger = logging.getLogger('security')
-        security_logger.info(f"TEAM_LEADER_REQUEST: {message} | IP: {self.ip_address} | Time: {timezone.now()}")
+        security_logger.info(
+            'TEAM_LEADER_REQUEST: %s | IP: %s', message, self.ip_address,
+            extra={'security_event': {'event': 'team_leader.request', 'email': self.email, 'ip_address': self.ip_address}},
+        )
 
 
 class RedSocial(models.Model):
@@ -502,6 +760,9 @@ class RedSocial(models.Model):
     class Meta:
         db_table = 'red_social'
         ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['member', 'platform'], name='red_social_member_platform_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.member.name} - {self.platform}"
@@ -564,6 +825,11 @@ class PaymentCheckoutSession(models.Model):
         indexes = [
             models.Index(fields=['provider', 'status'], name='pay_sess_prov_status_idx'),
             models.Index(fields=['member', 'created_at'], name='pay_sess_member_created_idx'),
+            models.Index(
+                fields=['expires_at'],
+                condition=Q(status__in=['created', 'pending']),
+                name='pay_sess_open_expires_idx',
+            ),
         ]
 
     def __str__(self):
@@ -579,9 +845,53 @@ class PaymentCheckoutSession(models.Model):
         }
         if new_status not in allowed.get(self.status, set()):
             raise ValidationError({'status': f'Invalid transition from {self.status} to {new_status}.'})
+        # Counted once the change is saved and committed (see count_transitions_on_commit).
+        self._pending_transitions = [*getattr(self, '_pending_transitions', ()), (self.status, new_status)]
         self.status = new_status
         self.updated_at = timezone.now()
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.count_transitions_on_commit([self])
+
+    @classmethod
+    def count_transitions_on_commit(cls, sessions):
+        """
+        Feed the transitions made on sessions into the payment metrics when the
+        current transaction commits; call it after a bulk_update of their status.
+        """
+        counts = Counter()
+        for session in sessions:
+            counts.update(getattr(session, '_pending_transitions', ()))
+            session._pending_transitions = []
+        for (from_status, to_status), amount in counts.items():
+            transaction.on_commit(partial(count_payment_transition, from_status, to_status, amount))
+
+    @classmethod
+    def expire_stale(cls, batch_size=500, now=None):
+        """Cancel one batch of open sessions whose expires_at has passed; return the number updated."""
+        now = now or timezone.now()
+        open_statuses = [cls.STATUS_CREATED, cls.STATUS_PENDING]
+        with transaction.atomic():
+            expired = dict(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(status__in=open_statuses, expires_at__lte=now)
+                .order_by('expires_at')
+                .values_list('id', 'status')[:batch_size]
+            )
+            if not expired:
+                return 0
+            updated = cls.objects.filter(id__in=list(expired), status__in=open_statuses).update(
+                status=cls.STATUS_CANCELED,
+                updated_at=now,
+            )
+            for previous in open_statuses:
+                transaction.on_commit(partial(
+                    count_payment_transition,
+                    previous, cls.STATUS_CANCELED, sum(1 for status in expired.values() if status == previous),
+                ))
+        return updated
+
 
 class PaymentWebhookEvent(models.Model):
     """Stores webhook delivery data to prevent replay and duplicate processing."""
@@ -593,17 +903,47 @@ class PaymentWebhookEvent(models.Model):
     raw_payload = models.JSONField(default=dict, blank=True)
     received_at = models.DateTimeField(auto_now_add=True)
     processed_at = models.DateTimeField(null=True, blank=True)
+    # Deferred processing bookkeeping: failed events are retried with backoff
+    # and parked after PAYMENT_WEBHOOK_MAX_ATTEMPTS so they leave the queue.
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    parked_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         db_table = 'payment_webhook_events'
         ordering = ['-received_at']
         indexes = [
             models.Index(fields=['provider', 'event_type'], name='pay_webhook_prov_type_idx'),
+            models.Index(
+                fields=['next_attempt_at', 'id'],
+                condition=Q(processed_at__isnull=True, parked_at__isnull=True),
+                name='pay_webhook_due_idx',
+            ),
         ]
 
     def __str__(self):
         return f'{self.provider}:{self.provider_event_id}'
 
+    @classmethod
+    def insert_if_new(cls, provider, provider_event_id, event_type, payload_hash, raw_payload, signature_verified=True):
+        """Record a delivery in one INSERT ... ON CONFLICT; return the new row id, or None for a duplicate."""
+        table = connection.ops.quote_name(cls._meta.db_table)
+        payload_value = cls._meta.get_field('raw_payload').get_db_prep_value(raw_payload, connection)
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} '
+                '(provider, provider_event_id, event_type, signature_verified, payload_hash, raw_payload, '
+                'received_at, attempts, last_error, next_attempt_at) '
+                'VALUES (%s, %s, %s, %s, %s, %s, %s, 0, %s, %s) '
+                'ON CONFLICT (provider_event_id) DO NOTHING '
+                'RETURNING id',
+                [provider, provider_event_id, event_type, signature_verified, payload_hash, payload_value, now, '', now],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
 
 class SecurityAuditEvent(models.Model):
     """Security/audit log for sensitive operations and payment activities."""
@@ -646,5 +986,5 @@ def ensure_user_profile(sender, instance, created, **kwargs):
     except Exception as exc:
         import logging
         logging.getLogger('security').error(
-            f'ensure_user_profile: failed to create profile for user {instance.pk}: {exc}'
+            'ensure_user_profile: failed to create profile for user %s: %s', instance.pk, exc
         )
@@ -0,0 +1,287 @@
+"""
+Batch reconciliation of local payment state against a provider export.
+
+The export (CSV with a header row, or JSONL) is loaded once into in-memory
+lookups; PaymentCheckoutSession and Payment rows are then streamed in
+keyset-ordered chunks (id > last_id), matched, and written back with one
+bulk_update per chunk. The write locks the chunk's rows (SKIP LOCKED) and only
+touches rows still in the state that was read, so a webhook committed in
+between is never overwritten.
+
+Recognised export columns:
+    reference            checkout reference or PayU referenceCode
+    provider_session_id  provider checkout/session id (Stripe)
+    payment_id           local Payment id, for payments missing payu_transaction_id
+    transaction_id       provider transaction id used to backfill payu_transaction_id
+    status               provider status (succeeded/approved/4, failed/declined/6, ...)
+"""
+import csv
+import json
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Payment, PaymentCheckoutSession
+from .webhook_processing import payu_status_for_state
+
+# Provider statuses per local model: sessions have a "created" state, Payments
+# do not (an unsettled payment is simply pending).
+SESSION_STATUS_ALIASES = {
+    'created': PaymentCheckoutSession.STATUS_CREATED,
+    'open': PaymentCheckoutSession.STATUS_PENDING,
+    'pending': PaymentCheckoutSession.STATUS_PENDING,
+    'processing': PaymentCheckoutSession.STATUS_PENDING,
+    '7': PaymentCheckoutSession.STATUS_PENDING,
+    'complete': PaymentCheckoutSession.STATUS_SUCCEEDED,
+    'paid': PaymentCheckoutSession.STATUS_SUCCEEDED,
+    'expired': PaymentCheckoutSession.STATUS_CANCELED,
+    'cancelled': PaymentCheckoutSession.STATUS_CANCELED,
+    'unpaid': PaymentCheckoutSession.STATUS_FAILED,
+}
+PAYMENT_STATUS_ALIASES = {
+    'created': Payment.STATUS_PENDING,
+    'open': Payment.STATUS_PENDING,
+    'pending': Payment.STATUS_PENDING,
+    'processing': Payment.STATUS_PENDING,
+    '7': Payment.STATUS_PENDING,
+    'complete': Payment.STATUS_SUCCEEDED,
+    'paid': Payment.STATUS_SUCCEEDED,
+    'expired': Payment.STATUS_CANCELED,
+    'cancelled': Payment.STATUS_CANCELED,
+    'unpaid': Payment.STATUS_FAILED,
+}
+PAYMENT_STATUSES = {value for value, _ in Payment.STATUS_CHOICES}
+
+OPEN_SESSION_STATUSES = [PaymentCheckoutSession.STATUS_CREATED, PaymentCheckoutSession.STATUS_PENDING]
+
+
+def normalize_status(value, aliases=SESSION_STATUS_ALIASES):
+    """Map a provider status string onto the local statuses in aliases, or None."""
+    value = str(value or '').strip().lower()
+    if not value:
+        return None
+    if value in aliases:
+        return aliases[value]
+    status = payu_status_for_state(value)
+    return None if status == Payment.STATUS_PENDING else status
+
+
+def normalize_payment_status(value):
+    """Like normalize_status, but only ever returns one of Payment.STATUS_CHOICES."""
+    status = normalize_status(value, PAYMENT_STATUS_ALIASES)
+    return status if status in PAYMENT_STATUSES else None
+
+
+def read_export(path):
+    """Yield export rows as dicts from a .csv or .jsonl file."""
+    with open(path, newline='', encoding='utf-8') as handle:
+        if str(path).lower().endswith(('.jsonl', '.ndjson')):
+            for line in handle:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(handle)
+
+
+class ProviderExport:
+    """In-memory lookups built from a provider export file."""
+
+    def __init__(self, rows):
+        self.by_reference = {}
+        self.by_session_id = {}
+        self.by_payment_id = {}
+        self.rows = 0
+        self.skipped = 0
+
+        for row in rows:
+            self.rows += 1
+            session_status = normalize_status(row.get('status'))
+            payment_status = normalize_payment_status(row.get('status'))
+            if session_status is None and payment_status is None:
+                self.skipped += 1
+                continue
+
+            record = (session_status, payment_status, str(row.get('transaction_id') or '').strip() or None)
+            reference = str(row.get('reference') or '').strip()
+            session_id = str(row.get('provider_session_id') or '').strip()
+            payment_id = str(row.get('payment_id') or '').strip()
+
+            if reference:
+                self.by_reference[reference] = record
+            if session_id:
+                self.by_session_id[session_id] = record
+            if payment_id.isdigit():
+                self.by_payment_id[int(payment_id)] = record
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(read_export(path))
+
+    def match_session(self, session):
+        if session.provider_session_id and session.provider_session_id in self.by_session_id:
+            return self.by_session_id[session.provider_session_id]
+        return self.by_reference.get(str(session.reference))
+
+    def match_payment(self, payment):
+        if payment.payu_transaction_id:
+            return self.by_reference.get(payment.payu_transaction_id)
+        return self.by_payment_id.get(payment.id)
+
+
+class ReconciliationStats:
+    def __init__(self):
+        self.scanned = 0
+        self.matched = 0
+        self.updated = 0
+        self.rejected = 0
+        # Rows changed by someone else (a webhook) between the read and the write.
+        self.skipped = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.scanned / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            'scanned': self.scanned,
+            'matched': self.matched,
+            'updated': self.updated,
+            'rejected': self.rejected,
+            'skipped': self.skipped,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+def _keyset_chunks(queryset, chunk_size):
+    """Yield lists of rows ordered by id, fetching each chunk with id > last seen id."""
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id).order_by('id')[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1].id
+
+
+def reconcile_checkout_sessions(export, provider=None, chunk_size=1000, dry_run=False, on_chunk=None):
+    """
+    Apply export statuses to open checkout sessions through
+    PaymentCheckoutSession.transition(). Each chunk is written with its rows
+    locked; rows locked elsewhere or no longer in the status that was read are
+    left alone and counted as skipped.
+    """
+    stats = ReconciliationStats()
+    queryset = PaymentCheckoutSession.objects.filter(status__in=OPEN_SESSION_STATUSES).only(
+        'id', 'reference', 'provider', 'provider_session_id', 'status', 'updated_at',
+    )
+    if provider:
+        queryset = queryset.filter(provider=provider)
+
+    for chunk in _keyset_chunks(queryset, chunk_size):
+        changed = []
+        for session in chunk:
+            stats.scanned += 1
+            record = export.match_session(session)
+            if record is None or record[0] is None:
+                continue
+            stats.matched += 1
+            target_status = record[0]
+            if target_status == session.status:
+                continue
+            observed = session.status
+            try:
+                session.transition(target_status)
+            except ValidationError:
+                stats.rejected += 1
+                continue
+            changed.append((session, observed))
+
+        if changed and not dry_run:
+            with transaction.atomic():
+                current = dict(
+                    PaymentCheckoutSession.objects.select_for_update(skip_locked=True)
+                    .filter(pk__in=[session.pk for session, _ in changed])
+                    .values_list('pk', 'status')
+                )
+                applied = [session for session, observed in changed if current.get(session.pk) == observed]
+                PaymentCheckoutSession.objects.bulk_update(applied, ['status', 'updated_at'])
+                PaymentCheckoutSession.count_transitions_on_commit(applied)
+            stats.skipped += len(changed) - len(applied)
+            stats.updated += len(applied)
+        else:
+            stats.updated += len(changed)
+        if on_chunk:
+            on_chunk('sessions', stats)
+
+    return stats
+
+
+def reconcile_payments(export, chunk_size=1000, dry_run=False, on_chunk=None):
+    """
+    Settle pending Payments and backfill missing payu_transaction_id values,
+    with the same row locking and skipped count as reconcile_checkout_sessions.
+    """
+    stats = ReconciliationStats()
+    queryset = Payment.objects.filter(
+        Q(status=Payment.STATUS_PENDING) | Q(payu_transaction_id__isnull=True)
+    ).only('id', 'status', 'payu_transaction_id')
+
+    for chunk in _keyset_chunks(queryset, chunk_size):
+        matches = []
+        for payment in chunk:
+            stats.scanned += 1
+            record = export.match_payment(payment)
+            if record is not None:
+                stats.matched += 1
+                matches.append((payment, record))
+
+        backfill_ids = {tx_id for payment, (_, _, tx_id) in matches if tx_id and not payment.payu_transaction_id}
+        taken = set(
+            Payment.objects.filter(payu_transaction_id__in=backfill_ids).values_list('payu_transaction_id', flat=True)
+        ) if backfill_ids else set()
+
+        changed = []
+        for payment, (_, target_status, tx_id) in matches:
+            observed = (payment.status, payment.payu_transaction_id)
+            dirty = False
+            if target_status and target_status != payment.status:
+                if payment.status == Payment.STATUS_PENDING:
+                    payment.status = target_status
+                    dirty = True
+                else:
+                    stats.rejected += 1
+            if tx_id and not payment.payu_transaction_id and tx_id not in taken:
+                payment.payu_transaction_id = tx_id
+                taken.add(tx_id)
+                dirty = True
+            if dirty:
+                changed.append((payment, observed))
+
+        if changed and not dry_run:
+            with transaction.atomic():
+                current = {
+                    pk: (status, tx_id)
+                    for pk, status, tx_id in Payment.objects.select_for_update(skip_locked=True)
+                    .filter(pk__in=[payment.pk for payment, _ in changed])
+                    .values_list('pk', 'status', 'payu_transaction_id')
+                }
+                applied = [payment for payment, observed in changed if current.get(payment.pk) == observed]
+                Payment.objects.bulk_update(applied, ['status', 'payu_transaction_id'])
+            stats.skipped += len(changed) - len(applied)
+            stats.updated += len(applied)
+        else:
+            stats.updated += len(changed)
+        if on_chunk:
+            on_chunk('payments', stats)
+
+    return stats
@@ -3,6 +3,7 @@ import hmac
 import json
 import time
 import uuid
+from datetime import timedelta
 from decimal import Decimal, InvalidOperation
 
 from django.conf import settings
@@ -17,6 +18,16 @@ from rest_framework.response import Response
 from .models import PaymentCheckoutSession, PaymentWebhookEvent, SecurityAuditEvent, Payment, UserProfile
 from .payment_serializers import CreateCheckoutSessionSerializer
 from .throttles import AuthRateThrottle, BurstRateThrottle
+from .webhook_processing import (
+    CheckoutBusy,
+    PAYU_EVENT_TYPE,
+    acknowledge,
+    apply_payu_notification,
+    apply_stripe_event,
+    lock_stripe_checkout,
+    payu_notification_fields,
+    stripe_event_targets,
+)
 
 
 def _client_ip(request):
@@ -165,6 +176,7 @@ def create_checkout_session_view(request):
             currency=serializer.validated_data['currency'],
             metadata=serializer.validated_data.get('metadata', {}),
             status=PaymentCheckoutSession.STATUS_CREATED,
+            expires_at=timezone.now() + timedelta(seconds=int(getattr(settings, 'PAYMENT_CHECKOUT_TTL_SECONDS', 86400))),
         )
 
         SecurityAuditEvent.objects.create(
@@ -227,50 +239,48 @@ def stripe_webhook_view(request):
 
     payload_hash = hashlib.sha256(raw_body).hexdigest()
 
-    if PaymentWebhookEvent.objects.filter(provider='stripe', provider_event_id=event_id).exists():
-        return Response({'status': 'duplicate_ignored'}, status=status.HTTP_200_OK)
+    if getattr(settings, 'PAYMENT_WEBHOOK_ASYNC', False):
+        if not acknowledge('stripe', event_id, event_type, payload_hash, payload):
+            return Response({'status': 'duplicate_ignored'}, status=status.HTTP_200_OK)
+        return Response({'status': 'queued'}, status=status.HTTP_202_ACCEPTED)
 
-    with transaction.atomic():
-        webhook_event = PaymentWebhookEvent.objects.create(
-            provider='stripe',
-            provider_event_id=event_id,
-            event_type=event_type,
-            signature_verified=True,
-            payload_hash=payload_hash,
-            raw_payload=payload,
-        )
-
-        data_object = (payload.get('data') or {}).get('object') or {}
-        provider_session_id = str(data_object.get('id') or '').strip()
-        reference = ((data_object.get('metadata') or {}).get('reference') or '').strip()
-
-        checkout = None
-        if provider_session_id:
-            checkout = PaymentCheckoutSession.objects.filter(provider='stripe', provider_session_id=provider_session_id).first()
-        if not checkout and reference:
-            checkout = PaymentCheckoutSession.objects.filter(reference=reference).first()
-
-        if checkout:
-            if event_type in {'checkout.session.completed', 'payment_intent.succeeded', 'invoice.paid'}:
-                if checkout.status != PaymentCheckoutSession.STATUS_SUCCEEDED:
-                    checkout.transition(PaymentCheckoutSession.STATUS_SUCCEEDED)
-                    checkout.provider_session_id = checkout.provider_session_id or provider_session_id or None
-                    checkout.save(update_fields=['status', 'provider_session_id', 'updated_at'])
-            elif event_type in {'payment_intent.payment_failed', 'charge.failed'}:
-                if checkout.status not in {PaymentCheckoutSession.STATUS_SUCCEEDED, PaymentCheckoutSession.STATUS_CANCELED}:
-                    checkout.transition(PaymentCheckoutSession.STATUS_FAILED)
-                    checkout.provider_session_id = checkout.provider_session_id or provider_session_id or None
-                    checkout.save(update_fields=['status', 'provider_session_id', 'updated_at'])
-
-        webhook_event.processed_at = timezone.now()
-        webhook_event.save(update_fields=['processed_at'])
+    provider_session_id, reference = stripe_event_targets(payload)
 
-        SecurityAuditEvent.objects.create(
-            event_type='payment.webhook.accepted',
-            severity='info',
-            ip_address=_client_ip(request),
-            details={'event_id': event_id, 'event_type': event_type, 'checkout_reference': reference},
-        )
+    # The event row is inserted in the same transaction that applies it, so a
+    # crash or timeout mid-processing rolls it back and the provider's retry
+    # is processed instead of being ignored as a duplicate. A concurrent
+    # delivery of the same event waits on the ON CONFLICT until this one
+    # commits (then it is a duplicate) or rolls back (then it inserts).
+    try:
+        with transaction.atomic():
+            webhook_event_id = PaymentWebhookEvent.insert_if_new(
+                provider='stripe',
+                provider_event_id=event_id,
+                event_type=event_type,
+                payload_hash=payload_hash,
+                raw_payload=payload,
+            )
+            if webhook_event_id is None:
+                return Response({'status': 'duplicate_ignored'}, status=status.HTTP_200_OK)
+
+            checkout, busy = lock_stripe_checkout(provider_session_id, reference)
+            if busy:
+                raise CheckoutBusy()
+
+            if checkout:
+                apply_stripe_event(checkout, event_type, provider_session_id)
+
+            PaymentWebhookEvent.objects.filter(pk=webhook_event_id).update(processed_at=timezone.now())
+
+            SecurityAuditEvent.objects.create(
+                event_type='payment.webhook.accepted',
+                severity='info',
+                ip_address=_client_ip(request),
+                details={'event_id': event_id, 'event_type': event_type, 'checkout_reference': reference},
+            )
+    except CheckoutBusy:
+        # Another delivery holds the checkout row; let the provider retry this one.
+        return Response({'status': 'retry_later'}, status=status.HTTP_409_CONFLICT)
 
     return Response({'status': 'ok'}, status=status.HTTP_200_OK)
 
@@ -353,27 +363,21 @@ def payu_webhook_view(request):
         )
         return Response({'error': error_message}, status=status.HTTP_400_BAD_REQUEST)
 
-    tx_ref = str(payload.get('reference_sale') or payload.get('referenceCode') or '').strip()
-    state = str(payload.get('state_pol') or payload.get('state') or '').strip().lower()
+    tx_ref, state = payu_notification_fields(payload)
 
     if not tx_ref:
         return Response({'error': 'Missing transaction reference.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    payment = Payment.objects.filter(payu_transaction_id=tx_ref).first()
+    if getattr(settings, 'PAYMENT_WEBHOOK_ASYNC', False):
+        payload_hash = hashlib.sha256(request.body or b'{}').hexdigest()
+        if not acknowledge('payu', f'payu:{payload_hash}', PAYU_EVENT_TYPE, payload_hash, payload):
+            return Response({'status': 'duplicate_ignored'}, status=status.HTTP_200_OK)
+        return Response({'status': 'queued'}, status=status.HTTP_202_ACCEPTED)
+
+    payment = apply_payu_notification(tx_ref, state)
     if not payment:
         return Response({'status': 'ignored'}, status=status.HTTP_200_OK)
 
-    if state in {'4', 'approved', 'succeeded'}:
-        payment.status = Payment.STATUS_SUCCEEDED
-    elif state in {'6', 'declined', 'failed'}:
-        payment.status = Payment.STATUS_FAILED
-    elif state in {'5', 'canceled'}:
-        payment.status = Payment.STATUS_CANCELED
-    else:
-        payment.status = Payment.STATUS_PENDING
-
-    payment.save(update_fields=['status'])
-
     SecurityAuditEvent.objects.create(
         event_type='payment.payu_webhook.accepted',
         severity='info',
@@ -0,0 +1,186 @@
+"""
+Opt-in sampling profiler for single requests (staff only).
+
+A staff user asks POST /api/profiling/token/ for a short-lived signed token and
+sends it with the request to profile, as an `X-Profile-Token` header or a
+`__profile` query parameter. ProfilingMiddleware then samples the request
+thread's stack every PROFILING_INTERVAL_MS, records every SQL statement (text
+and duration, no parameters) and saves the result under profiles/<id>.json in
+the private "profiles" storage, with the stacks also written as
+profiles/<id>.folded in the collapsed format read by flamegraph.pl and
+speedscope. That storage has no public URLs: captures are download-only, for
+staff, through GET /api/profiling/<id>/.
+
+Each capture is recorded as a `profiling.capture` SecurityAuditEvent, which
+is also what the rate limits count: at most PROFILING_MAX_PER_HOUR captures
+overall and one per user every PROFILING_MIN_INTERVAL_SECONDS. Requests with
+an invalid token or over the limits are served normally, without profiling.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.utils import timezone
+
+from .models import SecurityAuditEvent
+
+TOKEN_SALT = 'api.profiling'
+AUDIT_EVENT = 'profiling.capture'
+PROFILE_DIR = 'profiles'
+MAX_RECORDED_QUERIES = 2000
+
+
+def issue_token(user):
+    return signing.dumps({'user': user.pk}, salt=TOKEN_SALT)
+
+
+def staff_user_for_token(token):
+    """Return the active staff user a token was issued to, or None."""
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT, max_age=int(getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 600)))
+    except signing.BadSignature:
+        return None
+    return User.objects.filter(pk=data.get('user'), is_staff=True, is_active=True).first()
+
+
+def reserve_capture(user, path, ip_address=None):
+    """
+    Claim a capture slot for user; return the audit event, or None when a
+    rate limit is hit. The slot is written before the limits are counted, so
+    concurrent requests cannot both slip under them.
+    """
+    now = timezone.now()
+    event = SecurityAuditEvent.objects.create(
+        event_type=AUDIT_EVENT,
+        severity='info',
+        ip_address=ip_address,
+        details={'user_id': user.pk, 'path': path},
+    )
+    recent = SecurityAuditEvent.objects.filter(event_type=AUDIT_EVENT, id__lt=event.id)
+    hourly_limit = int(getattr(settings, 'PROFILING_MAX_PER_HOUR', 10))
+    min_interval = timedelta(seconds=int(getattr(settings, 'PROFILING_MIN_INTERVAL_SECONDS', 60)))
+    if (
+        recent.filter(created_at__gte=now - timedelta(hours=1)).count() >= hourly_limit
+        or recent.filter(created_at__gte=now - min_interval, details__user_id=user.pk).exists()
+    ):
+        event.delete()
+        return None
+    return event
+
+
+def _frame_label(code):
+    filename = '/'.join(code.co_filename.replace('\\', '/').split('/')[-2:])
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+
+
+class StackSampler:
+    """Sample one thread's Python stack from a background thread."""
+
+    def __init__(self, thread_id, interval, max_seconds):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def folded(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common()) + '\n'
+
+
+class QueryRecorder:
+    """connection.execute_wrapper that keeps SQL text and duration (parameters are not stored)."""
+
+    def __init__(self):
+        self.queries = []
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.total += 1
+            if len(self.queries) < MAX_RECORDED_QUERIES:
+                self.queries.append({'sql': sql, 'ms': round((time.perf_counter() - started) * 1000, 3)})
+
+
+class RequestProfile:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.sampler = StackSampler(
+            threading.get_ident(),
+            float(getattr(settings, 'PROFILING_INTERVAL_MS', 5)) / 1000,
+            float(getattr(settings, 'PROFILING_MAX_SECONDS', 30)),
+        )
+        self.queries = QueryRecorder()
+        self.started = None
+        self.duration = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.sampler.stop()
+        self.duration = time.perf_counter() - self.started
+        return False
+
+    def save(self, request, response, user):
+        document = {
+            'id': self.id,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'user_id': user.pk,
+            'captured_at': timezone.now().isoformat(),
+            'duration_ms': round(self.duration * 1000, 2),
+            'interval_ms': round(self.sampler.interval * 1000, 3),
+            'samples': self.sampler.samples,
+            'query_count': self.queries.total,
+            'queries': self.queries.queries,
+            'folded': self.sampler.folded(),
+        }
+        storage = profile_storage()
+        storage.save(profile_path(self.id, 'folded'), ContentFile(document['folded'].encode('utf-8')))
+        storage.save(profile_path(self.id, 'json'), ContentFile(json.dumps(document).encode('utf-8')))
+        return document
+
+
+def profile_storage():
+    return storages['profiles']
+
+
+def profile_path(profile_id, extension):
+    return os.path.join(PROFILE_DIR, f'{profile_id}.{extension}').replace('\\', '/')
@@ -0,0 +1,55 @@
+import re
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .profiling import issue_token, profile_path, profile_storage
+
+PROFILE_ID_RE = re.compile(r'[0-9a-f]{32}')
+PROFILE_KINDS = {
+    'json': 'application/json',
+    'folded': 'text/plain; charset=utf-8',
+}
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def profiling_token_view(request):
+    """
+    POST /api/profiling/token/
+    Issue a short-lived token; send it as X-Profile-Token (or ?__profile=) to profile one request.
+    """
+    return Response({
+        'token': issue_token(request.user),
+        'expires_in': int(getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 600)),
+        'header': 'X-Profile-Token',
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profile_download_view(request, profile_id):
+    """
+    GET /api/profiling/<id>/?kind=json|folded
+    Download a stored capture: the full JSON document (SQL list included) or
+    the collapsed stacks for flamegraph.pl / speedscope.
+    """
+    kind = request.query_params.get('kind', 'json')
+    if kind not in PROFILE_KINDS:
+        return Response({'error': 'kind must be json or folded.'}, status=status.HTTP_400_BAD_REQUEST)
+    if not PROFILE_ID_RE.fullmatch(profile_id):
+        return Response({'error': 'Profile not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        with profile_storage().open(profile_path(profile_id, kind)) as handle:
+            content = handle.read()
+    except FileNotFoundError:
+        return Response({'error': 'Profile not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    response = HttpResponse(content, content_type=PROFILE_KINDS[kind])
+    response['Content-Disposition'] = f'attachment; filename="profile-{profile_id}.{kind}"'
+    return response
@@ -0,0 +1,225 @@
+"""
+PDF text extraction for publications.
+
+Saving a Publication with a new PDF queues a PublicationText row (status
+pending). extract_pending_texts() reads each queued PDF page by page with
+pypdf, stores the text in publication_texts and refreshes the publication
+search vector. It runs from `manage.py extract_publication_text` or, with
+PUBLICATION_TEXT_EXTRACT_IN_PROCESS, on a worker thread after commit.
+
+A row is claimed by moving it to `processing` in a short transaction; the
+download and parsing happen with no transaction open, and the result is
+written back only if the row still refers to the same file. Claims older
+than PUBLICATION_TEXT_CLAIM_TIMEOUT_SECONDS (a crashed worker) are re-queued.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Publication, PublicationText, refresh_publication_search_vectors
+
+logger = logging.getLogger(__name__)
+
+
+def extract_pdf_text(fileobj, max_chars=None, max_pages=None):
+    """
+    Extract text from a PDF file object one page at a time.
+
+    Pages are parsed lazily by pypdf and extraction stops as soon as
+    max_chars or max_pages is reached, so large files are never fully
+    decoded into memory.
+
+    Returns:
+        tuple: (text, pages_read, truncated)
+    """
+    from pypdf import PdfReader
+
+    max_chars = max_chars or int(getattr(settings, 'PUBLICATION_TEXT_MAX_CHARS', 200000))
+    max_pages = max_pages or int(getattr(settings, 'PUBLICATION_TEXT_MAX_PAGES', 500))
+
+    reader = PdfReader(fileobj)
+    total_pages = len(reader.pages)
+    truncated = total_pages > max_pages
+    parts = []
+    size = 0
+    pages_read = 0
+
+    for index in range(min(total_pages, max_pages)):
+        pages_read += 1
+        # Postgres text columns reject NUL bytes.
+        page_text = (reader.pages[index].extract_text() or '').replace('\x00', '').strip()
+        if not page_text:
+            continue
+        remaining = max_chars - size
+        if len(page_text) >= remaining:
+            parts.append(page_text[:remaining])
+            truncated = True
+            break
+        parts.append(page_text)
+        size += len(page_text) + 1
+
+    return '\n'.join(parts), pages_read, truncated
+
+
+def queue_extraction(publication):
+    """Queue (or drop) the extracted text for a publication after its file changed."""
+    name = publication.file.name if publication.file else ''
+    if not name:
+        deleted, _ = PublicationText.objects.filter(publication_id=publication.pk).delete()
+        if deleted:
+            publication.refresh_search_vector()
+        return None
+
+    text, created = PublicationText.objects.get_or_create(
+        publication_id=publication.pk,
+        defaults={'source_name': name},
+    )
+    if not created:
+        if text.source_name == name:
+            return text
+        text.source_name = name
+        text.status = PublicationText.STATUS_PENDING
+        text.content = ''
+        text.page_count = 0
+        text.truncated = False
+        text.error = ''
+        text.extracted_at = None
+        text.save()
+        publication.refresh_search_vector()
+
+    if getattr(settings, 'PUBLICATION_TEXT_EXTRACT_IN_PROCESS', False):
+        transaction.on_commit(schedule_extraction)
+    return text
+
+
+@receiver(post_save, sender=Publication)
+def _queue_extraction_on_upload(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and 'file' not in update_fields:
+        return
+    queue_extraction(instance)
+
+
+def _claim_next():
+    """Move the oldest pending row to processing and return it, or None."""
+    with transaction.atomic():
+        text = (
+            PublicationText.objects.select_for_update(skip_locked=True)
+            .filter(status=PublicationText.STATUS_PENDING)
+            .order_by('updated_at')
+            .first()
+        )
+        if text is not None:
+            text.status = PublicationText.STATUS_PROCESSING
+            text.save(update_fields=['status', 'updated_at'])
+        return text
+
+
+def _store_result(text, **values):
+    """
+    Write an extraction outcome unless the row was re-queued meanwhile (the
+    publication's file changed or its claim expired); return whether it was.
+    """
+    with transaction.atomic():
+        updated = PublicationText.objects.filter(
+            pk=text.pk,
+            source_name=text.source_name,
+            status=PublicationText.STATUS_PROCESSING,
+        ).update(updated_at=timezone.now(), **values)
+        if updated and values['status'] == PublicationText.STATUS_DONE:
+            refresh_publication_search_vectors(Publication.objects.filter(pk=text.pk))
+    return bool(updated)
+
+
+def _extract_one(text):
+    storage = Publication._meta.get_field('file').storage
+    try:
+        with storage.open(text.source_name, 'rb') as handle:
+            content, pages_read, truncated = extract_pdf_text(handle)
+    except Exception as exc:
+        logger.exception('publication_text extraction failed publication=%s file=%s', text.pk, text.source_name)
+        _store_result(text, status=PublicationText.STATUS_FAILED, error=f'{type(exc).__name__}: {exc}'[:255])
+        return False
+
+    _store_result(
+        text,
+        content=content,
+        page_count=pages_read,
+        truncated=truncated,
+        error='',
+        status=PublicationText.STATUS_DONE,
+        extracted_at=timezone.now(),
+    )
+    return True
+
+
+def requeue_stale_claims():
+    """Return rows whose processing claim outlived PUBLICATION_TEXT_CLAIM_TIMEOUT_SECONDS to pending."""
+    timeout = timedelta(seconds=int(getattr(settings, 'PUBLICATION_TEXT_CLAIM_TIMEOUT_SECONDS', 900)))
+    return PublicationText.objects.filter(
+        status=PublicationText.STATUS_PROCESSING,
+        updated_at__lt=timezone.now() - timeout,
+    ).update(status=PublicationText.STATUS_PENDING)
+
+
+def extract_pending_texts(batch_size=10):
+    """
+    Extract up to batch_size queued PDFs.
+
+    Each row is claimed with select_for_update(skip_locked=True) and marked
+    processing before its lock is released, so several workers can run
+    concurrently without extracting the same file twice, and no transaction
+    is held while a PDF is downloaded and parsed.
+
+    Returns:
+        dict: {'processed': int, 'failed': int}
+    """
+    processed = 0
+    failed = 0
+    requeue_stale_claims()
+
+    for _ in range(batch_size):
+        text = _claim_next()
+        if text is None:
+            break
+        if _extract_one(text):
+            processed += 1
+        else:
+            failed += 1
+
+    return {'processed': processed, 'failed': failed}
+
+
+def queue_missing_texts():
+    """Queue extraction for publications with a file but no extracted text row."""
+    publications = Publication.objects.exclude(file='').filter(extracted_text__isnull=True).only('id', 'file')
+    rows = [PublicationText(publication_id=publication.pk, source_name=publication.file.name) for publication in publications]
+    PublicationText.objects.bulk_create(rows, ignore_conflicts=True)
+    return len(rows)
+
+
+_extract_executor = None
+
+
+def _extract_in_background():
+    try:
+        extract_pending_texts()
+    except Exception:
+        logger.exception('publication_text background run failed')
+    finally:
+        connection.close()
+
+
+def schedule_extraction():
+    """Extract queued PDFs on a single in-process worker thread."""
+    global _extract_executor
+    if _extract_executor is None:
+        _extract_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='publication-text')
+    _extract_executor.submit(_extract_in_background)
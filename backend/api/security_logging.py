@@ -1,72 +1,151 @@
 """
 Security logging configuration for team leader management (Vercel-compatible)
+
+Records sent to the `security` logger are put on a bounded in-memory queue by
+a QueueHandler and written by a QueueListener thread, so file/console I/O and
+message formatting never run on the request thread. Records are emitted as
+one JSON object per line by handlers that belong to the listener alone, so
+the handlers shared with other loggers in settings.LOGGING keep their
+format. When the queue is full (SECURITY_LOG_QUEUE_SIZE) new records are
+dropped and counted instead of blocking the request.
 """
+import atexit
+import json
 import logging
 import os
-from datetime import datetime
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
 from django.conf import settings
 
+from .metrics import count_dropped_log_record
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Render a record as one JSON line; fields passed as extra={'security_event': {...}} are merged in."""
+
+    def format(self, record):
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        payload.update(getattr(record, 'security_event', None) or {})
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: records that do not fit in the queue are counted and dropped."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The listener runs in this process, so the record is handed over
+        # unformatted; msg % args is evaluated on the listener thread.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            count_dropped_log_record(record.name)
+
+
+def _stop_listener():
+    global _listener
+    if _listener is None:
+        return
+    try:
+        _listener.stop()
+    except queue.Full:
+        # No room for the stop sentinel; the listener thread is a daemon.
+        pass
+    _listener = None
+
 
 def setup_security_logging():
     """Setup secure logging for team leader operations (Vercel-compatible)"""
-    
+    global _listener
+
+    security_logger = logging.getLogger('security')
+    security_logger.setLevel(logging.INFO)
+    if any(isinstance(handler, DroppingQueueHandler) for handler in security_logger.handlers):
+        return security_logger
+
     # Only try to create logs directory in development
     if settings.DEBUG:
         # Create logs directory if it doesn't exist (local development only)
         log_dir = os.path.join(settings.BASE_DIR, 'logs')
         os.makedirs(log_dir, exist_ok=True)
-        
-        # Configure security logger with file handler
-        security_logger = logging.getLogger('security')
-        security_logger.setLevel(logging.INFO)
-        
-        # Remove existing handlers to avoid duplicates
-        security_logger.handlers.clear()
-        
-        # Create file handler for security logs
+
         log_filename = f"security_{datetime.now().strftime('%Y_%m')}.log"
-        log_path = os.path.join(log_dir, log_filename)
-        
-        file_handler = logging.FileHandler(log_path)
-        file_handler.setLevel(logging.INFO)
-        
-        # Create formatter
-        formatter = logging.Formatter(
-            '%(asctime)s | %(levelname)s | %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        file_handler.setFormatter(formatter)
-        
-        # Add handler to logger
-        security_logger.addHandler(file_handler)
-        security_logger.propagate = False  # Don't propagate to root logger
+        sinks = [logging.FileHandler(os.path.join(log_dir, log_filename))]
     else:
-        # Production (Vercel) - console logging only
-        security_logger = logging.getLogger('security')
-        security_logger.setLevel(logging.INFO)
-        
-        # Use the console handler already configured in settings
-        # No additional setup needed for Vercel
-    
+        # Production (Vercel) - console logging only. The listener gets its
+        # own stream handler: the `console` handler from settings.LOGGING is
+        # shared with django.security and must keep its formatter.
+        sinks = [logging.StreamHandler()]
+
+    for sink in sinks:
+        if sink.level == logging.NOTSET:
+            sink.setLevel(logging.INFO)
+        sink.setFormatter(JsonFormatter())
+
+    log_queue = queue.Queue(maxsize=int(getattr(settings, 'SECURITY_LOG_QUEUE_SIZE', 10000)))
+    _stop_listener()
+    _listener = QueueListener(log_queue, *sinks, respect_handler_level=True)
+    _listener.start()
+
+    security_logger.handlers = [DroppingQueueHandler(log_queue)]
+    security_logger.propagate = False  # Don't propagate to root logger
     return security_logger
 
 
 def log_team_leader_event(event_type, email, team_name, ip_address, details=""):
     """Log team leader related security events (Vercel-compatible)"""
     security_logger = logging.getLogger('security')
-    
+
+    event = event_type.upper()
+    if event in ['ERROR', 'DENIED', 'SECURITY_VIOLATION']:
+        level = logging.ERROR
+    elif event in ['WARNING', 'SUSPICIOUS']:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    if not security_logger.isEnabledFor(level):
+        return
+
     # Add prefix for easier filtering in Vercel logs
     prefix = "[TEAM_LEADER]" if not settings.DEBUG else "TEAM_LEADER"
-    message = f"{prefix}_{event_type.upper()}: Email={email} | Team={team_name} | IP={ip_address}"
+    message = '%s_%s: Email=%s | Team=%s | IP=%s'
+    args = [prefix, event, email, team_name, ip_address]
     if details:
-        message += f" | Details={details}"
-    
-    if event_type.upper() in ['ERROR', 'DENIED', 'SECURITY_VIOLATION']:
-        security_logger.error(message)
-    elif event_type.upper() in ['WARNING', 'SUSPICIOUS']:
-        security_logger.warning(message)
-    else:
-        security_logger.info(message)
+        message += ' | Details=%s'
+        args.append(details)
+
+    # details may be any object (e.g. serializer errors); it is only turned
+    # into text when the record is formatted on the listener thread.
+    security_logger.log(
+        level,
+        message,
+        *args,
+        extra={'security_event': {
+            'event': f'team_leader.{event_type.lower()}',
+            'email': email,
+            'team': team_name,
+            'ip_address': ip_address,
+            'details': details,
+        }},
+    )
 
 
 def get_client_ip(request):
@@ -80,9 +159,9 @@ def get_client_ip(request):
 
 
 # Initialize security logging when module is imported (Vercel-compatible)
+atexit.register(_stop_listener)
 try:
     setup_security_logging()
 except Exception as e:
     # Fallback to console logging if file system is read-only
-    import logging
-    logging.getLogger('security').warning(f"Security logging setup failed (using console fallback): {e}")
\ No newline at end of file
+    logging.getLogger('security').warning('Security logging setup failed (using console fallback): %s', e)
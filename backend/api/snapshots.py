@@ -0,0 +1,165 @@
+"""
+Static JSON snapshots of the public catalog.
+
+publish_snapshot() renders the public Team, Member and Publication payloads
+for each language into content-hashed files under snapshots/ in the default
+storage, then points snapshots/manifest.json at them. Hashed files never
+change once written, so they can be cached indefinitely by a CDN; only the
+manifest has to be revalidated.
+
+Run it with `manage.py publish_snapshot`, or set PUBLISH_SNAPSHOT_ON_CHANGE
+to republish on a worker thread after catalog changes are committed.
+"""
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Member, Publication, RedSocial, Team
+from .storage import write_storage_file
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = 'snapshots'
+MANIFEST_NAME = f'{SNAPSHOT_PREFIX}/manifest.json'
+SNAPSHOT_LANGUAGES = ('en', 'es')
+
+
+def catalog_payloads(language):
+    """Return the public list payloads for one language, matching the list endpoints."""
+    teams = Team.objects.only('id', 'name_en', 'name_es', 'image').order_by('id')
+    members = (
+        Member.objects.select_related('team').prefetch_related('social_links')
+        .filter(user__isnull=False, is_active=True).order_by('id')
+    )
+    publications = Publication.objects.select_related('team', 'author').defer('search_vector')
+
+    return {
+        'teams': [team.to_dict() for team in teams],
+        'members': [member.to_dict(language) for member in members],
+        'publications': [publication.to_dict(language) for publication in publications],
+    }
+
+
+def render_json(data):
+    """Serialize deterministically so identical data always hashes the same."""
+    return json.dumps(
+        data, cls=DjangoJSONEncoder, ensure_ascii=False, sort_keys=True, separators=(',', ':'),
+    ).encode('utf-8')
+
+
+def read_manifest(storage=None):
+    """Return the currently published manifest, or None."""
+    storage = storage or default_storage
+    try:
+        with storage.open(MANIFEST_NAME, 'rb') as handle:
+            return json.loads(handle.read().decode('utf-8'))
+    except (FileNotFoundError, OSError, ValueError):
+        return None
+
+
+def publish_snapshot(storage=None, force=False):
+    """
+    Write any new content-hashed snapshot files and update the manifest.
+
+    Returns:
+        dict: {'manifest': dict, 'written': [names], 'reused': [names], 'changed': bool}
+    """
+    storage = storage or default_storage
+    files = {}
+    written = []
+    reused = []
+
+    for language in SNAPSHOT_LANGUAGES:
+        for resource, payload in catalog_payloads(language).items():
+            content = render_json(payload)
+            digest = hashlib.sha256(content).hexdigest()
+            name = f'{SNAPSHOT_PREFIX}/{resource}.{digest[:16]}.json'
+
+            if name not in written and name not in reused:
+                if storage.exists(name):
+                    reused.append(name)
+                else:
+                    write_storage_file(storage, name, content)
+                    written.append(name)
+
+            files.setdefault(resource, {})[language] = {
+                'path': name,
+                'url': storage.url(name),
+                'sha256': digest,
+                'count': len(payload),
+            }
+
+    version = hashlib.sha256(
+        '\n'.join(sorted(entry['sha256'] for entries in files.values() for entry in entries.values())).encode('utf-8')
+    ).hexdigest()[:16]
+
+    current = read_manifest(storage)
+    if current and current.get('version') == version and not force:
+        return {'manifest': current, 'written': written, 'reused': reused, 'changed': False}
+
+    manifest = {
+        'version': version,
+        'generated_at': timezone.now().isoformat(),
+        'languages': list(SNAPSHOT_LANGUAGES),
+        'files': files,
+    }
+    write_storage_file(storage, MANIFEST_NAME, render_json(manifest), overwrite=True)
+    return {'manifest': manifest, 'written': written, 'reused': reused, 'changed': True}
+
+
+_publish_executor = None
+_publish_lock = threading.Lock()
+_publish_pending = False
+
+
+def _publish_in_background():
+    global _publish_pending
+    with _publish_lock:
+        _publish_pending = False
+    try:
+        publish_snapshot()
+    except Exception:
+        logger.exception('snapshot publish failed')
+    finally:
+        connection.close()
+
+
+def schedule_publish():
+    """Republish on a single worker thread; bursts of changes collapse into one run."""
+    global _publish_executor, _publish_pending
+    with _publish_lock:
+        if _publish_pending:
+            return
+        _publish_pending = True
+        if _publish_executor is None:
+            _publish_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='snapshot-publish')
+    _publish_executor.submit(_publish_in_background)
+
+
+def publish_on_commit():
+    """Schedule a republish once the current transaction commits, if PUBLISH_SNAPSHOT_ON_CHANGE is set."""
+    if getattr(settings, 'PUBLISH_SNAPSHOT_ON_CHANGE', False):
+        transaction.on_commit(schedule_publish)
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+@receiver(post_save, sender=Publication)
+@receiver(post_delete, sender=Publication)
+@receiver(post_save, sender=RedSocial)
+@receiver(post_delete, sender=RedSocial)
+def _publish_on_catalog_change(sender, raw=False, **kwargs):
+    if not raw:
+        publish_on_commit()
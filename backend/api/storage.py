@@ -1,20 +1,29 @@
 import mimetypes
 import json
+import shutil
+import tempfile
+import time
 from pathlib import Path
 from urllib.error import HTTPError, URLError
 from urllib.parse import quote
 from urllib.request import Request, urlopen
 
 from django.conf import settings
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.core.files.storage import Storage
 from django.utils.deconstruct import deconstructible
 
+from .instrumentation import record_storage_call
+
 
 @deconstructible
 class SupabaseStorage(Storage):
-    def __init__(self, bucket_name=None, supabase_url=None, service_role_key=None):
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, bucket_name=None, supabase_url=None, service_role_key=None, public=True):
         self.bucket_name = bucket_name or settings.SUPABASE_STORAGE_BUCKET
+        # Private buckets have no public URLs; objects are read with the service role key.
+        self.public = public
         self.supabase_url = (supabase_url or settings.SUPABASE_URL).rstrip('/')
         self.service_role_key = service_role_key or settings.SUPABASE_SERVICE_ROLE_KEY
         self.upload_base_url = f"{self.supabase_url}/storage/v1/object/{self.bucket_name}"
@@ -47,7 +56,14 @@ class SupabaseStorage(Storage):
 
     def _request(self, method, url, data=None, headers=None):
         request = Request(url, data=data, headers=headers or {}, method=method)
-        return urlopen(request, timeout=30)
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = urlopen(request, timeout=30)
+            failed = False
+            return response
+        finally:
+            record_storage_call(time.perf_counter() - started, failed=failed, method=method)
 
     def _read_content(self, content):
         if hasattr(content, 'seek'):
@@ -124,6 +140,8 @@ class SupabaseStorage(Storage):
     def url(self, name):
         if not name:
             return ''
+        if not self.public:
+            raise NotImplementedError('Private Supabase buckets have no public URLs.')
         return self._build_public_url(name)
 
     def size(self, name):
@@ -156,13 +174,37 @@ class SupabaseStorage(Storage):
         if 'r' not in mode:
             raise NotImplementedError('SupabaseStorage only supports read mode when opening files.')
         try:
-            response = self._request('GET', self.url(name))
-            return ContentFile(response.read(), name=self._normalize_name(name))
+            if self.public:
+                response = self._request('GET', self.url(name))
+            else:
+                response = self._request('GET', self._build_object_url(name), headers=self._authorized_headers())
         except HTTPError as exc:
             if exc.code == 404:
                 raise FileNotFoundError(name) from exc
             message = exc.read().decode('utf-8', errors='ignore')
             raise OSError(f"Supabase open failed for {name}: {exc.code} {message}") from exc
 
+        # Stream the body into a spooled file: small objects stay in memory,
+        # large ones (PDFs) roll over to disk instead of one big bytes object.
+        spooled = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        try:
+            with response:
+                shutil.copyfileobj(response, spooled, self.STREAM_CHUNK_SIZE)
+        except Exception:
+            spooled.close()
+            raise
+        spooled.seek(0)
+        return File(spooled, name=self._normalize_name(name))
+
     def path(self, name):
         raise NotImplementedError('SupabaseStorage does not provide local filesystem paths.')
+
+
+def write_storage_file(storage, name, content, overwrite=False):
+    """Save bytes under an exact name, replacing an existing file when overwrite is set."""
+    if hasattr(storage, 'upload_file'):
+        # SupabaseStorage: upsert instead of letting get_available_name rename the file.
+        return storage.upload_file(name, ContentFile(content, name=name), upsert=overwrite)
+    if overwrite and storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(content, name=name))
@@ -1,17 +1,161 @@
 # Team Leader Environment Variable Utils
 
 import os
-from django.db import models
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from .models import Team
 
 
+ENV_PREFIX = 'TEAM_LEADERS_'
+
+# Team mapping from env var suffix to team identification
+TEAM_MAPPINGS = {
+    'EXECUTIVE_COMMITTEE': {
+        'key': 'executive-committee',
+        'search_terms': ['executive', 'committee']
+    },
+    'BATTERIES': {
+        'key': 'batteries',
+        'search_terms': ['batteries', 'battery']
+    },
+    'CELLS': {
+        'key': 'cells',
+        'search_terms': ['cells', 'cell']
+    },
+    'CHASSIS': {
+        'key': 'chassis',
+        'search_terms': ['chassis']
+    },
+    'LOGISTICS': {
+        'key': 'logistics',
+        'search_terms': ['logistics', 'logistic']
+    },
+    'DESIGN': {
+        'key': 'design',
+        'search_terms': ['design']
+    },
+    'HUMAN_RESOURCES': {
+        'key': 'human-resources',
+        'search_terms': ['human', 'resources', 'hr']
+    }
+}
+
+_NOT_LEADER = {'is_team_leader': False, 'team_key': None, 'team': None}
+
+
+def team_env_suffix(team_name):
+    """Return the TEAM_LEADERS_* suffix derived from a team name."""
+    return (team_name or '').upper().replace(' ', '_').replace('-', '_')
+
+
+def _load_env_leader_map(environ=None):
+    """
+    Parse every TEAM_LEADERS_* variable once.
+
+    Returns:
+        tuple: (email -> set of env suffixes, email -> team key for TEAM_MAPPINGS)
+    """
+    environ = os.environ if environ is None else environ
+    suffixes_by_email = {}
+    for name, value in environ.items():
+        if not name.startswith(ENV_PREFIX):
+            continue
+        suffix = name[len(ENV_PREFIX):]
+        for email in value.split(','):
+            email = email.strip().lower()
+            if email:
+                suffixes_by_email.setdefault(email, set()).add(suffix)
+
+    # Keep the TEAM_MAPPINGS order so an email listed twice resolves as before.
+    team_key_by_email = {}
+    for env_suffix, team_info in TEAM_MAPPINGS.items():
+        for email, suffixes in suffixes_by_email.items():
+            if env_suffix in suffixes:
+                team_key_by_email.setdefault(email, team_info['key'])
+
+    return (
+        {email: frozenset(suffixes) for email, suffixes in suffixes_by_email.items()},
+        team_key_by_email,
+    )
+
+
+_ENV_LEADER_SUFFIXES, _ENV_LEADER_TEAM_KEYS = _load_env_leader_map()
+
+# Lazily built from the teams table. Only team ids are kept, and only for
+# TEAM_INDEX_CACHE_SECONDS: the signals below reset it in this process, the
+# TTL bounds how long other workers keep resolving a renamed team.
+_team_index = None
+
+
+def _build_team_index():
+    teams = list(Team.objects.order_by('id').values_list('id', 'name_en', 'name_es'))
+
+    team_ids_by_key = {}
+    for team_info in TEAM_MAPPINGS.values():
+        for search_term in team_info['search_terms']:
+            team_id = next(
+                (pk for pk, name_en, name_es in teams if search_term in name_en.lower() or search_term in name_es.lower()),
+                None,
+            )
+            if team_id:
+                team_ids_by_key[team_info['key']] = team_id
+                break
+
+    team_ids_by_suffix = {}
+    for pk, name_en, _ in teams:
+        team_ids_by_suffix.setdefault(team_env_suffix(name_en), pk)
+
+    ttl = float(getattr(settings, 'TEAM_INDEX_CACHE_SECONDS', 300))
+    return {'by_key': team_ids_by_key, 'by_suffix': team_ids_by_suffix, 'expires': time.monotonic() + ttl}
+
+
+def _get_team_index():
+    global _team_index
+    index = _team_index
+    if index is None or time.monotonic() >= index['expires']:
+        index = _team_index = _build_team_index()
+    return index
+
+
+def _fetch_team(team_id):
+    """Load a cached team id fresh; a team deleted elsewhere drops the index."""
+    if team_id is None:
+        return None
+    team = Team.objects.filter(pk=team_id).first()
+    if team is None:
+        invalidate_team_cache()
+    return team
+
+
+def invalidate_team_cache():
+    """Drop the cached team lookups so the next call reloads them."""
+    global _team_index
+    _team_index = None
+
+
+def reload_env_leader_map(environ=None):
+    """Re-read TEAM_LEADERS_* variables (e.g. after changing os.environ in tests)."""
+    global _ENV_LEADER_SUFFIXES, _ENV_LEADER_TEAM_KEYS
+    _ENV_LEADER_SUFFIXES, _ENV_LEADER_TEAM_KEYS = _load_env_leader_map(environ)
+    invalidate_team_cache()
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def _invalidate_team_cache_on_change(sender, **kwargs):
+    invalidate_team_cache()
+
+
 def get_team_leader_info(email):
     """
     Check if an email is in any team leader environment variable whitelist
-    
+
     Args:
         email (str): Email address to check
-        
+
     Returns:
         dict: {
             'is_team_leader': bool,
@@ -20,74 +164,45 @@ def get_team_leader_info(email):
         }
     """
     if not email:
-        return {'is_team_leader': False, 'team_key': None, 'team': None}
-    
-    email = email.lower().strip()
-    
-    # Team mapping from env var suffix to team identification
-    team_mappings = {
-        'EXECUTIVE_COMMITTEE': {
-            'key': 'executive-committee',
-            'search_terms': ['executive', 'committee']
-        },
-        'BATTERIES': {
-            'key': 'batteries',
-            'search_terms': ['batteries', 'battery']
-        },
-        'CELLS': {
-            'key': 'cells',
-            'search_terms': ['cells', 'cell']
-        },
-        'CHASSIS': {
-            'key': 'chassis',
-            'search_terms': ['chassis']
-        },
-        'LOGISTICS': {
-            'key': 'logistics',
-            'search_terms': ['logistics', 'logistic']
-        },
-        'DESIGN': {
-            'key': 'design',
-            'search_terms': ['design']
-        },
-        'HUMAN_RESOURCES': {
-            'key': 'human-resources',
-            'search_terms': ['human', 'resources', 'hr']
-        }
+        return _NOT_LEADER.copy()
+
+    team_key = _ENV_LEADER_TEAM_KEYS.get(email.lower().strip())
+    if team_key is None:
+        return _NOT_LEADER.copy()
+
+    return {
+        'is_team_leader': True,
+        'team_key': team_key,
+        'team': _fetch_team(_get_team_index()['by_key'].get(team_key))
     }
-    
-    for env_suffix, team_info in team_mappings.items():
-        env_var = f"TEAM_LEADERS_{env_suffix}"
-        team_leaders = os.getenv(env_var, '').split(',')
-        
-        if email in [leader.lower().strip() for leader in team_leaders if leader.strip()]:
-            # Find the corresponding team
-            team = None
-            for search_term in team_info['search_terms']:
-                team = Team.objects.filter(
-                    models.Q(name_en__icontains=search_term) | 
-                    models.Q(name_es__icontains=search_term)
-                ).first()
-                if team:
-                    break
-            
-            return {
-                'is_team_leader': True,
-                'team_key': team_info['key'],
-                'team': team
-            }
-    
-    return {'is_team_leader': False, 'team_key': None, 'team': None}
+
+
+def find_env_leader_team(email):
+    """Return the Team whose TEAM_LEADERS_<NAME> variable lists this email, else None."""
+    suffixes = _ENV_LEADER_SUFFIXES.get((email or '').strip().lower())
+    if not suffixes:
+        return None
+
+    for suffix, team_id in _get_team_index()['by_suffix'].items():
+        if suffix in suffixes:
+            return _fetch_team(team_id)
+    return None
+
+
+def is_env_leader_for_team(email, team):
+    """Check if an email is listed in the TEAM_LEADERS_* variable of a given team."""
+    suffixes = _ENV_LEADER_SUFFIXES.get((email or '').strip().lower())
+    return bool(suffixes) and team_env_suffix(team.name_en) in suffixes
 
 
 def is_email_team_leader(email):
     """
     Simple check if email is a team leader
-    
+
     Args:
         email (str): Email address to check
-        
+
     Returns:
         bool: True if email is a team leader
     """
-    return get_team_leader_info(email)['is_team_leader']
\ No newline at end of file
+    return get_team_leader_info(email)['is_team_leader']
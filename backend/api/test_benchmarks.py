@@ -0,0 +1,260 @@
+"""
+Endpoint benchmarks with query budgets.
+
+Seeds production-like volumes (BENCHMARK_MEMBERS members with
+social links, BENCHMARK_PUBLICATIONS publications, BENCHMARK_PAYMENTS
+payments and checkout sessions), requests every read endpoint
+BENCHMARK_ITERATIONS times through the test client and fails when an endpoint
+runs more SQL queries than its declared budget. Budgets do not depend on the
+seeded volume, so an N+1 shows up as a failure rather than a slow page.
+
+Latency percentiles and query counts are written as JSON to BENCHMARK_REPORT
+when it is set:
+
+    BENCHMARK_REPORT=bench.json python manage.py test api.test_benchmarks
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITransactionTestCase
+
+from . import metrics
+from .models import (
+    Member,
+    Payment,
+    PaymentCheckoutSession,
+    Publication,
+    RedSocial,
+    Team,
+    refresh_publication_search_vectors,
+)
+
+TEAMS = 7
+MEMBERS = int(os.getenv('BENCHMARK_MEMBERS', '2000'))
+PUBLICATIONS = int(os.getenv('BENCHMARK_PUBLICATIONS', '300'))
+PAYMENTS = int(os.getenv('BENCHMARK_PAYMENTS', '1000'))
+ITERATIONS = int(os.getenv('BENCHMARK_ITERATIONS', '10'))
+
+PUBLIC, MEMBER, STAFF = 'public', 'member', 'staff'
+
+# (name, path, viewer, query budget). Paths are formatted with the ids picked
+# in seed(). Budgets are the worst case over all iterations, so cold
+# cache runs count too.
+ENDPOINTS = (
+    ('team-list', '/api/teams/', PUBLIC, 1),
+    ('team-detail', '/api/teams/{team}/', PUBLIC, 1),
+    ('team-members', '/api/teams/{team}/members/', PUBLIC, 3),
+    ('team-batch', '/api/teams/batch/?ids={team_ids}', PUBLIC, 1),
+    ('member-list', '/api/members/', PUBLIC, 2),
+    ('member-list-page-100', '/api/members/?page_size=100&lang=es', PUBLIC, 2),
+    ('member-list-sparse', '/api/members/?page_size=100&fields=id,name,team_name,social_links', PUBLIC, 2),
+    ('member-detail', '/api/members/{member}/', PUBLIC, 2),
+    ('member-social-links', '/api/members/{member}/social_links/', PUBLIC, 2),
+    ('member-batch', '/api/members/batch/?ids={member_ids}', PUBLIC, 2),
+    ('publication-list', '/api/publications/', PUBLIC, 1),
+    ('publication-list-page-100', '/api/publications/?page_size=100', PUBLIC, 1),
+    ('publication-detail', '/api/publications/{slug}/', PUBLIC, 1),
+    ('publication-search', '/api/publications/search/?q=aerodynamics', PUBLIC, 2),
+    ('publication-batch', '/api/publications/batch/?slugs={slugs}', PUBLIC, 1),
+    ('social-link-list', '/api/social-links/?member={member}', PUBLIC, 3),
+    ('bootstrap', '/api/bootstrap/', PUBLIC, 4),
+    ('sitemap', '/api/sitemap.xml', PUBLIC, 3),
+    ('publication-feed', '/api/feeds/publications.en.atom', PUBLIC, 3),
+    ('check-email', '/api/auth/check-email/?email=member12@bench.example.com', PUBLIC, 2),
+    ('payments-config', '/api/payments/config/', MEMBER, 0),
+    # The first request creates the viewer's profile, whose identity claim runs in a savepoint.
+    ('current-user', '/api/auth/me/', MEMBER, 9),
+    ('metrics', '/api/metrics/', STAFF, 2),
+)
+
+# Endpoints backed by pg_trgm (installed by migration 0023); measured in their
+# own test, which is skipped on databases without the extension.
+TRIGRAM_ENDPOINTS = (
+    ('member-autocomplete', '/api/members/autocomplete/?q=member 12', PUBLIC, 1),
+)
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class EndpointBenchmarkTests(APITransactionTestCase):
+    """
+    A TransactionTestCase, so it runs after the TestCase suites and the seeded
+    tables are truncated afterwards; rolled-back bulk loads would leave their
+    pages behind and skew the planner in the query plan tests.
+
+    available_apps lists every app only so that the flush truncates with
+    CASCADE: on a migrated database the legacy admins table (dropped from
+    the migration state in 0010, not from the database) still references
+    members.
+    """
+
+    available_apps = [config.name for config in django_apps.get_app_configs()]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.report = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        report_path = os.getenv('BENCHMARK_REPORT')
+        if report_path:
+            with open(report_path, 'w', encoding='utf-8') as handle:
+                json.dump(
+                    {'volumes': {'members': MEMBERS, 'publications': PUBLICATIONS, 'payments': PAYMENTS},
+                     'iterations': ITERATIONS, 'endpoints': cls.report},
+                    handle, indent=2,
+                )
+        super().tearDownClass()
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        cache.clear()
+        self.addCleanup(cache.clear)
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def seed(self):
+        teams = Team.objects.bulk_create(
+            Team(name_en=f'Team {index}', name_es=f'Equipo {index}') for index in range(TEAMS)
+        )
+        users = User.objects.bulk_create(
+            User(username=f'member{index}@bench.example.com', email=f'member{index}@bench.example.com', password='!')
+            for index in range(MEMBERS)
+        )
+        members = Member.objects.bulk_create(
+            Member(
+                user=user,
+                name=f'Member {index}',
+                email=user.email,
+                career_en='Mechanical Engineering',
+                career_es='Ingeniería Mecánica',
+                role_en='Leader' if index < TEAMS else 'Member',
+                role_es='Líder' if index < TEAMS else 'Miembro',
+                image=f'members/member-{index}.jpg',
+                is_team_leader=index < TEAMS,
+                is_active=index % 10 != 0,
+                team=teams[index % TEAMS],
+            )
+            for index, user in enumerate(users)
+        )
+        RedSocial.objects.bulk_create(
+            RedSocial(member=member, platform=platform, url=f'https://{platform}.com/member{member.pk}')
+            for member in members
+            for platform in ('github', 'linkedin')
+        )
+        publications = Publication.objects.bulk_create(
+            Publication(
+                slug=f'publication-{index}',
+                name_en=f'Publication {index}: solar vehicle aerodynamics',
+                name_es=f'Publicación {index}: aerodinámica del vehículo solar',
+                abstract_en='We report wind tunnel measurements and drag coefficients. ' * 6,
+                abstract_es='Reportamos mediciones en túnel de viento y coeficientes de arrastre. ' * 6,
+                file=f'publications/files/publication-{index}.pdf',
+                author=members[index % len(members)],
+                team=teams[index % TEAMS],
+            )
+            for index in range(PUBLICATIONS)
+        )
+        refresh_publication_search_vectors(Publication.objects.all())
+
+        now = timezone.now()
+        Payment.objects.bulk_create(
+            Payment(
+                user=users[index % len(users)],
+                amount=Decimal('20000.00'),
+                type=Payment.TYPE_DONATION,
+                status=Payment.STATUS_SUCCEEDED if index % 3 else Payment.STATUS_PENDING,
+                payu_transaction_id=f'bench-tx-{index}',
+            )
+            for index in range(PAYMENTS)
+        )
+        PaymentCheckoutSession.objects.bulk_create(
+            PaymentCheckoutSession(
+                user=users[index % len(users)],
+                member=members[index % len(members)],
+                idempotency_key=f'bench-checkout-{index}',
+                item_type=PaymentCheckoutSession.ITEM_MEMBERSHIP,
+                item_id='gold-plan',
+                amount_cents=2000,
+                expires_at=now + timedelta(minutes=30),
+            )
+            for index in range(PAYMENTS)
+        )
+
+        self.viewer = users[TEAMS + 1]
+        self.staff = User.objects.create_user(username='staff@bench.example.com', password='test12345', is_staff=True)
+        self.ids = {
+            'team': teams[0].pk,
+            'team_ids': ','.join(str(team.pk) for team in teams),
+            'member': members[TEAMS + 1].pk,
+            'member_ids': ','.join(str(member.pk) for member in members[1:101]),
+            'slug': publications[0].slug,
+            'slugs': ','.join(publication.slug for publication in publications[:50]),
+        }
+
+    def _measure(self, path, viewer):
+        self.client.logout()
+        # Plain Django views (the metrics endpoint) only see session logins.
+        if viewer == STAFF:
+            self.client.force_login(self.staff)
+        self.client.force_authenticate({MEMBER: self.viewer, STAFF: self.staff}.get(viewer))
+        timings, queries, statuses = [], [], set()
+        for iteration in range(ITERATIONS):
+            # A fresh client address per request keeps the anonymous throttles out of the way.
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = self.client.get(path, REMOTE_ADDR=f'10.50.{iteration // 250}.{iteration % 250 + 1}')
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured.captured_queries))
+            statuses.add(response.status_code)
+        timings.sort()
+        return {
+            'path': path,
+            'status': sorted(statuses),
+            'queries_max': max(queries),
+            'queries_min': min(queries),
+            'p50_ms': round(percentile(timings, 0.5), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'max_ms': round(timings[-1], 2),
+        }
+
+    def _check_budgets(self, endpoints):
+        self.seed()
+        for name, path, viewer, budget in endpoints:
+            result = self._measure(path.format(**self.ids), viewer)
+            result['budget'] = budget
+            self.report[name] = result
+            with self.subTest(endpoint=name):
+                self.assertEqual(result['status'], [200], result)
+                self.assertLessEqual(result['queries_max'], budget, result)
+
+    @override_settings(METRICS_TOKEN='', METRICS_MULTIPROC_DIR='')
+    def test_endpoints_stay_within_query_budgets(self):
+        self._check_budgets(ENDPOINTS)
+
+    def test_trigram_endpoints_stay_within_query_budgets(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            if cursor.fetchone() is None:
+                self.skipTest('pg_trgm is not installed')
+        self._check_budgets(TRIGRAM_ENDPOINTS)
@@ -1,9 +1,56 @@
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from importlib import import_module
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.test import override_settings
+from django.core.cache import cache, caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 
-from .models import InternalWhitelistEntry, Team
+from . import auth_views, metrics, middleware
+from .feeds import refresh_feeds
+from .models import (
+    InternalWhitelistEntry,
+    Member,
+    Payment,
+    PaymentCheckoutSession,
+    PaymentWebhookEvent,
+    Publication,
+    PublicationText,
+    RedSocial,
+    SecurityAuditEvent,
+    Team,
+    UserProfile,
+)
+from .profiling import StackSampler
+from .publication_text import extract_pending_texts
+from .renderers import FastJSONRenderer
+from .security_logging import DroppingQueueHandler, JsonFormatter, log_team_leader_event, setup_security_logging
+from .snapshots import publish_snapshot, read_manifest
+from .storage import SupabaseStorage
+from .team_leader_utils import find_env_leader_team, get_team_leader_info, reload_env_leader_map
+from .webhook_processing import drain_webhook_events
 
 
 @override_settings(
@@ -66,4 +113,1491 @@ class LogoutRegressionTests(APITestCase):
         response = self.client.post('/api/auth/logout/', {}, format='json')
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertEqual(response.json(), {'error': 'Refresh token is required'})
\ No newline at end of file
+        self.assertEqual(response.json(), {'error': 'Refresh token is required'})
+
+
+class TeamLeaderEnvLookupTests(TestCase):
+    def setUp(self):
+        reload_env_leader_map({
+            'TEAM_LEADERS_DESIGN': 'Lead@Example.com, other@example.com',
+            'TEAM_LEADERS_VALIDATION_TEAM': 'validator@example.com',
+        })
+        self.addCleanup(reload_env_leader_map)
+        self.design = Team.objects.create(name_en='Design', name_es='Diseno')
+
+    def test_leader_info_is_cached_after_first_lookup(self):
+        get_team_leader_info('lead@example.com')
+
+        # Only the team id is cached; the row itself is read by primary key.
+        with self.assertNumQueries(1):
+            info = get_team_leader_info(' LEAD@example.com ')
+
+        self.assertTrue(info['is_team_leader'])
+        self.assertEqual(info['team_key'], 'design')
+        self.assertEqual(info['team'].id, self.design.id)
+        self.assertFalse(get_team_leader_info('nobody@example.com')['is_team_leader'])
+
+    def test_team_changes_refresh_env_team_resolution(self):
+        self.assertIsNone(find_env_leader_team('validator@example.com'))
+
+        validation = Team.objects.create(name_en='Validation Team', name_es='Equipo Validacion')
+
+        self.assertEqual(find_env_leader_team('validator@example.com'), validation)
+
+    def test_changes_made_by_other_processes_are_not_served_stale(self):
+        self.assertEqual(get_team_leader_info('lead@example.com')['team'].name_en, 'Design')
+
+        # QuerySet.update/delete skip the signals, like a write from another worker.
+        Team.objects.filter(pk=self.design.pk).update(name_es='Diseño')
+        self.assertEqual(get_team_leader_info('lead@example.com')['team'].name_es, 'Diseño')
+
+        Team.objects.filter(pk=self.design.pk).delete()
+        self.assertIsNone(get_team_leader_info('lead@example.com')['team'])
+
+    @override_settings(TEAM_INDEX_CACHE_SECONDS=0)
+    def test_team_index_expires(self):
+        self.assertIsNone(find_env_leader_team('validator@example.com'))
+
+        validation = Team.objects.bulk_create([Team(name_en='Validation Team', name_es='Equipo Validacion')])[0]
+
+        self.assertEqual(find_env_leader_team('validator@example.com'), validation)
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+)
+class PublicationSearchTests(APITestCase):
+    def setUp(self):
+        team = Team.objects.create(name_en='Cells', name_es='Celdas')
+        user = User.objects.create_user(username='author@example.com', password='test12345')
+        author = Member.objects.create(
+            user=user, name='Author', email='author@example.com', career_en='Design', career_es='Diseno',
+            role_en='Member', role_es='Miembro', team=team,
+        )
+        self.solar = Publication.objects.create(
+            name_en='Solar cell efficiency', name_es='Eficiencia de celdas solares',
+            abstract_en='We measure photovoltaic output.', abstract_es='Medimos la salida fotovoltaica.',
+            author=author, team=team,
+        )
+        self.author = author
+        Publication.objects.create(
+            name_en='Chassis weight', name_es='Peso del chasis',
+            abstract_en='Carbon fiber frames.', abstract_es='Marcos de fibra de carbono.',
+            author=author, team=team,
+        )
+
+    def test_search_matches_either_language_with_highlights(self):
+        for terms, lang in (('efficiency', 'en'), ('fotovoltaica', 'es')):
+            response = self.client.get('/api/publications/search/', {'q': terms, 'lang': lang})
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            body = response.json()
+            self.assertEqual(body['count'], 1)
+            self.assertEqual(body['results'][0]['slug'], self.solar.slug)
+            self.assertIn('<mark>', body['results'][0]['highlight']['name'] + body['results'][0]['highlight']['abstract'])
+
+    def test_highlights_escape_markup_from_the_source_text(self):
+        Publication.objects.create(
+            name_en='Telemetry <b>dashboard</b>', name_es='Panel de telemetria',
+            abstract_en='<script>alert(1)</script> Telemetry <img src=x onerror=alert(2)> from the car.',
+            abstract_es='Telemetria del auto.',
+            author=self.author, team=self.author.team,
+        )
+
+        response = self.client.get('/api/publications/search/', {'q': 'telemetry', 'lang': 'en'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        highlight = response.json()['results'][0]['highlight']
+        self.assertEqual(highlight['name'], '<mark>Telemetry</mark> &lt;b&gt;dashboard&lt;/b&gt;')
+        self.assertIn('<mark>Telemetry</mark>', highlight['abstract'])
+        self.assertIn('&lt;', highlight['abstract'])
+        # Nothing but the highlight tags survives as markup.
+        self.assertNotIn('<', highlight['abstract'].replace('<mark>', '').replace('</mark>', ''))
+
+    def test_search_requires_terms(self):
+        response = self.client.get('/api/publications/search/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+def _single_page_pdf(text):
+    """Build a minimal one-page PDF whose content stream draws text."""
+    stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'.encode('latin-1')
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+        b'/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>',
+        b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref_offset = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        output += b'%010d 00000 n \n' % offset
+    output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref_offset)
+    return bytes(output)
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+)
+class PublicationTextExtractionTests(APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        team = Team.objects.create(name_en='Batteries', name_es='Baterias')
+        user = User.objects.create_user(username='pdf-author@example.com', password='test12345')
+        self.author = Member.objects.create(
+            user=user, name='Author', email='pdf-author@example.com', career_en='Design', career_es='Diseno',
+            role_en='Member', role_es='Miembro', team=team,
+        )
+
+    def test_uploaded_pdf_text_is_extracted_into_search_index(self):
+        publication = Publication.objects.create(
+            name_en='Battery report', name_es='Informe de baterias',
+            abstract_en='Summary only.', abstract_es='Solo resumen.',
+            author=self.author,
+            file=SimpleUploadedFile('report.pdf', _single_page_pdf('Supercapacitor thermal runaway'), content_type='application/pdf'),
+        )
+        queued = PublicationText.objects.get(publication=publication)
+        self.assertEqual(queued.status, PublicationText.STATUS_PENDING)
+
+        response = self.client.get('/api/publications/search/', {'q': 'supercapacitor'})
+        self.assertEqual(response.json()['count'], 0)
+
+        call_command('extract_publication_text', stdout=StringIO())
+
+        extracted = PublicationText.objects.get(publication=publication)
+        self.assertEqual(extracted.status, PublicationText.STATUS_DONE)
+        self.assertEqual(extracted.page_count, 1)
+        self.assertIn('Supercapacitor', extracted.content)
+
+        response = self.client.get('/api/publications/search/', {'q': 'supercapacitor'})
+        self.assertEqual(response.json()['count'], 1)
+        self.assertEqual(response.json()['results'][0]['slug'], publication.slug)
+
+        publication.file = ''
+        publication.save()
+        self.assertFalse(PublicationText.objects.filter(publication=publication).exists())
+        response = self.client.get('/api/publications/search/', {'q': 'supercapacitor'})
+        self.assertEqual(response.json()['count'], 0)
+
+    def _publication_with_pdf(self):
+        return Publication.objects.create(
+            name_en='Cell report', name_es='Informe de celdas', abstract_en='A.', abstract_es='B.',
+            author=self.author,
+            file=SimpleUploadedFile('cells.pdf', _single_page_pdf('Busbar'), content_type='application/pdf'),
+        )
+
+    def test_pdf_is_read_outside_the_claiming_transaction(self):
+        publication = self._publication_with_pdf()
+        depth = len(connection.savepoint_ids)
+        seen = {}
+
+        def extract(handle):
+            seen['depth'] = len(connection.savepoint_ids)
+            seen['status'] = PublicationText.objects.get(pk=publication.pk).status
+            return 'Busbar', 1, False
+
+        with mock.patch('api.publication_text.extract_pdf_text', side_effect=extract):
+            self.assertEqual(extract_pending_texts(), {'processed': 1, 'failed': 0})
+
+        self.assertEqual(seen, {'depth': depth, 'status': PublicationText.STATUS_PROCESSING})
+        self.assertEqual(PublicationText.objects.get(pk=publication.pk).status, PublicationText.STATUS_DONE)
+
+    def test_result_for_a_replaced_file_is_discarded(self):
+        publication = self._publication_with_pdf()
+
+        def extract(handle):
+            publication.file = SimpleUploadedFile('cells-v2.pdf', _single_page_pdf('Busbar v2'), content_type='application/pdf')
+            publication.save()
+            return 'Busbar', 1, False
+
+        with mock.patch('api.publication_text.extract_pdf_text', side_effect=extract):
+            extract_pending_texts(batch_size=1)
+
+        text = PublicationText.objects.get(pk=publication.pk)
+        self.assertEqual(text.status, PublicationText.STATUS_PENDING)
+        self.assertEqual(text.source_name, publication.file.name)
+        self.assertEqual(text.content, '')
+
+    @override_settings(PUBLICATION_TEXT_CLAIM_TIMEOUT_SECONDS=60)
+    def test_stale_claims_are_requeued(self):
+        publication = self._publication_with_pdf()
+        PublicationText.objects.filter(pk=publication.pk).update(
+            status=PublicationText.STATUS_PROCESSING, updated_at=timezone.now() - timedelta(minutes=5),
+        )
+
+        self.assertEqual(extract_pending_texts(), {'processed': 1, 'failed': 0})
+        self.assertEqual(PublicationText.objects.get(pk=publication.pk).status, PublicationText.STATUS_DONE)
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_supabase_open_streams_into_a_spooled_file(self):
+        body = _single_page_pdf('Streamed') * 20
+        reads = []
+
+        class Response(BytesIO):
+            def read(self, size=-1):
+                reads.append(size)
+                return super().read(size)
+
+        storage = SupabaseStorage('media', 'https://storage.invalid', 'service-key')
+        with mock.patch.object(storage, '_request', return_value=Response(body)):
+            with storage.open('publications/files/report.pdf') as handle:
+                self.assertTrue(handle.file._rolled)
+                self.assertEqual(handle.read(), body)
+
+        self.assertNotIn(-1, reads)
+        self.assertTrue(all(size == SupabaseStorage.STREAM_CHUNK_SIZE for size in reads))
+
+
+class PublishSnapshotTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        team = Team.objects.create(name_en='Chassis', name_es='Chasis')
+        user = User.objects.create_user(username='snap@example.com', password='test12345')
+        author = Member.objects.create(
+            user=user, name='Snap', email='snap@example.com', career_en='Design', career_es='Diseno',
+            role_en='Member', role_es='Miembro', team=team,
+        )
+        self.publication = Publication.objects.create(
+            name_en='Frame study', name_es='Estudio del marco',
+            abstract_en='Stiffness.', abstract_es='Rigidez.', author=author, team=team,
+        )
+
+    def test_snapshot_files_are_content_addressed_and_reused(self):
+        first = publish_snapshot()
+
+        self.assertTrue(first['changed'])
+        # Teams are language neutral, so both languages share one file.
+        self.assertEqual(len(first['written']), 5)
+        manifest = read_manifest()
+        self.assertEqual(manifest['version'], first['manifest']['version'])
+        self.assertEqual(manifest['files']['teams']['en']['path'], manifest['files']['teams']['es']['path'])
+        with default_storage.open(manifest['files']['publications']['es']['path']) as handle:
+            self.assertEqual(json.loads(handle.read())[0]['name'], 'Estudio del marco')
+
+        second = publish_snapshot()
+        self.assertFalse(second['changed'])
+        self.assertEqual(second['written'], [])
+
+        self.publication.name_en = 'Frame stiffness study'
+        self.publication.save()
+        out = StringIO()
+        call_command('publish_snapshot', stdout=out)
+
+        manifest = read_manifest()
+        self.assertNotEqual(manifest['version'], first['manifest']['version'])
+        self.assertEqual(manifest['files']['members'], first['manifest']['files']['members'])
+        self.assertNotEqual(manifest['files']['publications']['en'], first['manifest']['files']['publications']['en'])
+        self.assertIn('2 new file(s), 3 reused', out.getvalue())
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+    FRONTEND_URL='https://candelaria.example',
+)
+class PublicationFeedTests(APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        team = Team.objects.create(name_en='Design', name_es='Diseno')
+        user = User.objects.create_user(username='feed@example.com', password='test12345')
+        self.author = Member.objects.create(
+            user=user, name='Feeder', email='feed@example.com', career_en='Design', career_es='Diseno',
+            role_en='Member', role_es='Miembro', team=team,
+        )
+        self.first = Publication.objects.create(
+            name_en='Aero & drag', name_es='Aerodinamica', abstract_en='Wind tunnel.', abstract_es='Tunel de viento.',
+            author=self.author, team=team,
+        )
+        Publication.objects.create(
+            name_en='Wheels', name_es='Ruedas', abstract_en='Rolling resistance.', abstract_es='Resistencia.',
+            author=self.author, team=team,
+        )
+
+    def test_feed_supports_conditional_get(self):
+        response = self.client.get('/api/feeds/publications.es.atom')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/atom+xml; charset=utf-8')
+        body = response.content.decode('utf-8')
+        self.assertIn('<title>Aerodinamica</title>', body)
+        self.assertIn(f'https://candelaria.example/publications/{self.first.slug}', body)
+
+        cached = self.client.get('/api/feeds/publications.es.atom', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.first.name_es = 'Aerodinamica avanzada'
+        self.first.save()
+        updated = self.client.get('/api/feeds/publications.es.atom', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(updated.status_code, status.HTTP_200_OK)
+        self.assertIn('Aerodinamica avanzada', updated.content.decode('utf-8'))
+
+        self.assertEqual(self.client.get('/api/feeds/publications.fr.atom').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unpublished_feed_is_rendered_without_writing_storage(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        with mock.patch('api.feeds.write_storage_file') as write:
+            response = self.client.get('/api/feeds/publications.en.atom')
+            sitemap = self.client.get('/sitemap.xml')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('<title>Aero &amp; drag</title>', response.content.decode('utf-8'))
+        self.assertEqual(sitemap.status_code, status.HTTP_200_OK)
+        write.assert_not_called()
+        self.assertFalse(default_storage.exists('feeds/state.json'))
+
+        # Later misses are served from the cache: one render per change.
+        with mock.patch('api.feeds.render_feeds') as render:
+            self.assertEqual(self.client.get('/api/feeds/publications.en.atom').content, response.content)
+            self.assertEqual(self.client.get('/api/feeds/publications.es.atom').status_code, status.HTTP_200_OK)
+        render.assert_not_called()
+
+        cache.clear()
+        refresh_feeds()
+        with mock.patch('api.feeds.render_feeds') as render:
+            self.assertEqual(self.client.get('/api/feeds/publications.en.atom').content, response.content)
+        render.assert_not_called()
+
+    @override_settings(FEEDS_REFRESH_ON_CHANGE=True)
+    def test_publication_changes_schedule_a_refresh_on_commit(self):
+        with mock.patch('api.feeds.schedule_refresh') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.first.name_en = 'Aero & lift'
+                self.first.save()
+        schedule.assert_called_once_with()
+
+    def test_refresh_only_renders_changed_publications(self):
+        self.assertEqual(refresh_feeds()['rendered'], 2)
+        self.assertEqual(refresh_feeds()['rendered'], 0)
+
+        self.first.abstract_en = 'Wind tunnel results.'
+        self.first.save()
+        self.assertEqual(refresh_feeds()['rendered'], 1)
+
+        self.first.delete()
+        refresh_feeds()
+        sitemap = self.client.get('/sitemap.xml')
+        self.assertEqual(sitemap.status_code, status.HTTP_200_OK)
+        body = sitemap.content.decode('utf-8')
+        self.assertIn('<loc>https://candelaria.example/publications/wheels</loc>', body)
+        self.assertNotIn('aero-drag', body)
+
+
+class FastJSONRendererTests(TestCase):
+    def test_output_matches_stock_renderer(self):
+        payload = {
+            'created_at': timezone.now(),
+            'date': date(2026, 1, 2),
+            'amount': Decimal('12.50'),
+            'name': 'Ingeniería Mecánica',
+            'links': [{'id': 1, 'url': None}],
+        }
+        self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    @override_settings(
+        DEBUG=True,
+        SECURE_SSL_REDIRECT=False,
+        ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+    )
+    def test_malformed_body_is_a_parse_error(self):
+        response = self.client.post('/api/auth/login/', data='{"email": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+)
+class ApiCompressionTests(APITestCase):
+    def setUp(self):
+        caches['compression'].clear()
+        team = Team.objects.create(name_en='Logistics', name_es='Logistica')
+        for index in range(12):
+            user = User.objects.create_user(username=f'zip{index}@example.com', password='test12345')
+            Member.objects.create(
+                user=user, name=f'Compressed Member {index}', email=f'zip{index}@example.com',
+                career_en='Industrial Engineering', career_es='Ingenieria Industrial',
+                role_en='Member', role_es='Miembro', team=team,
+            )
+
+    def test_large_list_is_gzipped_once_per_content_version(self):
+        plain = self.client.get('/api/members/')
+        self.assertNotIn('Content-Encoding', plain)
+
+        with mock.patch('api.middleware.gzip.compress', wraps=gzip.compress) as compress:
+            first = self.client.get('/api/members/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+            second = self.client.get('/api/members/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(compress.call_count, 1)
+        for response in (first, second):
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', response['Vary'])
+            self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_brotli_is_preferred_and_tiny_bodies_are_skipped(self):
+        if middleware.brotli is not None:
+            response = self.client.get('/api/members/', HTTP_ACCEPT_ENCODING='gzip, br')
+            self.assertEqual(response['Content-Encoding'], 'br')
+
+        tiny = self.client.get('/api/teams/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(tiny.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Content-Encoding', tiny)
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+)
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name_en='Cells', name_es='Celdas')
+        for index in range(3):
+            user = User.objects.create_user(username=f'sparse{index}@example.com', password='test12345')
+            member = Member.objects.create(
+                user=user, name=f'Sparse {index}', email=f'sparse{index}@example.com', career_en='Design',
+                career_es='Diseno', role_en='Member', role_es='Miembro', team=self.team,
+            )
+            RedSocial.objects.create(member=member, platform='github', url=f'https://github.com/sparse{index}')
+        Publication.objects.create(
+            name_en='Cells', name_es='Celdas', abstract_en='A.', abstract_es='B.', author=member, team=self.team,
+        )
+
+    def test_member_list_only_loads_and_returns_requested_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/members/', {'fields': 'id,name,team_name', 'lang': 'es'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()[0], {'id': response.json()[0]['id'], 'name': 'Sparse 0', 'team_name': 'Celdas'})
+        member_queries = [query['sql'] for query in queries.captured_queries if 'FROM "members"' in query['sql']]
+        self.assertEqual(len(member_queries), 1)
+        self.assertNotIn('"career_en"', member_queries[0])
+        self.assertNotIn('"name_en"', member_queries[0])
+        self.assertFalse(any('"red_social"' in query['sql'] for query in queries.captured_queries))
+
+    def test_fields_apply_to_retrieve_and_team_members(self):
+        publication = Publication.objects.get()
+        response = self.client.get(f'/api/publications/{publication.slug}/', {'fields': 'slug,author_name'})
+        self.assertEqual(response.json(), {'slug': publication.slug, 'author_name': 'Sparse 2'})
+
+        response = self.client.get(f'/api/teams/{self.team.id}/members/', {'fields': 'name,social_links'})
+        self.assertEqual(len(response.json()), 3)
+        self.assertEqual(set(response.json()[0]), {'name', 'social_links'})
+
+        response = self.client.get('/api/teams/', {'fields': 'id,name_es'})
+        self.assertEqual(response.json(), [{'id': self.team.id, 'name_es': 'Celdas'}])
+
+    def test_full_and_sparse_dicts_agree(self):
+        member = Member.objects.first()
+        publication = Publication.objects.get()
+        for obj, kwargs in (
+            (self.team, {}),
+            (member, {'language': 'es', 'include_email': True}),
+            (publication, {'language': 'es'}),
+        ):
+            full = obj.to_dict(**kwargs)
+            with self.subTest(model=type(obj).__name__):
+                self.assertEqual(obj.to_dict(fields=set(full), **kwargs), full)
+                columns = list(type(obj).DICT_FIELD_COLUMNS)
+                self.assertEqual(list(full)[:len(columns)], columns)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/members/', {'fields': 'name,password_hash'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password_hash', response.json()['detail'])
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+)
+class MultiGetTests(APITestCase):
+    def setUp(self):
+        team = Team.objects.create(name_en='Chassis', name_es='Chasis')
+        self.members = []
+        for index in range(3):
+            user = User.objects.create_user(username=f'multi{index}@example.com', password='test12345')
+            self.members.append(Member.objects.create(
+                user=user, name=f'Multi {index}', email=f'multi{index}@example.com', career_en='Design',
+                career_es='Diseno', role_en='Member', role_es='Miembro', team=team,
+            ))
+        self.publications = [
+            Publication.objects.create(
+                name_en=f'Paper {index}', name_es=f'Articulo {index}', abstract_en='A.', abstract_es='B.',
+                author=self.members[0], team=team,
+            )
+            for index in range(2)
+        ]
+
+    def test_members_come_back_in_requested_order_with_missing_ids(self):
+        first, second, third = self.members
+        ids = f'{third.id},{first.id},999999,{third.id}'
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/members/batch/', {'ids': ids, 'fields': 'id,name'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            'results': [{'id': third.id, 'name': 'Multi 2'}, {'id': first.id, 'name': 'Multi 0'}],
+            'missing': [999999],
+        })
+        self.assertEqual(len([q for q in queries.captured_queries if 'FROM "members"' in q['sql']]), 1)
+
+    def test_publications_by_slug(self):
+        slugs = f'{self.publications[1].slug},missing-paper,{self.publications[0].slug}'
+        response = self.client.get('/api/publications/batch/', {'slugs': slugs, 'lang': 'es', 'fields': 'name'})
+
+        self.assertEqual(response.json(), {
+            'results': [{'name': 'Articulo 1'}, {'name': 'Articulo 0'}],
+            'missing': ['missing-paper'],
+        })
+
+    def test_invalid_batch_requests_are_rejected(self):
+        for params in (
+            {},
+            {'ids': 'a,b'},
+            {'ids': ','.join(str(i) for i in range(1, 102))},
+            {'ids': '1,\u00b2'},
+            {'ids': '١٢'},
+            {'ids': '99999999999999999999'},
+            {'ids': '-1'},
+        ):
+            response = self.client.get('/api/teams/batch/', params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+)
+class MemberAutocompleteTests(APITestCase):
+    """Needs the pg_trgm extension (migration 0023)."""
+
+    def setUp(self):
+        team = Team.objects.create(name_en='Design', name_es='Diseno')
+
+        def member(name, role_en='Member', is_active=True, registered=True):
+            user = User.objects.create_user(username=f'{name.lower()}@example.com') if registered else None
+            return Member.objects.create(
+                user=user, name=name, email=f'{name.lower()}@example.com', career_en='Design', career_es='Diseno',
+                role_en=role_en, role_es='Miembro', team=team, is_active=is_active,
+            )
+
+        self.exact = member('Julia Gomez')
+        self.partial = member('Juliana Rios')
+        self.by_role = member('Pedro Ruiz', role_en='Julia project liaison')
+        member('Julia Inactive', is_active=False)
+        member('Julia Unregistered', registered=False)
+        member('Carlos Diaz')
+
+    def _names(self, **params):
+        response = self.client.get('/api/members/autocomplete/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row[1] for row in response.json()]
+
+    def test_name_matches_rank_before_career_and_role_matches(self):
+        self.assertEqual(self._names(q='julia'), ['Julia Gomez', 'Juliana Rios', 'Pedro Ruiz'])
+
+    def test_matching_is_case_insensitive_substring(self):
+        self.assertEqual(self._names(q='ULIANA'), ['Juliana Rios'])
+
+    def test_only_active_registered_members_are_returned(self):
+        names = self._names(q='julia', limit=25)
+        self.assertNotIn('Julia Inactive', names)
+        self.assertNotIn('Julia Unregistered', names)
+
+    def test_limit_and_short_terms(self):
+        self.assertEqual(self._names(q='julia', limit=2), ['Julia Gomez', 'Juliana Rios'])
+        self.assertEqual(len(self._names(q='julia', limit=0)), 1)
+        self.assertEqual(self._names(q='j'), [])
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+)
+class BootstrapEndpointTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for team_index in range(3):
+            team = Team.objects.create(name_en=f'Team {team_index}', name_es=f'Equipo {team_index}')
+            for member_index in range(3):
+                email = f'boot{team_index}-{member_index}@example.com'
+                user = User.objects.create_user(username=email, password='test12345')
+                member = Member.objects.create(
+                    user=user, name=f'Boot {team_index}-{member_index}', email=email, career_en='Design',
+                    career_es='Diseno', role_en='Member', role_es='Miembro', team=team,
+                    is_active=member_index != 2,
+                )
+                RedSocial.objects.create(member=member, platform='github', url=f'https://github.com/{email}')
+            Publication.objects.create(
+                name_en=f'Paper {team_index}', name_es=f'Articulo {team_index}', abstract_en='A.', abstract_es='B.',
+                author=member, team=team,
+            )
+
+    def test_payload_uses_fixed_queries_and_is_cached(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/bootstrap/', {'lang': 'es', 'publications': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries.captured_queries), 4)
+        body = response.json()
+        self.assertEqual([team['name_es'] for team in body['teams']], ['Equipo 0', 'Equipo 1', 'Equipo 2'])
+        self.assertEqual(len(body['teams'][0]['members']), 2)
+        self.assertEqual(body['teams'][0]['members'][0]['team_name'], 'Equipo 0')
+        self.assertEqual(len(body['teams'][0]['members'][0]['social_links']), 1)
+        self.assertEqual(len(body['publications']), 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get('/api/bootstrap/', {'lang': 'es', 'publications': 2}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries.captured_queries), 0)
+
+    def test_catalog_change_invalidates_payload(self):
+        first = self.client.get('/api/bootstrap/')
+        Team.objects.filter(name_en='Team 0').get().members.filter(is_active=True).first().delete()
+
+        second = self.client.get('/api/bootstrap/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(second.json()['teams'][0]['members']), 1)
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+)
+class SocialLinksUpdateTests(APITestCase):
+    def setUp(self):
+        team = Team.objects.create(name_en='Links', name_es='Enlaces')
+        self.user = User.objects.create_user(username='links@example.com', password='test12345')
+        self.member = Member.objects.create(
+            user=self.user, name='Links Owner', email='links@example.com', career_en='Design',
+            career_es='Diseno', role_en='Member', role_es='Miembro', team=team,
+        )
+        self.client.force_authenticate(self.user)
+
+    def _patch_links(self, links):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                f'/api/members/{self.member.id}/', {'social_links': links}, format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json(), len(queries.captured_queries)
+
+    def test_diff_is_applied_with_constant_queries(self):
+        RedSocial.objects.create(member=self.member, platform='github', url='https://github.com/old')
+        RedSocial.objects.create(member=self.member, platform='x', url='https://x.com/old')
+
+        body, small_diff_queries = self._patch_links([
+            {'platform': 'github', 'url': 'https://github.com/new'},
+            {'platform': 'linkedin', 'url': 'https://linkedin.com/in/new'},
+        ])
+        self.assertEqual(
+            [(link['platform'], link['url']) for link in body['social_links']],
+            [('github', 'https://github.com/new'), ('linkedin', 'https://linkedin.com/in/new')],
+        )
+
+        RedSocial.objects.create(member=self.member, platform='x', url='https://x.com/again')
+        RedSocial.objects.create(member=self.member, platform='behance', url='https://behance.net/again')
+        body, large_diff_queries = self._patch_links([
+            {'platform': 'github', 'url': 'https://github.com/newer'},
+            {'platform': 'linkedin', 'url': 'https://linkedin.com/in/newer'},
+            {'platform': 'instagram', 'url': 'https://instagram.com/newer'},
+            {'platform': 'portfolio', 'url': 'https://example.com/newer'},
+        ])
+        self.assertEqual(small_diff_queries, large_diff_queries)
+        self.assertEqual(
+            sorted(link['platform'] for link in body['social_links']),
+            ['github', 'instagram', 'linkedin', 'portfolio'],
+        )
+        stored = dict(self.member.social_links.values_list('platform', 'url'))
+        self.assertEqual(stored, {link['platform']: link['url'] for link in body['social_links']})
+
+    def test_invalid_links_payload_leaves_profile_unchanged(self):
+        response = self.client.patch(
+            f'/api/members/{self.member.id}/', {'name': 'Renamed', 'social_links': '{broken'}, format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.name, 'Links Owner')
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+)
+class LeadershipTransitionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.team = Team.objects.create(name_en='Roles', name_es='Roles')
+        # Created before the current leader/co-leader so a naive swap hits the unique indexes.
+        self.member = self._member('member', 'Member', 'Miembro')
+        self.coleader = self._member('coleader', 'Co-Leader', 'Co-Líder', is_coleader=True)
+        self.leader = self._member('leader', 'Team Leader', 'Líder de Equipo', is_team_leader=True)
+
+    def _member(self, slug, role_en, role_es, **flags):
+        user = User.objects.create_user(username=f'{slug}@roles.com', password='test12345')
+        return Member.objects.create(
+            user=user, name=slug.title(), email=f'{slug}@roles.com', career_en='Design', career_es='Diseno',
+            role_en=role_en, role_es=role_es, team=self.team, **flags,
+        )
+
+    def test_set_coleader_swaps_roles_under_row_locks(self):
+        self.client.force_authenticate(self.leader.user)
+        self.client.get('/api/bootstrap/')
+
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f'/api/members/{self.member.id}/set_coleader/', {'confirm': True, 'is_coleader': True}, format='json',
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sql = [query['sql'] for query in queries.captured_queries]
+        self.assertEqual(sum('FOR UPDATE' in statement for statement in sql), 1)
+        self.assertEqual(sum(statement.startswith('UPDATE "members"') for statement in sql), 2)
+        self.coleader.refresh_from_db()
+        self.member.refresh_from_db()
+        self.assertEqual((self.coleader.is_coleader, self.coleader.role_en), (False, 'Member'))
+        self.assertEqual((self.member.is_coleader, self.member.role_es), (True, 'Co-Líder'))
+
+        teams = self.client.get('/api/bootstrap/').json()['teams']
+        roles = {member['id']: member['is_coleader'] for member in teams[0]['members']}
+        self.assertEqual(roles, {self.member.id: True, self.coleader.id: False, self.leader.id: False})
+
+    def test_transfer_leadership_to_lower_id_coleader(self):
+        self.client.force_authenticate(self.leader.user)
+        self.client.post(f'/api/members/{self.member.id}/set_coleader/', {'confirm': True}, format='json')
+
+        response = self.client.post(f'/api/members/{self.member.id}/transfer_leadership/', {'confirm': True}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.leader.refresh_from_db()
+        self.member.refresh_from_db()
+        self.assertFalse(self.leader.is_team_leader)
+        self.assertEqual((self.member.is_team_leader, self.member.is_coleader), (True, False))
+
+    def test_stale_actor_role_is_rechecked_under_lock(self):
+        self.client.force_authenticate(self.coleader.user)
+        Member.objects.filter(pk=self.coleader.pk).update(is_coleader=False)
+
+        response = self.client.post(f'/api/members/{self.member.id}/kick/', {'confirm': True}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.member.refresh_from_db()
+        self.assertTrue(self.member.is_active)
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+)
+class WebhookDrainRetryTests(TestCase):
+    def _event(self, event_id, data_object):
+        return PaymentWebhookEvent.objects.create(
+            provider='stripe',
+            provider_event_id=event_id,
+            event_type='checkout.session.completed',
+            payload_hash='0' * 64,
+            raw_payload={'id': event_id, 'data': {'object': data_object}},
+        )
+
+    def _drain(self, **kwargs):
+        with self.assertLogs('api.webhook_processing', 'ERROR'):
+            return drain_webhook_events(**kwargs)
+
+    @override_settings(PAYMENT_WEBHOOK_MAX_ATTEMPTS=2, PAYMENT_WEBHOOK_RETRY_BASE_SECONDS=60)
+    def test_poison_event_does_not_block_later_events(self):
+        poison = self._event('evt_poison', 'not-an-object')
+        healthy = self._event('evt_healthy', {'id': 'cs_unknown', 'metadata': {}})
+
+        self.assertEqual(self._drain(batch_size=1), {'claimed': 1, 'processed': 0, 'failed': 1, 'parked': 0})
+        poison.refresh_from_db()
+        self.assertEqual(poison.attempts, 1)
+        self.assertIn('AttributeError', poison.last_error)
+        self.assertGreater(poison.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+        # The failed head of the queue is not due, so the next batch reaches the later event.
+        self.assertEqual(drain_webhook_events(batch_size=1), {'claimed': 1, 'processed': 1, 'failed': 0, 'parked': 0})
+        healthy.refresh_from_db()
+        self.assertIsNotNone(healthy.processed_at)
+        self.assertEqual(drain_webhook_events()['claimed'], 0)
+
+        PaymentWebhookEvent.objects.filter(pk=poison.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(self._drain()['parked'], 1)
+        poison.refresh_from_db()
+        self.assertEqual(poison.attempts, 2)
+        self.assertIsNotNone(poison.parked_at)
+        self.assertIsNone(poison.processed_at)
+
+        PaymentWebhookEvent.objects.filter(pk=poison.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(drain_webhook_events()['claimed'], 0)
+
+    def test_each_event_is_claimed_in_its_own_transaction(self):
+        for index in range(3):
+            self._event(f'evt_row_{index}', {'id': f'cs_row_{index}', 'metadata': {}})
+
+        with CaptureQueriesContext(connection) as queries:
+            result = drain_webhook_events()
+
+        self.assertEqual(result, {'claimed': 3, 'processed': 3, 'failed': 0, 'parked': 0})
+        claims = [query['sql'] for query in queries.captured_queries if 'SKIP LOCKED' in query['sql'] and 'LIMIT 1' in query['sql']]
+        # One single-row claim per event, plus the one that finds the queue empty.
+        self.assertEqual(len([sql for sql in claims if 'payment_webhook_events' in sql]), 4)
+
+    def test_late_events_do_not_move_settled_payments(self):
+        user = User.objects.create_user(username='late@example.com', password='test12345')
+        payment = Payment.objects.create(
+            user=user, amount=10, type=Payment.TYPE_DONATION, payu_transaction_id='tx-late', status=Payment.STATUS_SUCCEEDED,
+        )
+        checkout = PaymentCheckoutSession.objects.create(
+            user=user, provider='stripe', provider_session_id='cs_late', idempotency_key='late-1', item_type='donation',
+            item_id='general', amount_cents=1500, status=PaymentCheckoutSession.STATUS_FAILED,
+        )
+        PaymentWebhookEvent.objects.create(
+            provider='payu', provider_event_id='payu:late', event_type='payu.ipn', payload_hash='1' * 64,
+            raw_payload={'reference_sale': 'tx-late', 'state_pol': '6'},
+        )
+        self._event('evt_late', {'id': 'cs_late', 'metadata': {}})
+
+        self.assertEqual(drain_webhook_events(), {'claimed': 2, 'processed': 2, 'failed': 0, 'parked': 0})
+        payment.refresh_from_db()
+        checkout.refresh_from_db()
+        self.assertEqual(payment.status, Payment.STATUS_SUCCEEDED)
+        self.assertEqual(checkout.status, PaymentCheckoutSession.STATUS_FAILED)
+
+
+class WhitelistBulkImportTests(APITestCase):
+    def setUp(self):
+        team = Team.objects.create(name_en='Onboarding', name_es='Ingreso')
+        self.leader_user = User.objects.create_user(username='lead@import.com', password='test12345')
+        Member.objects.create(
+            user=self.leader_user, name='Lead', email='lead@import.com', career_en='Design', career_es='Diseno',
+            role_en='Team Leader', role_es='Líder de Equipo', team=team, is_team_leader=True,
+        )
+        self.coleader_user = User.objects.create_user(username='co@import.com', password='test12345')
+        Member.objects.create(
+            user=self.coleader_user, name='Co', email='co@import.com', career_en='Design', career_es='Diseno',
+            role_en='Co-Leader', role_es='Co-Líder', team=team, is_coleader=True,
+        )
+        InternalWhitelistEntry.objects.create(email='kept@import.com', internal_role='member')
+        InternalWhitelistEntry.objects.create(email='promoted@import.com', internal_role='member')
+
+    def _upload(self, content, name='cohort.csv', **data):
+        return self.client.post(
+            '/api/members/invite/bulk/',
+            {'file': SimpleUploadedFile(name, content.encode('utf-8')), 'confirm': 'true', **data},
+            format='multipart',
+        )
+
+    def test_csv_upload_upserts_in_constant_queries(self):
+        self.client.force_authenticate(self.leader_user)
+        rows = ''.join(f'new{index}@import.com,members\n' for index in range(200))
+        content = (
+            'Email,Role\n' + rows
+            + 'kept@import.com,member\n'
+            + 'PROMOTED@import.com,coleaders\n'
+            + 'not-an-email,members\n'
+            + 'new0@import.com,leaders\n'
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._upload(content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLess(len(queries.captured_queries), 15)
+        summary = response.json()['summary']
+        self.assertEqual(
+            {key: summary[key] for key in ('created', 'updated', 'unchanged', 'duplicate', 'invalid', 'total')},
+            {'created': 200, 'updated': 1, 'unchanged': 1, 'duplicate': 1, 'invalid': 1, 'total': 204},
+        )
+        rows = response.json()['rows']
+        self.assertEqual(rows[0]['status'], 'duplicate')
+        self.assertEqual(rows[202]['error'], 'Invalid email format.')
+
+        self.assertEqual(InternalWhitelistEntry.objects.get(email='promoted@import.com').internal_role, 'coleader')
+        new0 = InternalWhitelistEntry.objects.get(email='new0@import.com')
+        self.assertEqual((new0.internal_role, new0.invited_by_id), ('leader', self.leader_user.id))
+        self.assertEqual(InternalWhitelistEntry.objects.count(), 202)
+        event = SecurityAuditEvent.objects.get(event_type='whitelist.bulk_import')
+        self.assertEqual(event.details['created'], 200)
+
+    def test_coleader_rows_are_limited_to_members(self):
+        self.client.force_authenticate(self.coleader_user)
+        response = self.client.post(
+            '/api/members/invite/bulk/',
+            {'confirm': True, 'entries': ['a@import.com', {'email': 'b@import.com', 'role': 'leaders'}]},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['status'] for row in response.json()['rows']], ['created', 'forbidden'])
+        self.assertFalse(InternalWhitelistEntry.objects.filter(email='b@import.com').exists())
+
+    def test_dry_run_writes_nothing(self):
+        self.client.force_authenticate(self.leader_user)
+        response = self._upload('[{"email": "dry@import.com"}]', name='cohort.json', dry_run='true')
+
+        self.assertEqual(response.json()['summary']['created'], 1)
+        self.assertFalse(InternalWhitelistEntry.objects.filter(email='dry@import.com').exists())
+        self.assertFalse(SecurityAuditEvent.objects.exists())
+
+    def test_management_command_imports_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('email\ncmd1@import.com\ncmd2@import.com\n')
+        self.addCleanup(os.remove, handle.name)
+
+        out = StringIO()
+        call_command('import_whitelist', handle.name, '--role', 'coleaders', stdout=out)
+
+        self.assertIn('2 row(s): 2 created', out.getvalue())
+        self.assertEqual(
+            set(InternalWhitelistEntry.objects.filter(internal_role='coleader').values_list('email', flat=True)),
+            {'cmd1@import.com', 'cmd2@import.com'},
+        )
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+)
+class QueryPlanIndexTests(APITestCase):
+    """EXPLAIN each endpoint's main query (sequential scans disabled) and check the intended index is used."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.team = Team.objects.create(name_en='Plans', name_es='Planes')
+        cls.user = User.objects.create_user(username='plan@example.com', email='plan@example.com', password='test12345')
+        cls.member = Member.objects.create(
+            user=cls.user, name='Planner', email='plan@example.com', career_en='Design', career_es='Diseno',
+            role_en='Member', role_es='Miembro', team=cls.team,
+        )
+        RedSocial.objects.create(member=cls.member, platform='github', url='https://github.com/planner')
+        Publication.objects.create(
+            name_en='Plan', name_es='Plan', abstract_en='A.', abstract_es='B.', author=cls.member, team=cls.team,
+        )
+
+    def _plan(self, table, run, contains=''):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        sql = next(
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and f'FROM "{table}"' in query['sql'] and contains in query['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('EXPLAIN ' + sql)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def test_team_roster_uses_partial_team_index(self):
+        plan = self._plan('members', lambda: self.client.get(f'/api/teams/{self.team.id}/members/'))
+        self.assertIn('member_team_active_idx', plan)
+
+        plan = self._plan('members', lambda: self.client.get('/api/members/', {'team': self.team.id}))
+        self.assertIn('member_team_active_idx', plan)
+
+    def test_publication_lists_use_ordering_indexes(self):
+        plan = self._plan('publications', lambda: self.client.get('/api/bootstrap/', {'publications': 6}))
+        self.assertIn('publication_date_id_idx', plan)
+        self.assertNotIn('Sort', plan)
+
+        plan = self._plan('publications', lambda: self.client.get('/api/publications/', {'team': self.team.id}))
+        self.assertIn('publication_team_date_idx', plan)
+
+    def test_social_link_prefetch_uses_member_index(self):
+        plan = self._plan('red_social', lambda: self.client.get(f'/api/teams/{self.team.id}/members/'))
+        self.assertRegex(plan, r'Index (Only )?Scan (using|on) red_social_member')
+
+    def test_login_lookup_uses_normalized_email_index(self):
+        # Realistic statistics, as below: on a near-empty table the user_id key can look as cheap.
+        users = User.objects.bulk_create(User(username=f'profile{index}') for index in range(500))
+        UserProfile.objects.bulk_create(
+            UserProfile(user=user, email=f'{user.username}@example.com', normalized_email=f'{user.username}@example.com')
+            for user in users
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE profiles')
+        plan = self._plan('profiles', lambda: auth_views._find_auth_user(' PLAN@example.com'))
+        self.assertIn('profiles_normalized_email', plan)
+
+    def test_username_login_fallback_uses_functional_index(self):
+        # Give the planner realistic statistics; on a near-empty table walking the pkey looks cheapest.
+        User.objects.bulk_create(User(username=f'user{index}', email=f'user{index}@example.com') for index in range(2000))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE auth_user')
+        plan = self._plan('auth_user', lambda: auth_views._find_auth_user('ADMIN'))
+        self.assertIn('auth_user_username_upper_idx', plan)
+
+        plan = self._plan('auth_user', lambda: auth_views._find_auth_user('Nobody@Example.com'), contains='UPPER("auth_user"."email"')
+        self.assertIn('auth_user_email_upper_idx', plan)
+
+    def test_member_autocomplete_uses_lower_trigram_indexes(self):
+        plan = self._plan('members', lambda: self.client.get('/api/members/autocomplete/', {'q': 'plann'}))
+        self.assertIn('member_lname_trgm_idx', plan)
+        self.assertIn('member_lcareer_role_trgm_idx', plan)
+        self.assertNotIn('Seq Scan', plan)
+
+    def test_checkout_idempotency_lookup_uses_unique_index(self):
+        # idempotency_key is unique on its own, so its constraint index covers the (key, user) lookup.
+        # Seed sessions for the same user so the user_id index is the less selective one.
+        PaymentCheckoutSession.objects.bulk_create(
+            PaymentCheckoutSession(
+                user=self.user, idempotency_key=f'key-{index}', item_type='donation', item_id='general', amount_cents=1500,
+            )
+            for index in range(50)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE payment_checkout_sessions')
+        plan = self._plan(
+            'payment_checkout_sessions',
+            lambda: PaymentCheckoutSession.objects.filter(idempotency_key='key-1', user=self.user).first(),
+        )
+        self.assertIn('payment_checkout_sessions_idempotency_key', plan)
+        self.assertNotIn('user_id_', plan)
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+)
+class EmailIdentityTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='Mixed.Case@Example.com', email='Mixed.Case@Example.com', password='test12345')
+
+    def test_profile_stores_normalized_identity(self):
+        self.assertEqual(self.user.profile.normalized_email, 'mixed.case@example.com')
+
+        duplicate = User.objects.create_user(username='second', email=' MIXED.case@example.com ', password='test12345')
+        self.assertIsNone(duplicate.profile.normalized_email)
+
+    def test_identity_collision_is_settled_by_the_unique_index(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='test12345')
+        profile = other.profile
+        profile.email = 'Mixed.Case@example.com'
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                profile.save(update_fields=['email'])
+            # The violation was rolled back to a savepoint; the transaction goes on.
+            self.assertTrue(UserProfile.objects.filter(pk=profile.pk).exists())
+
+        self.assertFalse(any(query['sql'].startswith('SELECT') for query in queries.captured_queries))
+        profile.refresh_from_db()
+        self.assertEqual(profile.email, 'Mixed.Case@example.com')
+        self.assertIsNone(profile.normalized_email)
+        self.assertEqual(self.user.profile.normalized_email, 'mixed.case@example.com')
+
+        # Saves that do not write the identity skip the savepoint.
+        with CaptureQueriesContext(connection) as queries:
+            self.user.profile.save(update_fields=['name'])
+        self.assertEqual(len(queries.captured_queries), 1)
+
+    def test_login_resolves_identity_case_insensitively(self):
+        with CaptureQueriesContext(connection) as queries:
+            found = auth_views._find_auth_user('  MIXED.CASE@example.COM ')
+
+        self.assertEqual(found, self.user)
+        self.assertEqual(len(queries.captured_queries), 1)
+
+        response = self.client.post(
+            '/api/auth/login/', {'email': 'MIXED.CASE@EXAMPLE.COM', 'password': 'test12345'}, format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_login_falls_back_to_the_auth_email(self):
+        profile = self.user.profile
+        profile.email = 'renamed@example.com'
+        profile.save()
+
+        self.assertEqual(auth_views._find_auth_user(' MIXED.CASE@example.com'), self.user)
+        self.assertEqual(auth_views._find_auth_user('renamed@EXAMPLE.com'), self.user)
+        response = self.client.post(
+            '/api/auth/login/', {'email': 'mixed.case@example.com', 'password': 'test12345'}, format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_backfill_reports_skipped_collisions(self):
+        duplicate = User.objects.create_user(username='second', email='MIXED.case@example.com', password='test12345')
+        UserProfile.objects.update(normalized_email=None)
+        backfill = import_module('api.migrations.0028_profile_normalized_email').backfill_normalized_email
+
+        with mock.patch('builtins.print') as report:
+            backfill(django_apps, None)
+
+        self.assertEqual(UserProfile.objects.get(user=self.user).normalized_email, 'mixed.case@example.com')
+        self.assertIsNone(UserProfile.objects.get(user=duplicate).normalized_email)
+        output = '\n'.join(str(call.args[0]) for call in report.call_args_list)
+        self.assertIn('1 profile(s) share an email', output)
+        self.assertIn(str(duplicate.profile.id), output)
+
+    def test_email_checks_are_a_single_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(UserProfile.email_in_use('mixed.case@EXAMPLE.com'))
+            self.assertFalse(UserProfile.email_in_use('free@example.com'))
+        self.assertEqual(len(queries.captured_queries), 2)
+
+        response = self.client.get('/api/auth/check-email/', {'email': 'Mixed.Case@example.com'})
+        self.assertTrue(response.json()['is_taken'])
+
+
+@override_settings(
+    DEBUG=True,
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1'],
+)
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        team = Team.objects.create(name_en='Metrics', name_es='Metricas')
+        for index in range(3):
+            user = User.objects.create_user(username=f'metrics{index}@example.com', password='test12345')
+            member = Member.objects.create(
+                user=user, name=f'Metrics {index}', email=f'metrics{index}@example.com', career_en='Design',
+                career_es='Diseno', role_en='Member', role_es='Miembro', team=team,
+            )
+            RedSocial.objects.create(member=member, platform='github', url=f'https://github.com/metrics{index}')
+
+    def _timing(self, response):
+        return {
+            part.split(';')[0].strip(): part for part in response['Server-Timing'].split(',')
+        }
+
+    def test_server_timing_reports_queries_and_cache(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/members/')
+        timing = self._timing(response)
+        self.assertIn(f'desc="{len(queries.captured_queries)} queries"', timing['db'])
+        self.assertIn('app;dur=', timing['app'])
+
+        self.client.get('/api/bootstrap/')
+        cached = self._timing(self.client.get('/api/bootstrap/'))
+        self.assertIn('desc="0 queries"', cached['db'])
+        self.assertIn('misses=0', cached['cache'])
+
+    @override_settings(DEBUG=False)
+    def test_server_timing_is_staff_only_in_production(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/teams/'))
+
+        staff = User.objects.create_user(username='staff@example.com', password='test12345', is_staff=True)
+        self.client.force_authenticate(staff)
+        self.assertIn('Server-Timing', self.client.get('/api/teams/'))
+
+    @override_settings(REQUEST_METRICS_SLOW_MS=0)
+    def test_slow_requests_are_logged_with_structured_fields(self):
+        with self.assertLogs('api.requests', level='INFO') as logs:
+            self.client.get('/api/teams/')
+
+        record = logs.records[0]
+        self.assertEqual(record.request_metrics['path'], '/api/teams/')
+        self.assertEqual(record.request_metrics['status'], 200)
+        self.assertIn('queries=', record.getMessage())
+
+
+@override_settings(METRICS_TOKEN='scrape-secret', METRICS_MULTIPROC_DIR='')
+class PrometheusMetricsTests(APITestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def _scrape(self, **headers):
+        return self.client.get('/api/metrics/', **headers)
+
+    def test_endpoint_requires_token_or_staff(self):
+        self.assertEqual(self._scrape().status_code, 403)
+        self.assertEqual(self._scrape(HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self._scrape(HTTP_AUTHORIZATION='Bearer é').status_code, 403)
+        self.assertEqual(self._scrape(HTTP_AUTHORIZATION='Bearer scrape-secret').status_code, 200)
+
+        staff = User.objects.create_user(username='scraper@example.com', password='test12345', is_staff=True)
+        login = self.client.post('/api/token/', {'username': staff.username, 'password': 'test12345'}, format='json')
+        response = self._scrape(HTTP_AUTHORIZATION=f"Bearer {login.data['access']}")
+        self.assertEqual(response.status_code, 200)
+
+    def test_requests_are_counted_per_view_with_latency_histogram(self):
+        Team.objects.create(name_en='Scrape', name_es='Scrape')
+        self.client.get('/api/teams/')
+        self.client.get('/api/teams/')
+
+        body = self._scrape(HTTP_AUTHORIZATION='Bearer scrape-secret').content.decode()
+        self.assertIn('# TYPE api_http_request_duration_seconds histogram', body)
+        self.assertIn('api_http_requests_total{view="team-list",method="GET",status="200"} 2', body)
+        self.assertIn('api_http_request_duration_seconds_bucket{view="team-list",method="GET",le="+Inf"} 2', body)
+        self.assertIn('api_http_request_duration_seconds_count{view="team-list",method="GET"} 2', body)
+        self.assertRegex(body, r'api_db_queries_total\{view="team-list"\} [1-9]')
+
+    def test_payment_transitions_are_counted(self):
+        user = User.objects.create_user(username='payer@example.com', password='test12345')
+        session = PaymentCheckoutSession.objects.create(
+            user=user, provider='stripe', idempotency_key='metrics-1', item_type='membership',
+            item_id='gold-plan', amount_cents=2000, status=PaymentCheckoutSession.STATUS_PENDING,
+        )
+        session.transition(PaymentCheckoutSession.STATUS_SUCCEEDED)
+        self.assertNotIn('api_payment_transitions_total{', metrics.render_latest())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            session.save()
+        PaymentCheckoutSession.objects.create(
+            user=user, provider='stripe', idempotency_key='metrics-2', item_type='membership',
+            item_id='gold-plan', amount_cents=2000, expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            PaymentCheckoutSession.expire_stale()
+
+        body = metrics.render_latest()
+        self.assertIn('api_payment_transitions_total{from_status="pending",to_status="succeeded"} 1', body)
+        self.assertIn('api_payment_transitions_total{from_status="created",to_status="canceled"} 1', body)
+        self.assertNotIn('from_status="pending",to_status="canceled"', body)
+
+    def test_rolled_back_transitions_are_not_counted(self):
+        user = User.objects.create_user(username='payer@example.com', password='test12345')
+        session = PaymentCheckoutSession.objects.create(
+            user=user, provider='stripe', idempotency_key='metrics-3', item_type='membership',
+            item_id='gold-plan', amount_cents=2000, status=PaymentCheckoutSession.STATUS_PENDING,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    session.transition(PaymentCheckoutSession.STATUS_FAILED)
+                    session.save()
+                    raise RuntimeError('rolled back')
+
+        self.assertNotIn('api_payment_transitions_total{', metrics.render_latest())
+
+    def test_storage_calls_are_timed_by_method(self):
+        with mock.patch('api.storage.urlopen', side_effect=OSError('down')):
+            with self.assertRaises(OSError):
+                storage = SupabaseStorage('media', 'https://storage.invalid', 'service-key')
+                storage.delete('members/photo.jpg')
+
+        body = metrics.render_latest()
+        self.assertIn('api_storage_request_duration_seconds_count{method="DELETE"} 1', body)
+        self.assertIn('api_storage_errors_total{method="DELETE"} 1', body)
+
+    def test_multiprocess_dumps_are_merged(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        other = {'api_http_throttled_total': [[['login'], 4]]}
+        with open(os.path.join(directory, '99999999.json'), 'w', encoding='utf-8') as handle:
+            json.dump(other, handle)
+
+        with override_settings(METRICS_MULTIPROC_DIR=directory):
+            metrics.http_throttled.inc(view='login')
+            body = metrics.render_latest()
+            self.assertTrue(os.path.exists(os.path.join(directory, f'{os.getpid()}.json')))
+        self.assertIn('api_http_throttled_total{view="login"} 5', body)
+
+
+class SecurityLoggingQueueTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_security_logger_only_enqueues(self):
+        handlers = logging.getLogger('security').handlers
+        self.assertEqual(len(handlers), 1)
+        self.assertIsInstance(handlers[0], DroppingQueueHandler)
+
+    def _queued_logger(self, maxsize):
+        log_queue = queue.Queue(maxsize=maxsize)
+        handler = DroppingQueueHandler(log_queue)
+        security_logger = logging.getLogger('security')
+        original = security_logger.handlers
+        security_logger.handlers = [handler]
+        self.addCleanup(setattr, security_logger, 'handlers', original)
+        return log_queue, handler
+
+    @override_settings(DEBUG=True)
+    def test_records_are_formatted_lazily_as_json(self):
+        log_queue, _ = self._queued_logger(10)
+        errors = {'email': ['Invalid email format.']}
+        log_team_leader_event('registration_failed', 'a@example.com', 'N/A', '10.0.0.1', {'validation_errors': errors})
+
+        record = log_queue.get_nowait()
+        self.assertFalse(hasattr(record, 'message'))
+        self.assertIs(record.security_event['details']['validation_errors'], errors)
+
+        payload = json.loads(JsonFormatter().format(record))
+        self.assertEqual(payload['level'], 'INFO')
+        self.assertEqual(payload['event'], 'team_leader.registration_failed')
+        self.assertEqual(payload['details'], {'validation_errors': errors})
+        self.assertIn('TEAM_LEADER_REGISTRATION_FAILED: Email=a@example.com', payload['message'])
+
+    @override_settings(DEBUG=False)
+    def test_production_setup_leaves_shared_handlers_alone(self):
+        security_logger = logging.getLogger('security')
+        shared = logging.StreamHandler(StringIO())
+        formatter = logging.Formatter('[SECURITY] %(message)s')
+        shared.setFormatter(formatter)
+        security_logger.handlers = [shared]
+        self.addCleanup(setup_security_logging)
+        self.addCleanup(setattr, security_logger, 'handlers', [])
+
+        setup_security_logging()
+
+        self.assertIs(shared.formatter, formatter)
+        self.assertEqual(len(security_logger.handlers), 1)
+        self.assertIsInstance(security_logger.handlers[0], DroppingQueueHandler)
+
+    @override_settings(DEBUG=False)
+    def test_production_messages_keep_the_team_leader_prefix(self):
+        log_queue, _ = self._queued_logger(10)
+        log_team_leader_event('login', 'c@example.com', 'Team', '10.0.0.3')
+
+        message = log_queue.get_nowait().getMessage()
+        self.assertEqual(message, '[TEAM_LEADER]_LOGIN: Email=c@example.com | Team=Team | IP=10.0.0.3')
+
+    def test_full_queue_drops_and_counts(self):
+        log_queue, handler = self._queued_logger(1)
+        for _ in range(3):
+            log_team_leader_event('denied', 'b@example.com', 'Team', '10.0.0.2')
+
+        self.assertEqual(log_queue.qsize(), 1)
+        self.assertEqual(handler.dropped, 2)
+        self.assertIn('api_log_records_dropped_total{logger="security"} 2', metrics.render_latest())
+
+
+class RequestProfilingTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.profiling_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profiling_root)
+        storage_settings = {
+            **settings.STORAGES,
+            'profiles': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': self.profiling_root},
+            },
+        }
+        overrides = override_settings(
+            MEDIA_ROOT=self.media_root,
+            STORAGES=storage_settings,
+            PROFILING_MAX_PER_HOUR=2,
+            PROFILING_MIN_INTERVAL_SECONDS=60,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        Team.objects.create(name_en='Profiled', name_es='Perfilado')
+        self.staff = User.objects.create_user(username='profiler@example.com', password='test12345', is_staff=True)
+
+    def _token(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.post('/api/profiling/token/')
+        self.client.force_authenticate(None)
+        return response
+
+    def test_token_is_staff_only(self):
+        member = User.objects.create_user(username='member@example.com', password='test12345')
+        self.assertEqual(self._token(member).status_code, 403)
+        self.assertEqual(self._token(self.staff).status_code, 200)
+
+    def test_signed_token_captures_profile_and_sql(self):
+        token = self._token(self.staff).data['token']
+        response = self.client.get('/api/teams/', HTTP_X_PROFILE_TOKEN=token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Profile-Status'], 'captured')
+        profile_id = response['X-Profile-Id']
+
+        self.client.force_authenticate(self.staff)
+        document = json.loads(self.client.get(f'/api/profiling/{profile_id}/').content)
+        self.assertEqual(document['path'], '/api/teams/')
+        self.assertTrue(any('"teams"' in query['sql'] for query in document['queries']))
+        self.assertEqual(document['query_count'], len(document['queries']))
+        folded = self.client.get(f'/api/profiling/{profile_id}/', {'kind': 'folded'})
+        self.assertEqual(folded['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertEqual(self.client.get('/api/profiling/../secrets/').status_code, 404)
+
+        event = SecurityAuditEvent.objects.get(event_type='profiling.capture')
+        self.assertEqual(event.details['profile_id'], profile_id)
+
+    def test_captures_stay_out_of_public_media(self):
+        token = self._token(self.staff).data['token']
+        profile_id = self.client.get('/api/teams/', HTTP_X_PROFILE_TOKEN=token)['X-Profile-Id']
+
+        self.assertEqual(os.listdir(self.media_root), [])
+        self.assertTrue(os.path.exists(os.path.join(self.profiling_root, 'profiles', f'{profile_id}.json')))
+        self.assertNotIn('x-profile-id', [header.lower() for header in settings.CORS_EXPOSE_HEADERS])
+        # Only staff can read a capture, even with its id.
+        self.assertEqual(self.client.get(f'/api/profiling/{profile_id}/').status_code, 401)
+
+    def test_private_supabase_storage_reads_with_the_service_key(self):
+        storage = SupabaseStorage('profiling', 'https://storage.invalid', 'service-key', public=False)
+        with self.assertRaises(NotImplementedError):
+            storage.url('profiles/abc.json')
+
+        with mock.patch.object(storage, '_request', return_value=BytesIO(b'{}')) as request:
+            with storage.open('profiles/abc.json') as handle:
+                self.assertEqual(handle.read(), b'{}')
+        self.assertEqual(request.call_args.args[1], 'https://storage.invalid/storage/v1/object/profiling/profiles/abc.json')
+        self.assertEqual(request.call_args.kwargs['headers']['Authorization'], 'Bearer service-key')
+
+    def test_invalid_token_and_rate_limits_skip_profiling(self):
+        response = self.client.get('/api/teams/', {'__profile': 'forged'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Profile-Status'], 'invalid-token')
+
+        token = self._token(self.staff).data['token']
+        self.assertEqual(self.client.get('/api/teams/', HTTP_X_PROFILE_TOKEN=token)['X-Profile-Status'], 'captured')
+        second = self.client.get('/api/teams/', HTTP_X_PROFILE_TOKEN=token)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second['X-Profile-Status'], 'rate-limited')
+        self.assertNotIn('X-Profile-Id', second)
+        self.assertEqual(SecurityAuditEvent.objects.filter(event_type='profiling.capture').count(), 1)
+
+    def test_sampler_collects_folded_stacks(self):
+        def busy_request_handler():
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+
+        sampler = StackSampler(threading.get_ident(), 0.001, 5)
+        sampler.start()
+        busy_request_handler()
+        sampler.stop()
+
+        self.assertGreater(sampler.samples, 0)
+        stack, _, count = sampler.folded().splitlines()[0].rpartition(' ')
+        self.assertIn('busy_request_handler (api/test_regressions.py:', stack)
+        self.assertGreater(int(count), 0)
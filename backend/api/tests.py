@@ -1,16 +1,25 @@
+from io import StringIO
 from unittest.mock import patch
 import hashlib
 import hmac
 import json
+import os
+import tempfile
 import time
+from datetime import timedelta
 
 from django.contrib.auth.models import User
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from django.core.management import call_command
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from .models import Team, Member, PaymentCheckoutSession, PaymentWebhookEvent
+from .models import Team, Member, Payment, PaymentCheckoutSession, PaymentWebhookEvent
+from .payment_reconciliation import ProviderExport, reconcile_checkout_sessions, reconcile_payments
 
 
 class TeamManagementPermissionsTests(APITestCase):
@@ -245,3 +254,211 @@ class PaymentSecurityTests(APITestCase):
 		)
 		self.assertEqual(second.status_code, status.HTTP_200_OK)
 		self.assertEqual(PaymentWebhookEvent.objects.filter(provider_event_id='evt_valid_1').count(), 1)
+
+	def test_duplicate_webhook_is_rejected_with_single_insert(self):
+		payload = {
+			'id': 'evt_dup_1',
+			'type': 'checkout.session.completed',
+			'data': {'object': {'id': 'cs_unknown', 'metadata': {}}},
+		}
+		body = json.dumps(payload).encode('utf-8')
+		signature = self._signature_header(body)
+		self.client.post(
+			'/api/payments/webhooks/stripe/',
+			data=body,
+			content_type='application/json',
+			HTTP_STRIPE_SIGNATURE=signature,
+		)
+
+		with CaptureQueriesContext(connection) as captured:
+			duplicate = self.client.post(
+				'/api/payments/webhooks/stripe/',
+				data=body,
+				content_type='application/json',
+				HTTP_STRIPE_SIGNATURE=signature,
+			)
+		statements = [query['sql'] for query in captured.captured_queries if 'SAVEPOINT' not in query['sql']]
+		self.assertEqual(len(statements), 1, statements)
+		self.assertEqual(duplicate.json(), {'status': 'duplicate_ignored'})
+		self.assertIsNotNone(PaymentWebhookEvent.objects.get(provider_event_id='evt_dup_1').processed_at)
+
+	def test_webhook_killed_mid_processing_is_processed_on_retry(self):
+		session = PaymentCheckoutSession.objects.create(
+			member=self.member,
+			user=self.user,
+			provider='stripe',
+			idempotency_key='idem-crash-1',
+			item_type='membership',
+			item_id='gold-plan',
+			amount_cents=2000,
+			currency='usd',
+			status=PaymentCheckoutSession.STATUS_PENDING,
+		)
+		payload = {
+			'id': 'evt_crash_1',
+			'type': 'checkout.session.completed',
+			'data': {'object': {'id': 'cs_crash_1', 'metadata': {'reference': str(session.reference)}}},
+		}
+		body = json.dumps(payload).encode('utf-8')
+		signature = self._signature_header(body)
+
+		# A worker timeout is not an Exception, so no handler in the view runs.
+		class WorkerKilled(BaseException):
+			pass
+
+		with patch('api.payment_views.apply_stripe_event', side_effect=WorkerKilled):
+			with self.assertRaises(WorkerKilled):
+				self.client.post(
+					'/api/payments/webhooks/stripe/',
+					data=body,
+					content_type='application/json',
+					HTTP_STRIPE_SIGNATURE=signature,
+				)
+		self.assertFalse(PaymentWebhookEvent.objects.filter(provider_event_id='evt_crash_1').exists())
+
+		retry = self.client.post(
+			'/api/payments/webhooks/stripe/',
+			data=body,
+			content_type='application/json',
+			HTTP_STRIPE_SIGNATURE=signature,
+		)
+		self.assertEqual(retry.json(), {'status': 'ok'})
+		session.refresh_from_db()
+		self.assertEqual(session.status, PaymentCheckoutSession.STATUS_SUCCEEDED)
+		self.assertIsNotNone(PaymentWebhookEvent.objects.get(provider_event_id='evt_crash_1').processed_at)
+
+	@override_settings(PAYMENT_WEBHOOK_ASYNC=True)
+	def test_async_webhook_is_acknowledged_then_drained(self):
+		session = PaymentCheckoutSession.objects.create(
+			member=self.member,
+			user=self.user,
+			provider='stripe',
+			idempotency_key='idem-async-1',
+			item_type='membership',
+			item_id='gold-plan',
+			amount_cents=2000,
+			currency='usd',
+			status=PaymentCheckoutSession.STATUS_PENDING,
+		)
+		payload = {
+			'id': 'evt_async_1',
+			'type': 'checkout.session.completed',
+			'data': {'object': {'id': 'cs_async_1', 'metadata': {'reference': str(session.reference)}}},
+		}
+		body = json.dumps(payload).encode('utf-8')
+
+		response = self.client.post(
+			'/api/payments/webhooks/stripe/',
+			data=body,
+			content_type='application/json',
+			HTTP_STRIPE_SIGNATURE=self._signature_header(body),
+		)
+		self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+		session.refresh_from_db()
+		self.assertEqual(session.status, PaymentCheckoutSession.STATUS_PENDING)
+
+		call_command('process_webhook_events', stdout=StringIO())
+
+		session.refresh_from_db()
+		self.assertEqual(session.status, PaymentCheckoutSession.STATUS_SUCCEEDED)
+		self.assertIsNotNone(PaymentWebhookEvent.objects.get(provider_event_id='evt_async_1').processed_at)
+
+
+class PaymentReconciliationTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='reconcile', password='test12345')
+
+	def _session(self, key, status, provider_session_id=None):
+		return PaymentCheckoutSession.objects.create(
+			user=self.user,
+			provider='stripe',
+			provider_session_id=provider_session_id,
+			idempotency_key=key,
+			item_type='donation',
+			item_id='general',
+			amount_cents=1500,
+			status=status,
+		)
+
+	def test_reconcile_applies_export_in_chunks(self):
+		paid = self._session('rec-1', PaymentCheckoutSession.STATUS_PENDING, provider_session_id='cs_paid')
+		expired = self._session('rec-2', PaymentCheckoutSession.STATUS_CREATED)
+		untouched = self._session('rec-3', PaymentCheckoutSession.STATUS_PENDING)
+		pending_payment = Payment.objects.create(user=self.user, amount=10, type=Payment.TYPE_DONATION, payu_transaction_id='tx-1')
+		legacy_payment = Payment.objects.create(user=self.user, amount=20, type=Payment.TYPE_DONATION)
+
+		with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as export:
+			for row in (
+				{'provider_session_id': 'cs_paid', 'status': 'complete'},
+				{'reference': str(expired.reference), 'status': 'expired'},
+				{'reference': 'tx-1', 'status': '4'},
+				{'payment_id': legacy_payment.id, 'transaction_id': 'tx-legacy', 'status': 'declined'},
+			):
+				export.write(json.dumps(row) + '\n')
+		self.addCleanup(os.remove, export.name)
+
+		call_command('reconcile_payments', export.name, '--chunk-size', '1', stdout=StringIO())
+
+		for obj in (paid, expired, untouched, pending_payment, legacy_payment):
+			obj.refresh_from_db()
+		self.assertEqual(paid.status, PaymentCheckoutSession.STATUS_SUCCEEDED)
+		self.assertEqual(expired.status, PaymentCheckoutSession.STATUS_CANCELED)
+		self.assertEqual(untouched.status, PaymentCheckoutSession.STATUS_PENDING)
+		self.assertEqual(pending_payment.status, Payment.STATUS_SUCCEEDED)
+		self.assertEqual(legacy_payment.status, Payment.STATUS_FAILED)
+		self.assertEqual(legacy_payment.payu_transaction_id, 'tx-legacy')
+
+	def test_created_status_never_reaches_payments(self):
+		payment = Payment.objects.create(user=self.user, amount=10, type=Payment.TYPE_DONATION, payu_transaction_id='tx-created')
+		export = ProviderExport([{'reference': 'tx-created', 'status': 'created'}])
+
+		stats = reconcile_payments(export)
+
+		payment.refresh_from_db()
+		self.assertEqual(payment.status, Payment.STATUS_PENDING)
+		self.assertEqual(stats.updated, 0)
+
+	def test_reconcile_skips_rows_changed_after_the_read(self):
+		session = self._session('rec-race', PaymentCheckoutSession.STATUS_PENDING, provider_session_id='cs_race')
+		payment = Payment.objects.create(user=self.user, amount=10, type=Payment.TYPE_DONATION, payu_transaction_id='tx-race')
+		export = ProviderExport([
+			{'provider_session_id': 'cs_race', 'status': 'expired'},
+			{'reference': 'tx-race', 'status': 'declined'},
+		])
+
+		# A webhook settles both rows between the chunk read and the write.
+		def settle_session(row):
+			PaymentCheckoutSession.objects.filter(pk=row.pk).update(status=PaymentCheckoutSession.STATUS_SUCCEEDED)
+			return ProviderExport.match_session(export, row)
+
+		def settle_payment(row):
+			Payment.objects.filter(pk=row.pk).update(status=Payment.STATUS_SUCCEEDED)
+			return ProviderExport.match_payment(export, row)
+
+		with patch.object(export, 'match_session', side_effect=settle_session):
+			session_stats = reconcile_checkout_sessions(export)
+		with patch.object(export, 'match_payment', side_effect=settle_payment):
+			payment_stats = reconcile_payments(export)
+
+		session.refresh_from_db()
+		payment.refresh_from_db()
+		self.assertEqual(session.status, PaymentCheckoutSession.STATUS_SUCCEEDED)
+		self.assertEqual(payment.status, Payment.STATUS_SUCCEEDED)
+		self.assertEqual((session_stats.updated, session_stats.skipped), (0, 1))
+		self.assertEqual((payment_stats.updated, payment_stats.skipped), (0, 1))
+
+	def test_expire_command_cancels_only_stale_open_sessions(self):
+		now = timezone.now()
+		stale = [self._session(f'exp-{i}', PaymentCheckoutSession.STATUS_CREATED) for i in range(3)]
+		fresh = self._session('exp-fresh', PaymentCheckoutSession.STATUS_PENDING)
+		done = self._session('exp-done', PaymentCheckoutSession.STATUS_SUCCEEDED)
+		PaymentCheckoutSession.objects.filter(pk__in=[s.pk for s in stale] + [done.pk]).update(expires_at=now - timedelta(minutes=5))
+		PaymentCheckoutSession.objects.filter(pk=fresh.pk).update(expires_at=now + timedelta(hours=1))
+
+		call_command('expire_checkout_sessions', '--batch-size', '2', stdout=StringIO())
+
+		statuses = dict(PaymentCheckoutSession.objects.values_list('idempotency_key', 'status'))
+		for session in stale:
+			self.assertEqual(statuses[session.idempotency_key], PaymentCheckoutSession.STATUS_CANCELED)
+		self.assertEqual(statuses['exp-fresh'], PaymentCheckoutSession.STATUS_PENDING)
+		self.assertEqual(statuses['exp-done'], PaymentCheckoutSession.STATUS_SUCCEEDED)
@@ -2,7 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     TeamViewSet, MemberViewSet,
-    PublicationViewSet, RedSocialViewSet
+    PublicationViewSet, RedSocialViewSet,
+    bootstrap_view,
 )
 from .auth_views import (
     register_view,
@@ -22,6 +23,9 @@ from .payment_views import (
     create_payment_view,
     payu_webhook_view,
 )
+from .feed_views import sitemap_view, publication_feed_view
+from .metrics_views import metrics_view
+from .profiling_views import profile_download_view, profiling_token_view
 
 # Create a router and register viewsets
 router = DefaultRouter()
@@ -49,6 +53,20 @@ urlpatterns = [
     path('payments/webhooks/stripe/', stripe_webhook_view, name='stripe_webhook'),
     path('payments/webhooks/payu/', payu_webhook_view, name='payu_webhook'),
 
+    # Aggregated landing page data
+    path('bootstrap/', bootstrap_view, name='bootstrap'),
+
+    # Sitemap and Atom feeds
+    path('sitemap.xml', sitemap_view, name='sitemap'),
+    path('feeds/publications.<str:language>.atom', publication_feed_view, name='publication_feed'),
+
+    # Prometheus scrape target
+    path('metrics/', metrics_view, name='metrics'),
+
+    # Staff request profiler
+    path('profiling/token/', profiling_token_view, name='profiling_token'),
+    path('profiling/<str:profile_id>/', profile_download_view, name='profile_download'),
+
     # ViewSet routes
     path('', include(router.urls)),
 ]
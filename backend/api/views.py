@@ -1,15 +1,24 @@
+import html
 import json
+import re
 
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
-from django.db.models import Prefetch
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.db.models import Prefetch, F, Q
+from django.db.models.functions import Greatest, Lower
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, TrigramWordSimilarity
 from django.db import transaction
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
+from django.contrib.auth.models import User
 from .models import Team, Member, Publication, RedSocial, InternalWhitelistEntry, UserProfile
 from .member_catalog import get_career_pair, resolve_role_pair
 from .email_whitelist import (
@@ -17,6 +26,7 @@ from .email_whitelist import (
     SECTION_LEADERS,
     SECTION_COLEADERS,
     SECTION_MEMBERS,
+    VALID_SECTIONS,
 )
 from .serializers import (
     TeamSerializer, MemberSerializer,
@@ -31,6 +41,10 @@ from .permissions import (
     ReadOnly
 )
 from .throttles import BurstRateThrottle
+from .security_logging import get_client_ip
+from .whitelist_import import WhitelistImportError, import_whitelist_rows, parse_whitelist_rows
+from .bootstrap import DEFAULT_PUBLICATION_LIMIT, MAX_PUBLICATION_LIMIT, get_bootstrap_document, invalidate_bootstrap_cache
+from .snapshots import publish_on_commit as publish_snapshot_on_commit
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -40,7 +54,136 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class TeamViewSet(viewsets.ModelViewSet):
+def _truthy(value):
+    """Read a boolean from JSON or form data ('true'/'1'/'yes')."""
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes')
+    return bool(value)
+
+
+# ts_headline copies the source text verbatim, markup included, so highlights
+# are delimited with control characters and the fragment is HTML-escaped
+# before the <mark> tags are put back.
+HIGHLIGHT_START_SEL = '\x02'
+HIGHLIGHT_STOP_SEL = '\x03'
+
+
+def render_highlight(fragment):
+    """Escape a ts_headline fragment and turn its selectors into <mark> tags."""
+    if fragment is None:
+        return None
+    return (
+        html.escape(fragment)
+        .replace(HIGHLIGHT_START_SEL, '<mark>')
+        .replace(HIGHLIGHT_STOP_SEL, '</mark>')
+    )
+
+
+def parse_fields_param(request, model):
+    """Return the set of to_dict() keys requested with ?fields=, or None for all of them."""
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    fields = {field.strip() for field in raw.split(',') if field.strip()}
+    unknown = sorted(fields - model.DICT_FIELD_COLUMNS.keys())
+    if unknown:
+        raise ParseError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(model.DICT_FIELD_COLUMNS)}.")
+    return fields
+
+
+def project_queryset(queryset, fields, language='en'):
+    """Load only the columns and relations needed to render `fields` with to_dict()."""
+    if fields is None:
+        return queryset
+    model = queryset.model
+    lang = 'en' if language == 'en' else 'es'
+    columns = {'id'}
+    for field in fields:
+        columns.update(column.format(lang=lang) for column in model.DICT_FIELD_COLUMNS[field])
+    related = sorted({column.split('__')[0] for column in columns if '__' in column})
+    prefetch = [lookup for field, lookup in getattr(model, 'DICT_FIELD_PREFETCH', {}).items() if field in fields]
+
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset.only(*columns)
+
+
+class SparseFieldsMixin:
+    """?fields=a,b on list/retrieve restricts both the SQL projection and the to_dict() output."""
+    sparse_actions = ('list', 'retrieve', 'batch')
+
+    def get_sparse_fields(self):
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = parse_fields_param(self.request, self.queryset.model)
+        return self._sparse_fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in self.sparse_actions:
+            return queryset
+        return project_queryset(queryset, self.get_sparse_fields(), self.request.query_params.get('lang', 'en'))
+
+
+BATCH_ID_RE = re.compile(r'[0-9]{1,18}')
+
+
+class MultiGetMixin:
+    """
+    GET <resource>/batch/?ids=3,1,2 - several objects in one query.
+
+    Results keep the requested order (duplicates dropped) and requested keys
+    that do not exist are listed under "missing".
+    """
+    max_batch_size = 100
+    batch_lookups = {'ids': 'id'}
+
+    def batch_item(self, obj, language, fields):
+        return obj.to_dict(language, fields=fields)
+
+    def _batch_values(self, request):
+        params = [param for param in self.batch_lookups if request.query_params.get(param)]
+        if len(params) != 1:
+            raise ParseError(f"Provide exactly one of: {', '.join(self.batch_lookups)}.")
+        param = params[0]
+
+        values = []
+        for raw in request.query_params[param].split(','):
+            raw = raw.strip()
+            if not raw:
+                continue
+            if self.batch_lookups[param] == 'id':
+                # ASCII digits only (str.isdigit accepts '²'), and short enough for a bigint.
+                if not BATCH_ID_RE.fullmatch(raw):
+                    raise ParseError(f'Invalid id: {raw}.')
+                raw = int(raw)
+            if raw not in values:
+                values.append(raw)
+
+        if not values:
+            raise ParseError(f'{param} must not be empty.')
+        if len(values) > self.max_batch_size:
+            raise ParseError(f'At most {self.max_batch_size} {param} per request.')
+        return self.batch_lookups[param], values
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        lookup, values = self._batch_values(request)
+        language = request.query_params.get('lang', 'en')
+        fields = self.get_sparse_fields()
+
+        # Annotated so the key is loaded even when ?fields= defers the lookup column.
+        queryset = self.get_queryset().filter(**{f'{lookup}__in': values}).annotate(batch_key=F(lookup))
+        found = {obj.batch_key: obj for obj in queryset}
+        return Response({
+            'results': [self.batch_item(found[value], language, fields) for value in values if value in found],
+            'missing': [value for value in values if value not in found],
+        })
+
+
+class TeamViewSet(SparseFieldsMixin, MultiGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Team model
     GET /api/teams/ - List all teams (public)
@@ -49,6 +192,8 @@ class TeamViewSet(viewsets.ModelViewSet):
     PUT /api/teams/{id}/ - Update team (team leader only)
     DELETE /api/teams/{id}/ - Delete team (team leader only)
     GET /api/teams/{id}/members/ - Get all members of a team (public)
+    GET /api/teams/batch/?ids=1,2 - Get several teams in one request (public)
+    ?fields=a,b on list/retrieve returns (and loads) only those keys
     """
     queryset = Team.objects.all().only('id', 'name_en', 'name_es', 'image')
     serializer_class = TeamSerializer
@@ -58,35 +203,44 @@ class TeamViewSet(viewsets.ModelViewSet):
         """
         Public read access, team leaders only for write operations
         """
-        if self.action in ['list', 'retrieve', 'members']:
+        if self.action in ['list', 'retrieve', 'members', 'batch']:
             permission_classes = [AllowAny]
         else:
             permission_classes = [IsAuthenticated, IsTeamLeader]
         return [permission() for permission in permission_classes]
 
+    def batch_item(self, obj, language, fields):
+        return obj.to_dict(fields=fields)
+
     def list(self, request):
         """List all teams"""
         teams = self.get_queryset()
-        data = [team.to_dict() for team in teams]
+        fields = self.get_sparse_fields()
+        data = [team.to_dict(fields=fields) for team in teams]
         return Response(data)
 
     def retrieve(self, request, pk=None):
         """Get a specific team"""
         team = self.get_object()
-        return Response(team.to_dict())
+        return Response(team.to_dict(fields=self.get_sparse_fields()))
 
     @action(detail=True, methods=['get'])
     def members(self, request, pk=None):
         """Get all members of a specific team"""
         team = self.get_object()
-        # Optimize with prefetch_related for social links
-        members = team.members.prefetch_related('social_links').filter(user__isnull=False, is_active=True)
         language = request.query_params.get('lang', 'en')
-        data = [member.to_dict(language) for member in members]
+        fields = parse_fields_param(request, Member)
+        # Optimize with prefetch_related for social links
+        members = project_queryset(
+            team.members.prefetch_related('social_links').filter(user__isnull=False, is_active=True),
+            fields,
+            language,
+        )
+        data = [member.to_dict(language, fields=fields) for member in members]
         return Response(data)
 
 
-class MemberViewSet(viewsets.ModelViewSet):
+class MemberViewSet(SparseFieldsMixin, MultiGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Member model
     GET /api/members/ - List all members (public)
@@ -95,6 +249,9 @@ class MemberViewSet(viewsets.ModelViewSet):
     PUT /api/members/{id}/ - Update member (owner or team leader)
     DELETE /api/members/{id}/ - Delete member (team leader of same team)
     GET /api/members/{id}/social-links/ - Get member's social media links (public)
+    GET /api/members/autocomplete/?q= - Typo-tolerant directory lookup (public)
+    GET /api/members/batch/?ids=1,2 - Get several members in one request (public)
+    ?fields=a,b on list/retrieve returns (and loads) only those keys
     """
     queryset = Member.objects.select_related('team').prefetch_related('social_links').filter(user__isnull=False)
     serializer_class = MemberSerializer
@@ -107,7 +264,7 @@ class MemberViewSet(viewsets.ModelViewSet):
         Delete: Team leader of same team only
         Create: Disabled (use /api/auth/register/)
         """
-        if self.action in ['list', 'retrieve', 'social_links']:
+        if self.action in ['list', 'retrieve', 'social_links', 'autocomplete', 'batch']:
             permission_classes = [AllowAny]
         elif self.action == 'update' or self.action == 'partial_update':
             permission_classes = [IsAuthenticated, IsOwnerOrTeamLeader]
@@ -139,7 +296,8 @@ class MemberViewSet(viewsets.ModelViewSet):
         if not include_inactive:
             queryset = queryset.filter(is_active=True)
 
-        data = [member.to_dict(language) for member in queryset]
+        fields = self.get_sparse_fields()
+        data = [member.to_dict(language, fields=fields) for member in queryset]
         return Response(data)
 
     def create(self, request, *args, **kwargs):
@@ -152,7 +310,7 @@ class MemberViewSet(viewsets.ModelViewSet):
         """Get a specific member with language support"""
         language = request.query_params.get('lang', 'en')
         member = self.get_object()
-        return Response(member.to_dict(language))
+        return Response(member.to_dict(language, fields=self.get_sparse_fields()))
 
     def partial_update(self, request, *args, **kwargs):
         """Update member profile fields and optionally replace social links list."""
@@ -183,11 +341,8 @@ class MemberViewSet(viewsets.ModelViewSet):
 
         update_data.pop('language', None)
 
-        serializer = self.get_serializer(member, data=update_data, partial=True)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-
         social_links_payload = request.data.get('social_links')
+        submitted_links = None
         if social_links_payload is not None:
             if isinstance(social_links_payload, str):
                 try:
@@ -204,33 +359,62 @@ class MemberViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            existing = {link.platform: link for link in member.social_links.all()}
-            submitted_platforms = set()
-
+            # platform -> url; a repeated platform keeps its last url
+            submitted_links = {}
             for item in social_links_payload:
                 platform = (item.get('platform') or '').strip().lower()
                 url = (item.get('url') or '').strip()
-                if not platform or not url:
-                    continue
-
-                submitted_platforms.add(platform)
+                if platform and url:
+                    submitted_links[platform] = url
 
-                if platform in existing:
-                    link = existing[platform]
-                    if link.url != url:
-                        link.url = url
-                        link.save(update_fields=['url'])
-                else:
-                    RedSocial.objects.create(member=member, platform=platform, url=url)
+        serializer = self.get_serializer(member, data=update_data, partial=True)
+        serializer.is_valid(raise_exception=True)
 
-            for platform, link in existing.items():
-                if platform not in submitted_platforms:
-                    link.delete()
+        with transaction.atomic():
+            serializer.save()
+            if submitted_links is not None:
+                social_links = self._apply_social_links(member, submitted_links)
+                member._prefetched_objects_cache = {
+                    **getattr(member, '_prefetched_objects_cache', {}),
+                    'social_links': social_links,
+                }
 
         language = request.query_params.get('lang', language)
-        member.refresh_from_db()
         return Response(member.to_dict(language, include_email=True), status=status.HTTP_200_OK)
 
+    @staticmethod
+    def _apply_social_links(member, submitted_links):
+        """
+        Replace the member's social links with submitted_links (platform -> url)
+        using one filtered delete, one bulk_update and one bulk_create.
+
+        Returns the resulting links ordered by id, without re-querying them.
+        """
+        existing = {link.platform: link for link in member.social_links.all()}
+
+        removed = [platform for platform in existing if platform not in submitted_links]
+        changed = []
+        for platform, url in submitted_links.items():
+            link = existing.get(platform)
+            if link is not None and link.url != url:
+                link.url = url
+                changed.append(link)
+        created = [
+            RedSocial(member=member, platform=platform, url=url)
+            for platform, url in submitted_links.items()
+            if platform not in existing
+        ]
+
+        if removed:
+            RedSocial.objects.filter(member=member, platform__in=removed).delete()
+        if changed:
+            RedSocial.objects.bulk_update(changed, ['url'])
+        if created:
+            RedSocial.objects.bulk_create(created)
+
+        kept = [link for platform, link in existing.items() if platform in submitted_links]
+        return sorted(kept + created, key=lambda link: link.id)
+
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated], throttle_classes=[BurstRateThrottle])
     def invite(self, request):
         import logging
@@ -292,6 +476,103 @@ class MemberViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='invite/bulk',
+        permission_classes=[IsAuthenticated],
+        throttle_classes=[BurstRateThrottle],
+    )
+    def invite_bulk(self, request):
+        """
+        Whitelist many emails at once from a CSV/JSON `file` upload or an
+        `entries` list. `role` sets the section for rows without one and
+        `dry_run` only validates. Returns a summary and per-row outcomes.
+        """
+        actor = getattr(request.user, 'member_profile', None)
+        if not actor or not actor.is_active:
+            return Response({'error': 'Member profile not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        if not actor.is_team_leader and not actor.is_coleader:
+            return Response({'error': 'Only leaders and co-leaders can invite members.'}, status=status.HTTP_403_FORBIDDEN)
+
+        if not _truthy(request.data.get('confirm', False)):
+            return Response({'error': 'Action confirmation is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                file_format = upload.name.rsplit('.', 1)[-1] if '.' in upload.name else None
+                rows = parse_whitelist_rows(upload.read(), file_format if file_format in ('csv', 'json') else None)
+            else:
+                entries = request.data.get('entries')
+                if isinstance(entries, str):
+                    rows = parse_whitelist_rows(entries)
+                elif isinstance(entries, list):
+                    rows = parse_whitelist_rows(json.dumps(entries), 'json')
+                else:
+                    return Response({'error': 'Provide a CSV/JSON file or an entries list.'}, status=status.HTTP_400_BAD_REQUEST)
+        except WhitelistImportError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = import_whitelist_rows(
+            rows,
+            invited_by=request.user,
+            default_section=(request.data.get('role') or SECTION_MEMBERS),
+            allowed_sections=VALID_SECTIONS if actor.is_team_leader else {SECTION_MEMBERS},
+            dry_run=_truthy(request.data.get('dry_run', False)),
+            actor_member=actor,
+            ip_address=get_client_ip(request),
+        )
+        return Response(result)
+
+    ROLE_FIELDS = ['is_team_leader', 'is_coleader', 'role_en', 'role_es']
+
+    @staticmethod
+    def _lock_team_roles(team_id, *member_ids):
+        """
+        Lock the team's leader/co-leader rows plus member_ids for the current
+        transaction, in id order, and return them by id. Members that are no
+        longer on the team are absent.
+        """
+        rows = (
+            Member.objects.select_for_update()
+            .filter(team_id=team_id)
+            .filter(Q(is_team_leader=True) | Q(is_coleader=True) | Q(id__in=member_ids))
+            .only('id', 'team_id', 'user_id', 'email', 'is_active', *MemberViewSet.ROLE_FIELDS)
+            .order_by('id')
+        )
+        return {member.id: member for member in rows}
+
+    @staticmethod
+    def _save_role_changes(released, assigned=()):
+        """
+        Write role changes as CASE-based bulk updates and invalidate cached
+        team payloads once the transaction commits. Rows giving up a leader or
+        co-leader slot are written before the rows taking one, because
+        PostgreSQL checks the per-team partial unique indexes row by row.
+        """
+        for members in (released, assigned):
+            if members:
+                Member.objects.bulk_update(members, MemberViewSet.ROLE_FIELDS)
+        MemberViewSet._invalidate_team_payloads()
+
+    @staticmethod
+    def _invalidate_team_payloads():
+        # Queryset and bulk writes skip the post_save receivers that normally do this.
+        transaction.on_commit(invalidate_bootstrap_cache)
+        publish_snapshot_on_commit()
+
+    @staticmethod
+    def _set_role(member, role_en, role_es, is_team_leader=None, is_coleader=None):
+        if is_team_leader is not None:
+            member.is_team_leader = is_team_leader
+        if is_coleader is not None:
+            member.is_coleader = is_coleader
+        member.role_en = role_en
+        member.role_es = role_es
+        return member
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated], throttle_classes=[BurstRateThrottle])
     def kick(self, request, pk=None):
         actor = getattr(request.user, 'member_profile', None)
@@ -301,26 +582,32 @@ class MemberViewSet(viewsets.ModelViewSet):
         if not confirm:
             return Response({'error': 'Action confirmation is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not actor or actor.team_id != target.team_id:
+        if not actor:
             return Response({'error': 'Invalid team scope.'}, status=status.HTTP_403_FORBIDDEN)
 
-        if actor.id == target.id:
-            return Response({'error': 'You cannot kick yourself.'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            locked = self._lock_team_roles(target.team_id, actor.id, target.id)
+            actor, target = locked.get(actor.id), locked.get(target.id)
 
-        if actor.is_coleader and (target.is_team_leader or target.is_coleader):
-            return Response({'error': 'Co-leaders cannot remove leaders or co-leaders.'}, status=status.HTTP_403_FORBIDDEN)
+            if not actor or not target:
+                return Response({'error': 'Invalid team scope.'}, status=status.HTTP_403_FORBIDDEN)
 
-        if not actor.is_team_leader and not actor.is_coleader:
-            return Response({'error': 'You do not have permission to kick members.'}, status=status.HTTP_403_FORBIDDEN)
+            if actor.id == target.id:
+                return Response({'error': 'You cannot kick yourself.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        target.is_active = False
-        if target.user:
-            target.user.is_active = False
-            target.user.save(update_fields=['is_active'])
-        target.save(update_fields=['is_active'])
+            if actor.is_coleader and (target.is_team_leader or target.is_coleader):
+                return Response({'error': 'Co-leaders cannot remove leaders or co-leaders.'}, status=status.HTTP_403_FORBIDDEN)
 
-        if target.email:
-            remove_email_from_whitelist(target.email)
+            if not actor.is_team_leader and not actor.is_coleader:
+                return Response({'error': 'You do not have permission to kick members.'}, status=status.HTTP_403_FORBIDDEN)
+
+            Member.objects.filter(pk=target.pk).update(is_active=False)
+            if target.user_id:
+                User.objects.filter(pk=target.user_id).update(is_active=False)
+
+            if target.email:
+                remove_email_from_whitelist(target.email)
+            self._invalidate_team_payloads()
 
         return Response({'message': 'Member access revoked.', 'member_id': target.id})
 
@@ -333,27 +620,31 @@ class MemberViewSet(viewsets.ModelViewSet):
         if not confirm:
             return Response({'error': 'Action confirmation is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not actor or not actor.is_team_leader:
+        if not actor:
             return Response({'error': 'Only team leaders can transfer leadership.'}, status=status.HTTP_403_FORBIDDEN)
 
-        if actor.team_id != target.team_id:
-            return Response({'error': 'Target member must belong to your team.'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            locked = self._lock_team_roles(target.team_id, actor.id, target.id)
+            actor_row, target = locked.get(actor.id), locked.get(target.id)
 
-        if actor.id == target.id:
-            return Response({'error': 'Leadership must be transferred to a different member.'}, status=status.HTTP_400_BAD_REQUEST)
+            # An actor outside the target's team is not locked; judge their role from the profile.
+            if not (actor_row or actor).is_team_leader:
+                return Response({'error': 'Only team leaders can transfer leadership.'}, status=status.HTTP_403_FORBIDDEN)
 
-        if not target.is_coleader:
-            return Response({'error': 'Leadership can only be transferred to a co-leader.'}, status=status.HTTP_400_BAD_REQUEST)
+            if not actor_row or not target:
+                return Response({'error': 'Target member must belong to your team.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        with transaction.atomic():
-            actor.is_team_leader = False
-            actor.save(update_fields=['is_team_leader'])
+            if actor_row.id == target.id:
+                return Response({'error': 'Leadership must be transferred to a different member.'}, status=status.HTTP_400_BAD_REQUEST)
+
+            if not target.is_coleader:
+                return Response({'error': 'Leadership can only be transferred to a co-leader.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            target.is_team_leader = True
-            target.is_coleader = False
-            target.role_en = 'Team Leader'
-            target.role_es = 'Líder de Equipo'
-            target.save(update_fields=['is_team_leader', 'is_coleader', 'role_en', 'role_es'])
+            actor_row.is_team_leader = False
+            self._save_role_changes(
+                [actor_row],
+                [self._set_role(target, 'Team Leader', 'Líder de Equipo', is_team_leader=True, is_coleader=False)],
+            )
 
         return Response({'message': 'Leadership transferred successfully. Reload session to refresh permissions.'})
 
@@ -366,31 +657,32 @@ class MemberViewSet(viewsets.ModelViewSet):
         if not confirm:
             return Response({'error': 'Action confirmation is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not actor or not actor.is_coleader:
+        if not actor:
             return Response({'error': 'Only a co-leader can transfer co-leadership.'}, status=status.HTTP_403_FORBIDDEN)
 
-        if actor.team_id != target.team_id:
-            return Response({'error': 'Target member must belong to your team.'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            locked = self._lock_team_roles(target.team_id, actor.id, target.id)
+            actor_row, target = locked.get(actor.id), locked.get(target.id)
 
-        if actor.id == target.id:
-            return Response({'error': 'Co-leadership must be transferred to a different member.'}, status=status.HTTP_400_BAD_REQUEST)
+            if not (actor_row or actor).is_coleader:
+                return Response({'error': 'Only a co-leader can transfer co-leadership.'}, status=status.HTTP_403_FORBIDDEN)
 
-        if target.is_team_leader:
-            return Response({'error': 'Leader cannot receive co-leadership.'}, status=status.HTTP_400_BAD_REQUEST)
+            if not actor_row or not target:
+                return Response({'error': 'Target member must belong to your team.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if Member.objects.filter(team_id=actor.team_id, is_coleader=True).exclude(pk=actor.pk).exists():
-            return Response({'error': 'Team already has another active co-leader.'}, status=status.HTTP_400_BAD_REQUEST)
+            if actor_row.id == target.id:
+                return Response({'error': 'Co-leadership must be transferred to a different member.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        with transaction.atomic():
-            actor.is_coleader = False
-            actor.role_en = 'Member'
-            actor.role_es = 'Miembro'
-            actor.save(update_fields=['is_coleader', 'role_en', 'role_es'])
+            if target.is_team_leader:
+                return Response({'error': 'Leader cannot receive co-leadership.'}, status=status.HTTP_400_BAD_REQUEST)
+
+            if any(member.is_coleader for member in locked.values() if member.id != actor_row.id):
+                return Response({'error': 'Team already has another active co-leader.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            target.is_coleader = True
-            target.role_en = 'Co-Leader'
-            target.role_es = 'Co-Líder'
-            target.save(update_fields=['is_coleader', 'role_en', 'role_es'])
+            self._save_role_changes(
+                [self._set_role(actor_row, 'Member', 'Miembro', is_coleader=False)],
+                [self._set_role(target, 'Co-Leader', 'Co-Líder', is_coleader=True)],
+            )
 
         return Response({'message': 'Co-leadership transferred successfully. Reload session to refresh permissions.'})
 
@@ -403,29 +695,35 @@ class MemberViewSet(viewsets.ModelViewSet):
         if not confirm:
             return Response({'error': 'Action confirmation is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not actor or not actor.is_team_leader:
+        if not actor:
             return Response({'error': 'Only a leader can assign or remove co-leader.'}, status=status.HTTP_403_FORBIDDEN)
 
-        if actor.team_id != target.team_id:
-            return Response({'error': 'Target member must belong to your team.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if target.is_team_leader:
-            return Response({'error': 'Leader cannot be co-leader.'}, status=status.HTTP_400_BAD_REQUEST)
-
         should_set = bool(request.data.get('is_coleader', True))
 
         with transaction.atomic():
+            locked = self._lock_team_roles(target.team_id, actor.id, target.id)
+            actor_row, target = locked.get(actor.id), locked.get(target.id)
+
+            if not (actor_row or actor).is_team_leader:
+                return Response({'error': 'Only a leader can assign or remove co-leader.'}, status=status.HTTP_403_FORBIDDEN)
+
+            if not actor_row or not target:
+                return Response({'error': 'Target member must belong to your team.'}, status=status.HTTP_400_BAD_REQUEST)
+
+            if target.is_team_leader:
+                return Response({'error': 'Leader cannot be co-leader.'}, status=status.HTTP_400_BAD_REQUEST)
+
             if should_set:
-                Member.objects.filter(team_id=target.team_id, is_coleader=True).exclude(pk=target.pk).update(is_coleader=False, role_en='Member', role_es='Miembro')
-                target.is_coleader = True
-                target.role_en = 'Co-Leader'
-                target.role_es = 'Co-Líder'
-                target.save(update_fields=['is_coleader', 'role_en', 'role_es'])
+                self._save_role_changes(
+                    [
+                        self._set_role(member, 'Member', 'Miembro', is_coleader=False)
+                        for member in locked.values()
+                        if member.is_coleader and member.id != target.id
+                    ],
+                    [self._set_role(target, 'Co-Leader', 'Co-Líder', is_coleader=True)],
+                )
             else:
-                target.is_coleader = False
-                target.role_en = 'Member'
-                target.role_es = 'Miembro'
-                target.save(update_fields=['is_coleader', 'role_en', 'role_es'])
+                self._save_role_changes([self._set_role(target, 'Member', 'Miembro', is_coleader=False)])
 
         return Response({'message': 'Co-leader status updated.', 'member_id': target.id, 'is_coleader': target.is_coleader})
 
@@ -437,20 +735,67 @@ class MemberViewSet(viewsets.ModelViewSet):
         data = [link.to_dict() for link in links]
         return Response(data)
 
+    AUTOCOMPLETE_FIELDS = ('name', 'career_en', 'career_es', 'role_en', 'role_es')
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Typo-tolerant lookup over active members' name, career and role.
+        Matches use the lower() pg_trgm indexes on members; name similarity ranks first.
+        Returns compact [id, name, image] rows.
+        """
+        term = (request.query_params.get('q') or '').strip()
+        if len(term) < 2:
+            return Response([])
+        try:
+            limit = min(max(int(request.query_params.get('limit', 8)), 1), 25)
+        except (TypeError, ValueError):
+            limit = 8
+
+        # Both predicates go through lower(col) so each one is served by the
+        # expression trigram indexes; icontains wraps the column in UPPER(),
+        # which no index covers, and would force a sequential scan.
+        lowered = {f'{field}_lower': Lower(field) for field in self.AUTOCOMPLETE_FIELDS}
+        match = Q()
+        for alias in lowered:
+            match |= Q(**{f'{alias}__trigram_word_similar': term}) | Q(**{f'{alias}__contains': term.lower()})
+
+        rows = (
+            Member.objects.filter(user__isnull=False, is_active=True)
+            .alias(**lowered)
+            .filter(match)
+            .annotate(
+                name_score=TrigramWordSimilarity(term, 'name'),
+                score=Greatest(*(TrigramWordSimilarity(term, field) for field in self.AUTOCOMPLETE_FIELDS[1:])),
+            )
+            .order_by('-name_score', '-score', 'name', 'id')
+            .values_list('id', 'name', 'image')[:limit]
+        )
+
+        storage = Member._meta.get_field('image').storage
+        return Response([
+            [member_id, name, storage.url(image) if image else None]
+            for member_id, name, image in rows
+        ])
+
 
-class PublicationViewSet(viewsets.ModelViewSet):
+class PublicationViewSet(SparseFieldsMixin, MultiGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Publication model
     GET /api/publications/ - List all publications (public)
     GET /api/publications/{id}/ - Get publication details (public)
+    GET /api/publications/search/?q= - Ranked full-text search (public)
+    GET /api/publications/batch/?ids=1,2 or ?slugs=a,b - Get several publications in one request (public)
+    ?fields=a,b on list/retrieve returns (and loads) only those keys
     POST /api/publications/ - Create new publication (authenticated members)
     PUT /api/publications/{id}/ - Update publication (author or team leader)
     DELETE /api/publications/{id}/ - Delete publication (author or team leader)
     """
-    queryset = Publication.objects.select_related('team', 'author').all()
+    queryset = Publication.objects.select_related('team', 'author').defer('search_vector')
     serializer_class = PublicationSerializer
     pagination_class = StandardResultsSetPagination
     lookup_field = 'slug'
+    batch_lookups = {'ids': 'id', 'slugs': 'slug'}
 
     def get_permissions(self):
         """
@@ -458,7 +803,7 @@ class PublicationViewSet(viewsets.ModelViewSet):
         Create: Any authenticated member
         Update/Delete: Author or team leader of same team
         """
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'search', 'batch']:
             permission_classes = [AllowAny]
         elif self.action == 'create':
             permission_classes = [IsAuthenticated]
@@ -477,14 +822,57 @@ class PublicationViewSet(viewsets.ModelViewSet):
         if team_id:
             queryset = queryset.filter(team_id=team_id)
         
-        data = [publication.to_dict(language) for publication in queryset]
+        fields = self.get_sparse_fields()
+        data = [publication.to_dict(language, fields=fields) for publication in queryset]
         return Response(data)
 
     def retrieve(self, request, slug=None):
         """Get a specific publication with language support"""
         language = request.query_params.get('lang', 'en')
         publication = self.get_object()
-        return Response(publication.to_dict(language))
+        return Response(publication.to_dict(language, fields=self.get_sparse_fields()))
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked bilingual full-text search over titles and abstracts, paginated with highlights."""
+        language = request.query_params.get('lang', 'en')
+        terms = (request.query_params.get('q') or '').strip()
+        if not terms:
+            return Response({'error': 'q parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        suffix, config = ('en', 'english') if language == 'en' else ('es', 'spanish')
+        query = (
+            SearchQuery(terms, config='english', search_type='websearch')
+            | SearchQuery(terms, config='spanish', search_type='websearch')
+        )
+        queryset = self.get_queryset().filter(search_vector=query)
+        team_id = request.query_params.get('team')
+        if team_id:
+            queryset = queryset.filter(team_id=team_id)
+
+        # Headlines are only computed for the rows that survive ORDER BY ... LIMIT.
+        queryset = queryset.annotate(
+            rank=SearchRank(F('search_vector'), query),
+            name_highlight=SearchHeadline(
+                f'name_{suffix}', query, config=config,
+                start_sel=HIGHLIGHT_START_SEL, stop_sel=HIGHLIGHT_STOP_SEL, highlight_all=True,
+            ),
+            abstract_highlight=SearchHeadline(
+                f'abstract_{suffix}', query, config=config,
+                start_sel=HIGHLIGHT_START_SEL, stop_sel=HIGHLIGHT_STOP_SEL, max_fragments=2,
+            ),
+        ).order_by('-rank', '-publication_date', 'id')
+
+        data = []
+        for publication in self.paginate_queryset(queryset):
+            item = publication.to_dict(language)
+            item['rank'] = publication.rank
+            item['highlight'] = {
+                'name': render_highlight(publication.name_highlight),
+                'abstract': render_highlight(publication.abstract_highlight),
+            }
+            data.append(item)
+        return self.get_paginated_response(data)
 
     def create(self, request):
         """Create a new publication with automatic author assignment."""
@@ -534,3 +922,27 @@ class RedSocialViewSet(viewsets.ModelViewSet):
         
         data = [link.to_dict() for link in queryset]
         return Response(data)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def bootstrap_view(request):
+    """
+    GET /api/bootstrap/?lang=en&publications=6
+    Teams with their active members plus the latest publications in one response.
+    """
+    language = request.query_params.get('lang', 'en')
+    if language not in ('en', 'es'):
+        language = 'en'
+    try:
+        limit = min(max(int(request.query_params.get('publications', DEFAULT_PUBLICATION_LIMIT)), 0), MAX_PUBLICATION_LIMIT)
+    except (TypeError, ValueError):
+        limit = DEFAULT_PUBLICATION_LIMIT
+
+    body, etag = get_bootstrap_document(language, limit)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = f"public, max-age={int(getattr(settings, 'BOOTSTRAP_CACHE_SECONDS', 60))}"
+    return response
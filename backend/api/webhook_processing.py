@@ -0,0 +1,285 @@
+"""
+Webhook event processing shared by the payment views and the
+process_webhook_events management command.
+
+In acknowledge-then-process mode (PAYMENT_WEBHOOK_ASYNC) the views only
+verify and persist PaymentWebhookEvent rows; drain_webhook_events() applies
+them later in batches. The work queue is every unprocessed, unparked event
+whose next_attempt_at is due; failures are retried with exponential backoff
+and parked after PAYMENT_WEBHOOK_MAX_ATTEMPTS.
+
+Deliveries can arrive out of order, so a checkout session or Payment that
+reached a final status is never moved again by a later event.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .metrics import observe_webhook_lag
+from .models import Payment, PaymentCheckoutSession, PaymentWebhookEvent, SecurityAuditEvent
+
+logger = logging.getLogger(__name__)
+
+STRIPE_SUCCESS_EVENTS = {'checkout.session.completed', 'payment_intent.succeeded', 'invoice.paid'}
+STRIPE_FAILURE_EVENTS = {'payment_intent.payment_failed', 'charge.failed'}
+
+PAYU_EVENT_TYPE = 'payu.ipn'
+
+MAX_RETRY_DELAY = timedelta(hours=6)
+
+FINAL_CHECKOUT_STATUSES = {
+    PaymentCheckoutSession.STATUS_SUCCEEDED,
+    PaymentCheckoutSession.STATUS_FAILED,
+    PaymentCheckoutSession.STATUS_CANCELED,
+}
+
+
+class CheckoutBusy(Exception):
+    """Raised when the checkout row for a webhook is locked by a concurrent delivery."""
+
+
+def stripe_event_targets(payload):
+    """Return (provider_session_id, reference) referenced by a Stripe event payload."""
+    data_object = (payload.get('data') or {}).get('object') or {}
+    provider_session_id = str(data_object.get('id') or '').strip()
+    reference = ((data_object.get('metadata') or {}).get('reference') or '').strip()
+    return provider_session_id, reference
+
+
+def lock_stripe_checkout(provider_session_id, reference):
+    """Lock the checkout targeted by a Stripe event without waiting on other deliveries.
+
+    Returns (checkout, busy): busy is True when a matching row exists but is
+    currently locked by another transaction.
+    """
+    locking = PaymentCheckoutSession.objects.select_for_update(skip_locked=True)
+    lookups = []
+    if provider_session_id:
+        lookups.append({'provider': 'stripe', 'provider_session_id': provider_session_id})
+    if reference:
+        lookups.append({'reference': reference})
+
+    for lookup in lookups:
+        checkout = locking.filter(**lookup).first()
+        if checkout:
+            return checkout, False
+
+    busy = any(PaymentCheckoutSession.objects.filter(**lookup).exists() for lookup in lookups)
+    return None, busy
+
+
+def apply_stripe_event(checkout, event_type, provider_session_id):
+    if checkout.status in FINAL_CHECKOUT_STATUSES:
+        return
+    if event_type in STRIPE_SUCCESS_EVENTS:
+        checkout.transition(PaymentCheckoutSession.STATUS_SUCCEEDED)
+    elif event_type in STRIPE_FAILURE_EVENTS:
+        checkout.transition(PaymentCheckoutSession.STATUS_FAILED)
+    else:
+        return
+    checkout.provider_session_id = checkout.provider_session_id or provider_session_id or None
+    checkout.save(update_fields=['status', 'provider_session_id', 'updated_at'])
+
+
+def payu_status_for_state(state):
+    """Map a PayU state_pol value to a Payment status."""
+    if state in {'4', 'approved', 'succeeded'}:
+        return Payment.STATUS_SUCCEEDED
+    if state in {'6', 'declined', 'failed'}:
+        return Payment.STATUS_FAILED
+    if state in {'5', 'canceled'}:
+        return Payment.STATUS_CANCELED
+    return Payment.STATUS_PENDING
+
+
+def payu_notification_fields(payload):
+    """Return (tx_ref, state) from a PayU IPN payload."""
+    tx_ref = str(payload.get('reference_sale') or payload.get('referenceCode') or '').strip()
+    state = str(payload.get('state_pol') or payload.get('state') or '').strip().lower()
+    return tx_ref, state
+
+
+def apply_payu_notification(tx_ref, state):
+    """
+    Update the Payment referenced by a PayU IPN; return it, or None when unknown.
+    Only a pending payment changes status, and the update is conditional on it
+    still being pending, so a late notification cannot undo a settled one.
+    """
+    payment = Payment.objects.filter(payu_transaction_id=tx_ref).first()
+    if not payment:
+        return None
+
+    new_status = payu_status_for_state(state)
+    if payment.status == Payment.STATUS_PENDING and new_status != payment.status:
+        if Payment.objects.filter(pk=payment.pk, status=Payment.STATUS_PENDING).update(status=new_status):
+            payment.status = new_status
+        else:
+            payment.refresh_from_db(fields=['status'])
+    return payment
+
+
+def _process_stripe_event(event):
+    provider_session_id, reference = stripe_event_targets(event.raw_payload or {})
+    checkout, busy = lock_stripe_checkout(provider_session_id, reference)
+    if busy:
+        raise CheckoutBusy()
+
+    if checkout:
+        apply_stripe_event(checkout, event.event_type, provider_session_id)
+
+    SecurityAuditEvent.objects.create(
+        event_type='payment.webhook.accepted',
+        severity='info',
+        details={
+            'event_id': event.provider_event_id,
+            'event_type': event.event_type,
+            'checkout_reference': reference,
+            'deferred': True,
+        },
+    )
+
+
+def _process_payu_event(event):
+    tx_ref, state = payu_notification_fields(event.raw_payload or {})
+    payment = apply_payu_notification(tx_ref, state)
+    if payment:
+        SecurityAuditEvent.objects.create(
+            event_type='payment.payu_webhook.accepted',
+            severity='info',
+            details={'tx_ref': tx_ref, 'state': state, 'payment_id': payment.id, 'deferred': True},
+        )
+
+
+EVENT_PROCESSORS = {
+    'stripe': _process_stripe_event,
+    'payu': _process_payu_event,
+}
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt of an event that has failed `attempts` times."""
+    base = timedelta(seconds=int(getattr(settings, 'PAYMENT_WEBHOOK_RETRY_BASE_SECONDS', 30)))
+    return min(base * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY)
+
+
+def _record_failure(event, error, now):
+    """Push a failed event back by its backoff, or park it once out of attempts."""
+    event.attempts += 1
+    event.last_error = error[:2000]
+    if event.attempts >= int(getattr(settings, 'PAYMENT_WEBHOOK_MAX_ATTEMPTS', 8)):
+        event.parked_at = now
+        logger.error(
+            'webhook_drain parked provider=%s event=%s attempts=%s',
+            event.provider, event.provider_event_id, event.attempts,
+        )
+    else:
+        event.next_attempt_at = now + retry_delay(event.attempts)
+    event.save(update_fields=['attempts', 'last_error', 'next_attempt_at', 'parked_at'])
+    return event.parked_at is not None
+
+
+def _claim_due_event(skip_ids):
+    """Lock the next due event that no other worker holds, or return None."""
+    return (
+        PaymentWebhookEvent.objects.select_for_update(skip_locked=True)
+        .filter(processed_at__isnull=True, parked_at__isnull=True, next_attempt_at__lte=timezone.now())
+        .exclude(pk__in=skip_ids)
+        .order_by('next_attempt_at', 'id')
+        .first()
+    )
+
+
+def drain_webhook_events(batch_size=None):
+    """
+    Process up to one batch of due webhook events.
+
+    Each event is claimed with select_for_update(skip_locked=True) and
+    processed and committed in its own transaction, so several workers can
+    drain concurrently and a slow event only holds its own row lock. A
+    failing event is logged, its attempt recorded and it is rescheduled (or
+    parked), so it cannot hold back the events behind it.
+
+    Returns:
+        dict: {'claimed': int, 'processed': int, 'failed': int, 'parked': int}
+    """
+    batch_size = int(batch_size or getattr(settings, 'PAYMENT_WEBHOOK_BATCH_SIZE', 100))
+    # Events seen by this run; a busy one stays due but is not retried until the next run.
+    claimed_ids = []
+    processed = 0
+    failed = 0
+    parked = 0
+
+    while len(claimed_ids) < batch_size:
+        with transaction.atomic():
+            event = _claim_due_event(claimed_ids)
+            if event is None:
+                break
+            claimed_ids.append(event.pk)
+            now = timezone.now()
+
+            processor = EVENT_PROCESSORS.get(event.provider)
+            if processor is None:
+                logger.warning('webhook_drain unknown provider=%s event=%s', event.provider, event.provider_event_id)
+                failed += 1
+                parked += _record_failure(event, f'Unknown provider {event.provider!r}.', now)
+                continue
+            try:
+                with transaction.atomic():
+                    processor(event)
+            except CheckoutBusy:
+                # Another delivery holds the checkout; not the event's fault, retry next batch.
+                failed += 1
+                continue
+            except Exception as exc:
+                logger.exception('webhook_drain failed provider=%s event=%s', event.provider, event.provider_event_id)
+                failed += 1
+                parked += _record_failure(event, f'{type(exc).__name__}: {exc}', now)
+                continue
+
+            event.processed_at = timezone.now()
+            event.save(update_fields=['processed_at'])
+        processed += 1
+        observe_webhook_lag(event.provider, (event.processed_at - event.received_at).total_seconds())
+
+    return {'claimed': len(claimed_ids), 'processed': processed, 'failed': failed, 'parked': parked}
+
+
+_drain_executor = None
+
+
+def _drain_in_background():
+    try:
+        drain_webhook_events()
+    except Exception:
+        logger.exception('webhook_drain background run failed')
+    finally:
+        connection.close()
+
+
+def schedule_drain():
+    """Drain pending events on a single in-process worker thread."""
+    global _drain_executor
+    if _drain_executor is None:
+        _drain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='webhook-drain')
+    _drain_executor.submit(_drain_in_background)
+
+
+def acknowledge(provider, provider_event_id, event_type, payload_hash, payload):
+    """Persist a verified delivery for later processing; return False for duplicates."""
+    webhook_event_id = PaymentWebhookEvent.insert_if_new(
+        provider=provider,
+        provider_event_id=provider_event_id,
+        event_type=event_type,
+        payload_hash=payload_hash,
+        raw_payload=payload,
+    )
+    if webhook_event_id is None:
+        return False
+
+    if getattr(settings, 'PAYMENT_WEBHOOK_DRAIN_IN_PROCESS', False):
+        transaction.on_commit(schedule_drain)
+    return True
@@ -0,0 +1,182 @@
+"""
+Bulk import of internal whitelist entries (semester onboarding).
+
+Rows come from a CSV (`email[,role]` with a header line) or JSON upload (a
+list of emails or of {"email", "role"} objects). Every row is validated in
+memory, existing entries are read with one query, and new or changed entries
+are upserted with bulk_create(update_conflicts=True). One summary
+SecurityAuditEvent is written per import; per-row outcomes are returned to
+the caller.
+"""
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .email_whitelist import (
+    SECTION_MEMBERS,
+    SECTION_TO_ROLE,
+    VALID_SECTIONS,
+    _normalize_email,
+)
+from .models import InternalWhitelistEntry, SecurityAuditEvent
+
+OUTCOME_CREATED = 'created'
+OUTCOME_UPDATED = 'updated'
+OUTCOME_UNCHANGED = 'unchanged'
+OUTCOME_DUPLICATE = 'duplicate'
+OUTCOME_INVALID = 'invalid'
+OUTCOME_FORBIDDEN = 'forbidden'
+
+OUTCOMES = (
+    OUTCOME_CREATED, OUTCOME_UPDATED, OUTCOME_UNCHANGED,
+    OUTCOME_DUPLICATE, OUTCOME_INVALID, OUTCOME_FORBIDDEN,
+)
+
+# Singular role names are accepted alongside the whitelist section names.
+_SECTION_ALIASES = {role: section for section, role in SECTION_TO_ROLE.items()}
+
+
+class WhitelistImportError(ValueError):
+    """The upload as a whole could not be read."""
+
+
+def _max_rows():
+    return int(getattr(settings, 'WHITELIST_IMPORT_MAX_ROWS', 5000))
+
+
+def parse_whitelist_rows(content, file_format=None):
+    """
+    Parse CSV or JSON upload content into [{'email', 'role'}] rows.
+
+    file_format is 'csv' or 'json'; when omitted it is guessed from the first
+    non-blank character.
+    """
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise WhitelistImportError('File must be UTF-8 encoded.')
+
+    file_format = (file_format or '').lower()
+    if not file_format:
+        file_format = 'json' if content.lstrip()[:1] in ('[', '{') else 'csv'
+
+    if file_format == 'json':
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError:
+            raise WhitelistImportError('Invalid JSON.')
+        if isinstance(data, dict):
+            data = data.get('entries')
+        if not isinstance(data, list):
+            raise WhitelistImportError('JSON must be a list of entries.')
+        rows = data
+    elif file_format == 'csv':
+        reader = csv.DictReader(io.StringIO(content))
+        fieldnames = [(name or '').strip().lower() for name in reader.fieldnames or []]
+        if 'email' not in fieldnames:
+            raise WhitelistImportError('CSV header must include an "email" column.')
+        reader.fieldnames = fieldnames
+        rows = list(reader)
+    else:
+        raise WhitelistImportError('Unsupported format; use CSV or JSON.')
+
+    if len(rows) > _max_rows():
+        raise WhitelistImportError(f'Too many rows (max {_max_rows()}).')
+
+    return [
+        {'email': row, 'role': None} if isinstance(row, str)
+        else {'email': row.get('email'), 'role': row.get('role')} if isinstance(row, dict)
+        else {'email': None, 'role': None}
+        for row in rows
+    ]
+
+
+def import_whitelist_rows(rows, invited_by=None, default_section=SECTION_MEMBERS,
+                          allowed_sections=VALID_SECTIONS, dry_run=False,
+                          actor_member=None, ip_address=None, source='api'):
+    """
+    Validate and upsert whitelist rows.
+
+    A later row for the same email wins; earlier ones are reported as
+    duplicates. Rows whose section is not in allowed_sections are reported as
+    forbidden and left untouched.
+
+    Returns:
+        dict: {'summary': {outcome: count, 'total': int}, 'rows': [...]}
+    """
+    results = []
+    latest_by_email = {}
+    for number, row in enumerate(rows, start=1):
+        email = row.get('email')
+        email = _normalize_email(email) if isinstance(email, str) else ''
+        section = str(row.get('role') or default_section or '').strip().lower()
+        section = _SECTION_ALIASES.get(section, section)
+        result = {'row': number, 'email': email, 'role': section}
+        results.append(result)
+
+        if not email:
+            result.update(status=OUTCOME_INVALID, error='Email is required.')
+            continue
+        try:
+            validate_email(email)
+        except ValidationError:
+            result.update(status=OUTCOME_INVALID, error='Invalid email format.')
+            continue
+        if section not in VALID_SECTIONS:
+            result.update(status=OUTCOME_INVALID, error='Invalid role section.')
+            continue
+        if section not in allowed_sections:
+            result.update(status=OUTCOME_FORBIDDEN, error='Role section not allowed for this user.')
+            continue
+
+        previous = latest_by_email.get(email)
+        if previous is not None:
+            previous.update(status=OUTCOME_DUPLICATE, error=f'Superseded by row {number}.')
+        latest_by_email[email] = result
+
+    existing = dict(
+        InternalWhitelistEntry.objects.filter(email__in=list(latest_by_email)).values_list('email', 'internal_role')
+    )
+
+    pending = []
+    for email, result in latest_by_email.items():
+        role = SECTION_TO_ROLE[result['role']]
+        if email not in existing:
+            result['status'] = OUTCOME_CREATED
+        elif existing[email] != role:
+            result['status'] = OUTCOME_UPDATED
+        else:
+            result['status'] = OUTCOME_UNCHANGED
+            continue
+        pending.append(InternalWhitelistEntry(email=email, internal_role=role, invited_by=invited_by))
+
+    summary = {outcome: 0 for outcome in OUTCOMES}
+    for result in results:
+        summary[result['status']] += 1
+    summary['total'] = len(results)
+
+    if not dry_run:
+        with transaction.atomic():
+            if pending:
+                InternalWhitelistEntry.objects.bulk_create(
+                    pending,
+                    batch_size=1000,
+                    update_conflicts=True,
+                    unique_fields=['email'],
+                    update_fields=['internal_role', 'invited_by'],
+                )
+            SecurityAuditEvent.objects.create(
+                event_type='whitelist.bulk_import',
+                severity='info',
+                actor_member=actor_member,
+                ip_address=ip_address,
+                details={'source': source, **summary},
+            )
+
+    return {'summary': summary, 'rows': results}
@@ -54,6 +54,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Third party apps
     'rest_framework',
     'corsheaders',
@@ -63,6 +64,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.ProfilingMiddleware',
+    'api.middleware.RequestMetricsMiddleware',
+    'api.middleware.ApiCompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
     'api.middleware.ApiContentTypeGuardMiddleware',
@@ -139,11 +143,55 @@ DATABASES = build_database_settings()
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'api.cache.InstrumentedLocMemCache',
         'LOCATION': 'candelaria-security-cache',
-    }
+    },
+    # Precompressed API response bodies (see api.middleware.ApiCompressionMiddleware).
+    'compression': {
+        'BACKEND': 'api.cache.InstrumentedLocMemCache',
+        'LOCATION': 'candelaria-compression-cache',
+        'OPTIONS': {'MAX_ENTRIES': 200},
+    },
 }
 
+API_COMPRESSION_ENABLED = os.getenv('API_COMPRESSION_ENABLED', 'True').strip().lower() in ('true', '1', 'yes')
+API_COMPRESSION_MIN_BYTES = int(os.getenv('API_COMPRESSION_MIN_BYTES', '1024'))
+API_COMPRESSION_CACHE_MAX_BYTES = int(os.getenv('API_COMPRESSION_CACHE_MAX_BYTES', '2000000'))
+API_COMPRESSION_CACHE_TIMEOUT = int(os.getenv('API_COMPRESSION_CACHE_TIMEOUT', '3600'))
+# Per-process cache lifetime (and public max-age) of /api/bootstrap/ payloads.
+BOOTSTRAP_CACHE_SECONDS = int(os.getenv('BOOTSTRAP_CACHE_SECONDS', '60'))
+# How long each process trusts its TEAM_LEADERS_* -> team id index (api.team_leader_utils).
+TEAM_INDEX_CACHE_SECONDS = int(os.getenv('TEAM_INDEX_CACHE_SECONDS', '300'))
+
+
+# Per-request query/cache/storage/latency metrics (api.middleware.RequestMetricsMiddleware):
+# Server-Timing for staff, `api.requests` log lines for a sample plus slow requests.
+REQUEST_METRICS_ENABLED = os.getenv('REQUEST_METRICS_ENABLED', 'True').strip().lower() in ('true', '1', 'yes')
+REQUEST_METRICS_LOG_SAMPLE_RATE = float(os.getenv('REQUEST_METRICS_LOG_SAMPLE_RATE', '0.0'))
+REQUEST_METRICS_SLOW_MS = int(os.getenv('REQUEST_METRICS_SLOW_MS', '1000'))
+
+# Prometheus metrics (api.metrics) scraped from /api/metrics/ with
+# `Authorization: Bearer <METRICS_TOKEN>` or a staff login. Set
+# METRICS_MULTIPROC_DIR when several worker processes serve one target.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').strip().lower() in ('true', '1', 'yes')
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '').strip()
+METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR', '').strip()
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '10'))
+
+# Max records waiting on the security log queue (api.security_logging);
+# records beyond this are dropped and counted rather than blocking requests.
+SECURITY_LOG_QUEUE_SIZE = int(os.getenv('SECURITY_LOG_QUEUE_SIZE', '10000'))
+
+# Staff-only single-request profiler (api.profiling): tokens from
+# POST /api/profiling/token/, captures saved under profiles/ in the private
+# "profiles" storage (see STORAGES below), never in the public media bucket.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True').strip().lower() in ('true', '1', 'yes')
+PROFILING_TOKEN_MAX_AGE = int(os.getenv('PROFILING_TOKEN_MAX_AGE', '600'))
+PROFILING_MAX_PER_HOUR = int(os.getenv('PROFILING_MAX_PER_HOUR', '10'))
+PROFILING_MIN_INTERVAL_SECONDS = int(os.getenv('PROFILING_MIN_INTERVAL_SECONDS', '60'))
+PROFILING_INTERVAL_MS = float(os.getenv('PROFILING_INTERVAL_MS', '5'))
+PROFILING_MAX_SECONDS = float(os.getenv('PROFILING_MAX_SECONDS', '30'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -202,8 +250,10 @@ CORS_ALLOW_HEADERS = [
     'origin',
     'user-agent',
     'x-csrftoken',
+    'x-profile-token',
     'x-requested-with',
 ]
+CORS_EXPOSE_HEADERS = ['x-profile-status']
 
 CSRF_TRUSTED_ORIGINS = _parse_csv_env('CSRF_TRUSTED_ORIGINS')
 
@@ -229,6 +279,19 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 100,
 }
 
+# orjson-backed JSON renderer/parser (falls back to DRF's encoder when orjson
+# is not installed). Set API_FAST_JSON=False to use the stock classes.
+if os.getenv('API_FAST_JSON', 'True').strip().lower() in ('true', '1', 'yes'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ]
+
 # JWT Configuration
 from datetime import timedelta
 
@@ -261,6 +324,12 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY', '').strip()
 SUPABASE_STORAGE_BUCKET = os.getenv('SUPABASE_STORAGE_BUCKET', 'media').strip() or 'media'
 USE_SUPABASE_STORAGE = bool(SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY)
 
+# Profiler captures hold SQL text and stack traces: they go to a private
+# bucket (create it without public access) or, locally, a directory outside
+# MEDIA_ROOT, and are only readable through GET /api/profiling/<id>/.
+PROFILING_STORAGE_BUCKET = os.getenv('PROFILING_STORAGE_BUCKET', 'profiling').strip() or 'profiling'
+PROFILING_ROOT = BASE_DIR / 'profiling'
+
 if USE_SUPABASE_STORAGE:
     STORAGES = {
         'default': {
@@ -271,11 +340,54 @@ if USE_SUPABASE_STORAGE:
                 'service_role_key': SUPABASE_SERVICE_ROLE_KEY,
             },
         },
+        'profiles': {
+            'BACKEND': 'api.storage.SupabaseStorage',
+            'OPTIONS': {
+                'bucket_name': PROFILING_STORAGE_BUCKET,
+                'supabase_url': SUPABASE_URL,
+                'service_role_key': SUPABASE_SERVICE_ROLE_KEY,
+                'public': False,
+            },
+        },
+        'staticfiles': {
+            'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+        },
+    }
+else:
+    STORAGES = {
+        'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        },
+        'profiles': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': PROFILING_ROOT},
+        },
         'staticfiles': {
             'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
         },
     }
 
+# Publication PDF text extraction: rows are queued on upload and extracted by
+# `manage.py extract_publication_text` (or an in-process worker thread).
+PUBLICATION_TEXT_EXTRACT_IN_PROCESS = os.getenv('PUBLICATION_TEXT_EXTRACT_IN_PROCESS', 'False').strip().lower() in ('true', '1', 'yes')
+PUBLICATION_TEXT_MAX_CHARS = int(os.getenv('PUBLICATION_TEXT_MAX_CHARS', '200000'))
+PUBLICATION_TEXT_MAX_PAGES = int(os.getenv('PUBLICATION_TEXT_MAX_PAGES', '500'))
+# Extractions claimed longer ago than this (a crashed worker) are queued again.
+PUBLICATION_TEXT_CLAIM_TIMEOUT_SECONDS = int(os.getenv('PUBLICATION_TEXT_CLAIM_TIMEOUT_SECONDS', '900'))
+
+# Static catalog snapshots (`manage.py publish_snapshot`); republish on a
+# worker thread after Team/Member/Publication changes when enabled.
+PUBLISH_SNAPSHOT_ON_CHANGE = os.getenv('PUBLISH_SNAPSHOT_ON_CHANGE', 'False').strip().lower() in ('true', '1', 'yes')
+# Republish sitemap.xml and the Atom feeds (`manage.py refresh_feeds`) on a
+# worker thread after publication changes; the feed views never write storage.
+FEEDS_REFRESH_ON_CHANGE = os.getenv('FEEDS_REFRESH_ON_CHANGE', 'False').strip().lower() in ('true', '1', 'yes')
+# Per-process cache lifetime of feed documents rendered on request because
+# the stored ones are out of date (keys include the publications fingerprint).
+FEEDS_CACHE_SECONDS = int(os.getenv('FEEDS_CACHE_SECONDS', '3600'))
+
+# Row limit of one whitelist import (POST /api/members/invite/bulk/, `manage.py import_whitelist`).
+WHITELIST_IMPORT_MAX_ROWS = int(os.getenv('WHITELIST_IMPORT_MAX_ROWS', '5000'))
+
 # Frontend URL used in password reset emails
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
 
@@ -297,6 +409,17 @@ PAYMENT_WEBHOOK_TOLERANCE_SECONDS = int(os.getenv('PAYMENT_WEBHOOK_TOLERANCE_SEC
 PAYMENT_DEFAULT_CURRENCY = os.getenv('PAYMENT_DEFAULT_CURRENCY', 'usd').strip().lower()
 PAYMENT_MIN_AMOUNT_CENTS = int(os.getenv('PAYMENT_MIN_AMOUNT_CENTS', '100'))
 PAYMENT_MAX_AMOUNT_CENTS = int(os.getenv('PAYMENT_MAX_AMOUNT_CENTS', '5000000'))
+# Acknowledge-then-process webhooks: verify + persist + 202, then apply the
+# event from `manage.py process_webhook_events` (or an in-process worker thread).
+PAYMENT_WEBHOOK_ASYNC = os.getenv('PAYMENT_WEBHOOK_ASYNC', 'False').strip().lower() in ('true', '1', 'yes')
+PAYMENT_WEBHOOK_DRAIN_IN_PROCESS = os.getenv('PAYMENT_WEBHOOK_DRAIN_IN_PROCESS', 'False').strip().lower() in ('true', '1', 'yes')
+PAYMENT_WEBHOOK_BATCH_SIZE = int(os.getenv('PAYMENT_WEBHOOK_BATCH_SIZE', '100'))
+# Failed deferred events are retried after RETRY_BASE_SECONDS * 2^(attempts-1)
+# and parked (left for manual review) after MAX_ATTEMPTS failures.
+PAYMENT_WEBHOOK_MAX_ATTEMPTS = int(os.getenv('PAYMENT_WEBHOOK_MAX_ATTEMPTS', '8'))
+PAYMENT_WEBHOOK_RETRY_BASE_SECONDS = int(os.getenv('PAYMENT_WEBHOOK_RETRY_BASE_SECONDS', '30'))
+# Open checkout sessions are canceled by `manage.py expire_checkout_sessions` after this TTL.
+PAYMENT_CHECKOUT_TTL_SECONDS = int(os.getenv('PAYMENT_CHECKOUT_TTL_SECONDS', '86400'))
 PURCHASES_ENABLED = os.getenv(
     'PURCHASES_ENABLED',
     'True' if DEBUG else 'False'
@@ -394,6 +517,11 @@ if DEBUG:
                 'level': 'WARNING',
                 'propagate': False,
             },
+            'api.requests': {
+                'handlers': ['console'],
+                'level': 'INFO',
+                'propagate': False,
+            },
         },
     }
 else:
@@ -418,6 +546,11 @@ else:
                 'class': 'logging.StreamHandler',
                 'formatter': 'security',
             },
+            'requests_console': {
+                'level': 'INFO',
+                'class': 'logging.StreamHandler',
+                'formatter': 'verbose',
+            },
         },
         'loggers': {
             'security': {
@@ -430,5 +563,10 @@ else:
                 'level': 'WARNING',
                 'propagate': False,
             },
+            'api.requests': {
+                'handlers': ['requests_console'],
+                'level': 'INFO',
+                'propagate': False,
+            },
         },
     }
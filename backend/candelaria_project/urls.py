@@ -20,6 +20,7 @@ import os
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.static import serve
+from api.feed_views import sitemap_view
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -29,6 +30,7 @@ from rest_framework_simplejwt.views import (
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    path('sitemap.xml', sitemap_view, name='root_sitemap'),
     # JWT Token endpoints
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),